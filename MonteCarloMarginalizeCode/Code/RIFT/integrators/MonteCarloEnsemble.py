@@ -10,6 +10,7 @@ from . import gaussian_mixture_model as GMM
 import traceback
 import time
 from scipy.special import logsumexp
+from .sample_store import SampleStore
 
 regularize_log_scale = 1e-64  # before taking np.log, add this, so we don't propagate infinities
 
@@ -58,10 +59,16 @@ class integrator:
 
     use_lnL : bool
         Whether or not lnL or L will be returned by the integrand
+
+    store_max_samples : int
+        If set, the cumulative sample storage retains at most this many samples (highest lnL), so its memory is bounded
+
+    store_deltalnL : float
+        If set, stored samples with lnL below (running max lnL) - store_deltalnL are discarded when the storage fills
     '''
 
     def __init__(self, d, bounds, gmm_dict, n_comp, n=None, prior=None,
-                user_func=None, proc_count=None, L_cutoff=None, use_lnL=False,return_lnI=False,gmm_adapt=None,gmm_epsilon=None,tempering_exp=1,temper_log=False):
+                user_func=None, proc_count=None, L_cutoff=None, use_lnL=False,return_lnI=False,gmm_adapt=None,gmm_epsilon=None,tempering_exp=1,temper_log=False,store_max_samples=None,store_deltalnL=None):
         # if 'return_lnI' is active, 'integral' holds the *logarithm* of the integral.
         # user-specified parameters
         self.d = d
@@ -102,11 +109,11 @@ class integrator:
         if self.return_lnI:
             self.total_value = None
         self.n_max = float('inf')
-        # saved values
-        self.cumulative_samples = np.empty((0, d))
-        self.cumulative_values = np.empty(0)
-        self.cumulative_p = np.empty(0)
-        self.cumulative_p_s = np.empty(0)
+        # saved values: columnar, preallocated storage (one column per dimension, then lnL, prior, sampling prior)
+        if store_deltalnL is not None and not np.isfinite(store_deltalnL):
+            store_deltalnL = None
+        self.cumulative_store = SampleStore(list(range(d)) + ['lnL', 'p', 'p_s'], max_rows=store_max_samples,
+                                            key='lnL', delta=store_deltalnL)
         self.tempering_exp=tempering_exp
         self.temper_log=temper_log
         if L_cutoff is None:
@@ -114,6 +121,23 @@ class integrator:
         else:
             self.L_cutoff = L_cutoff
         
+    @property
+    def cumulative_samples(self):
+        # 2d array (copy) of the stored samples.  Use cumulative_store[dim] for a view of one dimension
+        return np.column_stack([self.cumulative_store[dim] for dim in range(self.d)]) if len(self.cumulative_store) else np.empty((0, self.d))
+
+    @property
+    def cumulative_values(self):
+        return self.cumulative_store['lnL']
+
+    @property
+    def cumulative_p(self):
+        return self.cumulative_store['p']
+
+    @property
+    def cumulative_p_s(self):
+        return self.cumulative_store['p_s']
+
     def _calculate_prior(self):
         if self.prior is None:
             self.prior_array = np.ones(self.n)
@@ -152,7 +176,8 @@ class integrator:
                 index += 1
 
     def _train(self):
-        sample_array, value_array, sampling_prior_array = np.copy(self.sample_array), np.copy(self.value_array), np.copy(self.sampling_prior_array)
+        # views: nothing below modifies these in place
+        sample_array, value_array, sampling_prior_array = self.sample_array, self.value_array, self.sampling_prior_array
         if self.use_lnL:
             lnL = value_array
         else:
@@ -194,7 +219,7 @@ class integrator:
 
     def _calculate_results(self):
         if self.use_lnL:
-            lnL = np.copy(self.value_array) # changing the naming convention, just for this function, now that I know better
+            lnL = self.value_array # changing the naming convention, just for this function, now that I know better
         else:
             lnL = np.log(self.value_array+regularize_log_scale)
         # strip off any samples with likelihoods less than our cutoff
@@ -203,11 +228,11 @@ class integrator:
         prior = self.prior_array[mask]
         sampling_prior = self.sampling_prior_array[mask]
         
-        # append to the cumulative arrays
-        self.cumulative_samples = np.append(self.cumulative_samples, self.sample_array[mask], axis=0)
-        self.cumulative_values = np.append(self.cumulative_values, lnL, axis=0)
-        self.cumulative_p = np.append(self.cumulative_p, prior, axis=0)
-        self.cumulative_p_s = np.append(self.cumulative_p_s, sampling_prior, axis=0)
+        # append to the cumulative storage
+        columns = {'lnL': lnL, 'p': prior, 'p_s': sampling_prior}
+        for dim in range(self.d):
+            columns[dim] = self.sample_array[mask, dim]
+        self.cumulative_store.append(columns)
         
         # compute the log sample weights
         log_weights = lnL + np.log(prior) - np.log(sampling_prior)
@@ -384,5 +409,7 @@ class integrator:
                     print(" : {} {} {} {} {} ".format((self.iterations-1)*self.n, self.eff_samp, np.sqrt(2*np.max(self.cumulative_values)), np.sqrt(2*np.log(self.integral)), "-" ) )
                 else:
                     print(" : {} {} {} {} {} ".format((self.iterations-1)*self.n, self.eff_samp, np.sqrt(2*np.max(self.cumulative_values)), np.sqrt(2*self.integral), "-" ) )
+        # bounded storage: apply the retention rules to what is left, so at most store_max_samples are returned
+        self.cumulative_store.compact()
         print('cumulative eval time: ', cumulative_eval_time)
         print('integrator iterations: ', self.iterations)
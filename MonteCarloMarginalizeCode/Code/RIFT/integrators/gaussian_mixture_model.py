@@ -25,6 +25,52 @@ import itertools
 # online updating features
 
 
+def _cholesky_factors(covariances):
+    '''
+    Inverse Cholesky factors (k,d,d) and log determinants (k,) of a set of covariance matrices.
+    Components whose covariance is not numerically positive definite are flagged in 'singular'
+    (their factor is left as the identity); the caller evaluates them with scipy (allow_singular=True).
+    '''
+    covariances = np.asarray(covariances, dtype=float)
+    k, d, _ = covariances.shape
+    L_inv = np.tile(np.identity(d), (k, 1, 1))
+    logdet = np.zeros(k)
+    singular = np.zeros(k, dtype=bool)
+    for index in range(k):
+        try:
+            L = np.linalg.cholesky(covariances[index])
+        except np.linalg.LinAlgError:
+            singular[index] = True
+            continue
+        L_inv[index] = np.linalg.solve(L, np.identity(d))
+        logdet[index] = 2*np.sum(np.log(np.diag(L)))
+    return L_inv, logdet, singular
+
+def _gaussian_logpdf_batch(x, means, L_inv, logdet, xpy=np):
+    '''
+    log N(x_n | mean_k, cov_k) for all samples and components at once.
+    x (n,d), means (k,d), L_inv (k,d,d) inverse Cholesky factors, logdet (k,).  Returns (n,k)
+    The whitened offsets z = L_inv (x - mean) = L_inv x - L_inv mean are one (n,d) x (d,k*d) product for all components.
+    '''
+    n, d = x.shape
+    k = len(means)
+    A = xpy.transpose(L_inv, (2,0,1)).reshape(d, k*d)
+    b = xpy.einsum('kij,kj->ki', L_inv, means)
+    z = xpy.dot(x, A).reshape(n, k, d) - b[np.newaxis,:,:]
+    return -0.5*xpy.sum(z*z, axis=-1) - 0.5*logdet[np.newaxis,:] - 0.5*d*np.log(2*np.pi)
+
+def _component_logpdf(x, means, covariances):
+    '''
+    (n,k) array of log pdf of each sample under each component, with scipy as fallback for singular covariances
+    '''
+    means = np.asarray(means, dtype=float)
+    L_inv, logdet, singular = _cholesky_factors(covariances)
+    log_pdf = _gaussian_logpdf_batch(x, means, L_inv, logdet)
+    for index in np.arange(len(means))[singular]:
+        log_pdf[:,index] = multivariate_normal.logpdf(x=x, mean=means[index], cov=covariances[index], allow_singular=True)
+    return log_pdf
+
+
 class estimator:
     '''
     Base estimator class for GMM
@@ -68,16 +114,9 @@ class estimator:
         '''
         if log_sample_weights is None:
             log_sample_weights = np.zeros(n)
-        p_nk = np.empty((n, self.k))
-        for index in range(self.k):
-            mean = self.means[index]
-            cov = self.covariances[index]
-            log_p = np.log(self.weights[index])
-            log_pdf = multivariate_normal.logpdf(x=sample_array, mean=mean, cov=cov, allow_singular=True) # (16.1.4)
-            # note that allow_singular=True in the above line is probably really dumb and
-            # terrible, but it seems to occasionally keep the whole thing from blowing up
-            # so it stays for now
-            p_nk[:,index] = log_pdf + log_p # (16.1.5)
+        # all components at once (16.1.4); singular covariances fall back to scipy with allow_singular=True
+        p_nk = _component_logpdf(sample_array, self.means, self.covariances)
+        p_nk += np.log(np.asarray(self.weights, dtype=float))[np.newaxis,:] # (16.1.5)
         p_xn = logsumexp(p_nk, axis=1)#, keepdims=True) # (16.1.3)
         self.p_nk = p_nk - p_xn[:,np.newaxis] # (16.1.5)
         # normalize log sample weights as well, before modifying things with them
@@ -222,8 +261,10 @@ class gmm:
         Maximum number of Expectation-Maximization iterations
     '''
 
-    def __init__(self, k, bounds, max_iters=1000,epsilon=None,tempering_coeff=1e-8):
+    def __init__(self, k, bounds, max_iters=1000,epsilon=None,tempering_coeff=1e-8,xpy=np):
         self.k = k
+        self.xpy = xpy   # array module used for scoring (numpy or cupy)
+        self._score_cache = None
         self.bounds = bounds
         #self.tol = tol
         self.max_iters = max_iters
@@ -396,6 +437,36 @@ class gmm:
         self._merge(new_model, M)
         self.N += M
 
+    def _scoring_terms(self):
+        '''
+        Cholesky factors, log weights and bound normalization of the current model.  Cached: recomputed only when the
+        weights, means or covariances change (fit, update, or direct assignment)
+        '''
+        means = np.asarray(self.means, dtype=float)
+        covariances = np.asarray(self.covariances, dtype=float)
+        weights = np.asarray(self.weights, dtype=float)
+        key = np.concatenate((weights.ravel(), means.ravel(), covariances.ravel(), np.ravel(self.bounds))).tobytes()
+        if self._score_cache is not None and self._score_cache['key'] == key and self._score_cache['xpy'] is self.xpy:
+            return self._score_cache
+        L_inv, logdet, singular = _cholesky_factors(covariances)
+        bounds_normalized= self._normalize(self.bounds.T).T
+        normalization_constant = 0.
+        for i in range(self.k):
+            w = weights[i]
+            mean = means[i]
+            cov = covariances[i]
+            if(len(mean)>1):
+                normalization_constant += w*mvnun(bounds_normalized[:,0], bounds_normalized[:,1], mean, cov)[0] # this function is very fast at integrating multivariate normal distributions
+            else:
+                sigma2 = cov[0,0]
+                my_cdf = norm(loc=mean[0],scale=np.sqrt(sigma2)).cdf
+                normalization_constant += w*(my_cdf( bounds_normalized[0,1]) - my_cdf( bounds_normalized[0,0]))
+        xpy = self.xpy
+        self._score_cache = {'key':key, 'xpy':xpy, 'means':xpy.asarray(means), 'covariances':covariances,
+                             'L_inv':xpy.asarray(L_inv), 'logdet':xpy.asarray(logdet), 'singular':singular,
+                             'log_weights':xpy.asarray(np.log(np.maximum(weights, 1e-300))), 'normalization_constant':normalization_constant}
+        return self._score_cache
+
     def score(self, sample_array,assume_normalized=True):
         '''
         Score samples (i.e. calculate likelihood of each sample) under the current
@@ -404,6 +475,9 @@ class gmm:
         Note the bounds are stored *not* normalized, and we need to compensate for that.
         Note the normalized bounds are always -1,1 ... but we won't hardcode that, in case normalization changes
 
+        All components are evaluated at once with cached Cholesky factors (see _scoring_terms), on the self.xpy
+        backend; the result is returned as a numpy array.
+
         Parameters
         ----------
         sample_array : np.ndarray
@@ -412,27 +486,19 @@ class gmm:
             Bounds for samples, used for renormalizing scores
         '''
         n, d = sample_array.shape
-        scores = np.zeros(n)
+        xpy = self.xpy
+        terms = self._scoring_terms()
         sample_array = self._normalize(sample_array)
-        bounds_normalized = np.zeros(self.bounds.shape)
-        bounds_normalized= self._normalize(self.bounds.T).T
-        normalization_constant = 0.
-        for i in range(self.k):
-            w = self.weights[i]
-            mean = self.means[i]
-            cov = self.covariances[i]
-            if(len(mean)>1):
-                scores += multivariate_normal.pdf(x=sample_array, mean=mean, cov=cov, allow_singular=True) * w
-                normalization_constant += w*mvnun(bounds_normalized[:,0], bounds_normalized[:,1], mean, cov)[0] # this function is very fast at integrating multivariate normal distributions
-            else:
-                sigma2 = cov[0,0]
-                val = 1./np.sqrt(2*np.pi*sigma2) * np.exp( - 0.5*( sample_array[:,0] - mean[0])**2/sigma2)
-                scores += val * w
-                my_cdf = norm(loc=mean[0],scale=np.sqrt(sigma2)).cdf
-                normalization_constant += w*(my_cdf( bounds_normalized[0,1]) - my_cdf( bounds_normalized[0,0]))
-            # note that allow_singular=True in the above line is probably really dumb and
-            # terrible, but it seems to occasionally keep the whole thing from blowing up
-            # so it stays for now
+        x = xpy.asarray(sample_array)
+        log_pdf = _gaussian_logpdf_batch(x, terms['means'], terms['L_inv'], terms['logdet'], xpy=xpy)
+        for i in np.arange(self.k)[terms['singular']]:
+            # note that allow_singular=True is probably really dumb and terrible, but it seems to occasionally
+            # keep the whole thing from blowing up so it stays for now
+            log_pdf[:,i] = xpy.asarray(multivariate_normal.logpdf(x=sample_array, mean=self.means[i], cov=terms['covariances'][i], allow_singular=True))
+        scores = xpy.sum(xpy.exp(log_pdf + terms['log_weights'][np.newaxis,:]), axis=1)
+        if not(xpy is np):
+            scores = xpy.asnumpy(scores)
+        normalization_constant = terms['normalization_constant']
         # we need to renormalize the PDF
         # to do this we sample from a full distribution (i.e. without truncation) and use the
         # fraction of samples that fall inside the bounds to renormalize
@@ -258,6 +258,8 @@ class MCSampler(object):
         gmm_adapt = kwargs['gmm_adapt'] if "gmm_adapt" in kwargs else None
         gmm_epsilon = kwargs['gmm_epsilon'] if "gmm_epsilon" in kwargs else None
         L_cutoff = kwargs["L_cutoff"] if "L_cutoff" in kwargs else None
+        store_max_samples = kwargs["igrand_store_max_samples"] if "igrand_store_max_samples" in kwargs else None
+        store_deltalnL = kwargs["igrand_threshold_deltalnL"] if "igrand_threshold_deltalnL" in kwargs else None
         tempering_exp = kwargs["tempering_exp"] if "tempering_exp" in kwargs else 1.0
 #        tempering_exp = kwargs["adapt_weight_exponent"] if "adapt_weight_exponent" in kwargs else 1.0
 
@@ -312,7 +314,7 @@ class MCSampler(object):
         # do the integral
 
         integrator = monte_carlo.integrator(dim, bounds, gmm_dict, n_comp, n=n, prior=self.calc_pdf,
-                         user_func=integrator_func, proc_count=proc_count,L_cutoff=L_cutoff,gmm_adapt=gmm_adapt,gmm_epsilon=gmm_epsilon,tempering_exp=tempering_exp) # reflect=reflect,
+                         user_func=integrator_func, proc_count=proc_count,L_cutoff=L_cutoff,gmm_adapt=gmm_adapt,gmm_epsilon=gmm_epsilon,tempering_exp=tempering_exp,store_max_samples=store_max_samples,store_deltalnL=store_deltalnL) # reflect=reflect,
         if not direct_eval:
             func = self.evaluate
         if use_lnL:
@@ -328,7 +330,6 @@ class MCSampler(object):
         integral = integrator.integral
         error_squared = integrator.scaled_error_squared * np.exp(integrator.log_error_scale_factor)
         eff_samp = integrator.eff_samp
-        sample_array = integrator.cumulative_samples
         if not(return_lnI):
             value_array = np.exp(integrator.cumulative_values)  # stored as ln(integrand) !
         else:
@@ -344,7 +345,7 @@ class MCSampler(object):
 
         index = 0
         for param in args:
-            self._rvs[param] = sample_array[:,index]
+            self._rvs[param] = integrator.cumulative_store[index]   # view, no copy
             index += 1
         self._rvs['joint_prior'] = prior_array
         self._rvs['joint_s_prior'] = p_array
@@ -357,7 +358,7 @@ class MCSampler(object):
 
         # write data to file
         if write_to_file:
-            dat_out = np.c_[sample_array, value_array, p_array]
+            dat_out = np.c_[integrator.cumulative_samples, value_array, p_array]
             np.savetxt('mcsampler_data.txt', dat_out,
                         header=" ".join(['sample_array', 'value_array', 'p_array']))
 
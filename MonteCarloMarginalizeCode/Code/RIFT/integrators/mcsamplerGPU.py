@@ -79,6 +79,7 @@ if not( 'RIFT_LOWLATENCY'  in os.environ):
     print(" - No healpy - ")
 
 from ..integrators.statutils import  update,finalize, init_log,update_log,finalize_log
+from ..integrators.sample_store import SampleStore
 
 #from multiprocessing import Pool
 
@@ -522,6 +523,9 @@ class MCSampler(object):
         floor_level -- *total probability* of a uniform distribution, averaged with the weighted sampled distribution, to generate a new sampled distribution
         n_adapt -- number of chunks over which to allow the pdf to adapt. Default is zero, which will turn off adaptive sampling regardless of other settings
         convergence_tests - dictionary of function pointers, each accepting self._rvs and self.params as arguments. CURRENTLY ONLY USED FOR REPORTING
+        igrand_store_capacity -- number of samples to preallocate for the sample cache. 'nmax' reserves enough for nmax samples. Default (None) grows the cache geometrically
+        igrand_store_max_samples -- if set, the sample cache only retains this many samples (the highest lnL), plus the most recent adaptation history. Bounds memory when save_intg is used
+        save_no_samples -- do not keep the sample locations.  While adapting, only the most recent n_history samples (and their integrand) are kept, for the histograms
         Pinning a value: By specifying a kwarg with the same of an existing parameter, it is possible to "pin" it. The sample draws will always be that value, and the sampling prior will use a delta function at that value.
         """
 
@@ -585,6 +589,8 @@ class MCSampler(object):
         deltaP    = kwargs["igrand_threshold_p"] if 'igrand_threshold_p' in kwargs else 0 # default is to omit 1e-7 of probability
         bFairdraw  = kwargs["igrand_fairdraw_samples"] if "igrand_fairdraw_samples" in kwargs else False
         n_extr = kwargs["igrand_fairdraw_samples_max"] if "igrand_fairdraw_samples_max" in kwargs else None
+        store_capacity = kwargs["igrand_store_capacity"] if "igrand_store_capacity" in kwargs else None
+        store_max_samples = kwargs["igrand_store_max_samples"] if "igrand_store_max_samples" in kwargs else None
 
         bShowEvaluationLog = kwargs['verbose'] if 'verbose' in kwargs else False
         bShowEveryEvaluation = kwargs['extremely_verbose'] if 'extremely_verbose' in kwargs else False
@@ -592,6 +598,35 @@ class MCSampler(object):
         if bShowEvaluationLog:
             print(" .... mcsampler : providing verbose output ..... ")
 
+        #
+        # Sample cache: preallocated columns, rather than hstack on every chunk
+        #   - samples below maxlnL - deltalnL can never be returned, so they can be discarded whenever the cache fills
+        #   - the most recent n_history samples are always kept, since the adaptation uses them
+        #
+        store_names = []
+        if not save_no_samples:
+            store_names += list(self.params_ordered)
+        if save_intg:
+            store_names += ["log_integrand", "log_joint_prior", "log_joint_s_prior", "log_weights"]
+        store = None
+        if store_names:
+            if store_capacity == 'nmax':
+                store_capacity = int(nmax) + n if numpy.isfinite(nmax) else None
+            store = SampleStore(store_names, capacity=store_capacity, xpy=xpy_here,
+                                max_rows=store_max_samples if save_intg else None,
+                                key="log_integrand" if save_intg else None,
+                                delta=deltalnL if save_intg else None,
+                                n_protect=max(n_history, 0))
+            # Retain samples from previous calls, as the hstack-based cache did
+            if all(name in self._rvs and len(self._rvs[name]) > 0 for name in store_names):
+                store.append(dict((name, self._rvs[name]) for name in store_names))
+            self._rvs = store.as_dict()
+        # With save_no_samples, the adaptation still needs the recent samples: a rolling window of the last n_history rows
+        history = None
+        if save_no_samples and n_adapt > 0 and n_history > 0 and any(p in self.adaptive for p in self.params_ordered):
+            history = SampleStore(list(self.params_ordered) + ["log_integrand"], xpy=xpy_here, max_rows=0, key="log_integrand",
+                                  n_protect=n_history)
+
         current_log_aggregate = None
         eff_samp = 0  # ratio of max weight to sum of weights
         maxlnL = -np.inf  # max lnL
@@ -613,7 +648,7 @@ class MCSampler(object):
             # Draw our sample points
             # Non-log draw
             joint_p_s, joint_p_prior, rv = self.draw_simplified(
-                n, *self.params_ordered
+                n, *self.params_ordered, save_no_samples=True
             )
 
             #
@@ -622,8 +657,8 @@ class MCSampler(object):
             # FIXME: If we get too many of these, we should bail
             if not(cupy_ok):  # don't do this if using cupy! 
               if any(joint_p_s <= 0):
+                # samples are only cached below, so nothing to remove here
                 for p in self.params_ordered:
-                    self._rvs[p] = identity_convert_togpu(numpy.resize(identity_convert(self._rvs[p]), len(self._rvs[p])-n))
                     self.cdf_inv = self.cdf_inv_initial
                     self.pdf = self.pdf_initial
                 print("Zero prior value detected, skipping.", file=sys.stderr)
@@ -662,21 +697,24 @@ class MCSampler(object):
             log_weights = tempering_exp*lnL + self.xpy.log(joint_p_prior) - self.xpy.log(joint_p_s)
             
             # append to cumulative values (assume all can be added)
-
-            if save_intg:
-                # FIXME: See warning at beginning of function. The prior values
-                # need to be moved out of this, as they are not part of MC
-                # integration
-                if "log_integrand" in self._rvs:
-                    self._rvs["log_integrand"] = xpy_here.hstack( (self._rvs["log_integrand"], lnL) )
-                    self._rvs["log_joint_prior"] = xpy_here.hstack( (self._rvs["log_joint_prior"], self.xpy.log(joint_p_prior)) )
-                    self._rvs["log_joint_s_prior"] = xpy_here.hstack( (self._rvs["log_joint_s_prior"], self.xpy.log(joint_p_s)))
-                    self._rvs["log_weights"] = xpy_here.hstack( (self._rvs["log_weights"], log_weights ))
-                else:
-                    self._rvs["log_integrand"] = lnL
-                    self._rvs["log_joint_prior"] = self.xpy.log(joint_p_prior)
-                    self._rvs["log_joint_s_prior"] = self.xpy.log(joint_p_s)
-                    self._rvs["log_weights"] = log_weights
+            if store is not None:
+                chunk = {}
+                if not save_no_samples:
+                    chunk.update(zip(self.params_ordered, rv))
+                if save_intg:
+                    # FIXME: See warning at beginning of function. The prior values
+                    # need to be moved out of this, as they are not part of MC
+                    # integration
+                    chunk["log_integrand"] = lnL
+                    chunk["log_joint_prior"] = self.xpy.log(joint_p_prior)
+                    chunk["log_joint_s_prior"] = self.xpy.log(joint_p_s)
+                    chunk["log_weights"] = log_weights
+                store.append(chunk)
+                self._rvs = store.as_dict()   # views, no copies
+            if history is not None and self.ntotal <= n_adapt*n:
+                chunk = dict(zip(self.params_ordered, rv))
+                chunk["log_integrand"] = lnL
+                history.append(chunk)
             # maxlnL
             maxlnL_now = identity_convert(xpy.max(lnL))
             maxlnL = identity_convert(maxlnL)
@@ -739,7 +777,8 @@ class MCSampler(object):
                     return f(arg, p)
                 return inner
 
-            weights_alt = self._rvs["log_integrand"][-n_history:]+np.max([maxlnL, 200])  # try to make sure we have some dynamic range here
+            rvs_adapt = self._rvs if history is None else history.as_dict()
+            weights_alt = rvs_adapt["log_integrand"][-n_history:]+np.max([maxlnL, 200])  # try to make sure we have some dynamic range here
             weights_alt = self.xpy.maximum(weights_alt, 1e-5)  # prevent negative weights. NOTE THIS IS IMPORTANT: if you are integrating a function with lnL<0, use an offset!
             weights_alt = weights_alt/(weights_alt.sum())
             if weights_alt.dtype == numpy.float128:
@@ -751,7 +790,7 @@ class MCSampler(object):
                 if p not in self.adaptive or p in list(kwargs.keys()):
                     continue
 
-                points = self._rvs[p][-n_history:]
+                points = rvs_adapt[p][-n_history:]
                 self.compute_hist(points, p,weights=weights_alt,floor_level=floor_integrated_probability)
                 self.pdf[p] = function_wrapper(self.pdf_from_hist, p)
                 self.cdf_inv[p] = function_wrapper(self.cdf_inverse_from_hist, p)
@@ -767,7 +806,7 @@ class MCSampler(object):
         #   - create the cumulative weights
         #   - find and remove samples which contribute too little to the cumulative weights
         if (not save_no_samples) and ( "log_integrand" in self._rvs):
-            self._rvs["sample_n"] = numpy.arange(len(self._rvs["log_integrand"]))  # create 'iteration number'        
+            self._rvs["sample_n"] = numpy.array(store.sample_n)  # create 'iteration number'
             # Step 1: Cut out any sample with lnL belw threshold
             indx_list = [k for k, value in enumerate( (self._rvs["log_integrand"] > maxlnL - deltalnL)) if value] # threshold number 1
             # FIXME: This is an unncessary initial copy, the second step (cum i
@@ -0,0 +1,160 @@
+#
+# sample_store.py
+#
+#   Columnar, preallocated storage for Monte Carlo samples.
+#
+#   The samplers used to grow their sample caches with hstack/append on every chunk, which copies everything
+#   collected so far each time (quadratic cost, fragmented memory for n_max ~ 1e7).  SampleStore instead
+#   keeps one buffer per column, grows it geometrically (or reserves an explicit capacity up front), and
+#   hands out views.  It works identically with numpy and cupy: pass the array module as 'xpy'.
+#
+#   Optional bounded mode: keep only the top-K rows by a key column (e.g., lnL) and/or rows within 'delta'
+#   of the running maximum of that key.  Rows are only discarded when the buffer is full, and the most
+#   recent 'n_protect' rows are never discarded (adaptation uses the most recent history).
+#
+
+import numpy
+
+
+class SampleStore(object):
+    """
+    Columnar sample buffer with geometric growth and optional bounded (top-K / threshold) retention.
+
+    names      -- column names (any hashable)
+    capacity   -- initial number of rows to reserve. If None, the first append sets the capacity.
+    xpy        -- array module (numpy or cupy)
+    max_rows   -- if not None, retain at most this many rows (top-K by 'key'), plus the protected recent rows
+    key        -- column used to rank rows in bounded mode
+    delta      -- if not None, rows with key < max(key) - delta are discarded when the buffer is compacted
+    n_protect  -- number of most-recent rows which are never discarded
+    """
+    def __init__(self, names, capacity=None, xpy=numpy, dtype=numpy.float64, max_rows=None, key=None, delta=None, n_protect=0):
+        self.names = list(names)
+        self.xpy = xpy
+        self.dtype = dtype
+        self.max_rows = None if max_rows is None else int(max_rows)
+        self.key = key
+        self.delta = delta
+        self.n_protect = int(n_protect)
+        if (self.max_rows is not None or delta is not None) and not (key in self.names):
+            raise ValueError(" SampleStore: bounded mode requires a key column, got {} ".format(key))
+        self.n = 0            # rows currently stored
+        self.n_seen = 0       # rows ever appended: used to label samples
+        self.capacity = 0
+        self._buf = {}
+        self._sample_n = None
+        self._allocate(int(capacity) if capacity else 0)
+
+    def __len__(self):
+        return self.n
+
+    def __contains__(self, name):
+        return name in self._buf
+
+    def _allocate(self, capacity):
+        new_buf = {}
+        for name in self.names:
+            new_buf[name] = self.xpy.empty(capacity, dtype=self.dtype)
+            if self.n > 0:
+                new_buf[name][:self.n] = self._buf[name][:self.n]
+        new_index = numpy.empty(capacity, dtype=numpy.int64)   # sample labels always live on the host
+        if self.n > 0:
+            new_index[:self.n] = self._sample_n[:self.n]
+        self._buf = new_buf
+        self._sample_n = new_index
+        self.capacity = capacity
+
+    def reserve(self, n_rows):
+        """
+        Make sure the buffer can hold n_rows rows without reallocating
+        """
+        if n_rows > self.capacity:
+            self._allocate(int(n_rows))
+
+    def _bounded(self):
+        return (self.max_rows is not None) or (self.delta is not None and numpy.isfinite(self.delta))
+
+    def compact(self):
+        """
+        Discard rows according to the retention rules (top-K by key, threshold on key), preserving order.
+        Returns the number of rows discarded.
+        """
+        if self.n == 0 or not self._bounded():
+            return 0
+        xpy = self.xpy
+        n_free = self.n - min(self.n_protect, self.n)   # rows eligible for removal are [0, n_free)
+        if n_free == 0:
+            return 0
+        vals = self._buf[self.key][:n_free]
+        keep = xpy.ones(n_free, dtype=bool)
+        if self.delta is not None and numpy.isfinite(self.delta):
+            val_max = self._buf[self.key][:self.n].max()
+            keep &= vals >= val_max - self.delta
+        if self.max_rows is not None and n_free > self.max_rows:
+            keep_top = xpy.zeros(n_free, dtype=bool)
+            if self.max_rows > 0:
+                keep_top[xpy.argpartition(-vals, self.max_rows - 1)[:self.max_rows]] = True
+            keep &= keep_top
+        indx = xpy.nonzero(keep)[0]
+        n_keep = int(len(indx))
+        if n_keep == n_free:
+            return 0
+        n_recent = self.n - n_free
+        for name in self.names:
+            col = self._buf[name]
+            col[:n_keep] = col[indx]
+            col[n_keep:n_keep + n_recent] = col[n_free:self.n].copy()
+        indx_host = indx if xpy is numpy else xpy.asnumpy(indx)
+        self._sample_n[:n_keep] = self._sample_n[indx_host]
+        self._sample_n[n_keep:n_keep + n_recent] = self._sample_n[n_free:self.n].copy()
+        n_dropped = n_free - n_keep
+        self.n -= n_dropped
+        return n_dropped
+
+    def append(self, columns):
+        """
+        Append one chunk. 'columns' is a dict name -> 1d array; every column of the store must be present
+        and all must have the same length.
+        """
+        n_new = len(columns[self.names[0]])
+        if n_new == 0:
+            return
+        n_needed = self.n + n_new
+        if n_needed > self.capacity:
+            if self.capacity > 0:
+                self.compact()
+                n_needed = self.n + n_new
+            if n_needed > self.capacity:
+                if self.max_rows is not None:
+                    # bounded: size for the retained set, the protected history, and the incoming chunk
+                    new_cap = max(n_needed, self.max_rows + self.n_protect + 2*n_new)
+                else:
+                    new_cap = max(n_needed, 2*self.capacity)
+                self._allocate(new_cap)
+        for name in self.names:
+            self._buf[name][self.n:n_needed] = columns[name]
+        self._sample_n[self.n:n_needed] = numpy.arange(self.n_seen, self.n_seen + n_new)
+        self.n = n_needed
+        self.n_seen += n_new
+
+    def column(self, name):
+        """
+        View (not copy) of the stored rows of one column
+        """
+        return self._buf[name][:self.n]
+
+    def __getitem__(self, name):
+        return self.column(name)
+
+    @property
+    def sample_n(self):
+        """
+        Index of each stored row in the order the rows were appended (counting discarded rows)
+        """
+        return self._sample_n[:self.n]
+
+    def as_dict(self):
+        """
+        Dictionary of views of all columns, in the format used by the samplers' _rvs cache
+        """
+        return dict((name, self._buf[name][:self.n]) for name in self.names)
@@ -0,0 +1,82 @@
+#
+# fit_cache.py
+#
+# GOAL
+#   - 'fit once, sample many' for CIP: the fitted lnL surrogate (any --fit-method) is written to a cache file with its
+#     coordinate metadata, keyed by a hash of the input data and the options that can change the fit.  Other CIP jobs in the
+#     same iteration (exploded workers) with the same key load it instead of refitting.
+#   - fits are closures (fn_return in CIP), so the cache is written with cloudpickle, which serializes functions by value.
+#     cloudpickle is optional: without it, the cache is not used and every job fits as before.
+#   - files are written to a temporary name and renamed, so concurrent jobs never read a partial cache
+
+import os
+import json
+import hashlib
+import tempfile
+
+try:
+    import cloudpickle
+except ImportError:
+    cloudpickle = None
+
+# Options that only control sampling / output, not the fit: ignored in the cache key, so workers with different
+# output files or sample counts share the fit
+opts_not_in_key = ['fname_output_samples', 'fname_output_integral', 'n_output_samples', 'n_max', 'n_eff', 'n_chunk',
+                   'not_worker', 'fail_unless_n_eff', 'contingency_unevolved_neff', 'internal_bound_factor_if_n_eff_small',
+                   'no_plots', 'verbose', 'fit_cache', 'fit_save_gp', 'fit_load_gp', 'fit_rf_save', 'fit_rf_load']
+
+
+def fit_cache_key(fnames, opts_dict, ignore=None):
+    """
+    sha256 hash of the contents of the input files and of the options in opts_dict (less the ignored ones)
+    """
+    if ignore is None:
+        ignore = opts_not_in_key
+    h = hashlib.sha256()
+    for fname in fnames:
+        if fname is None:
+            continue
+        with open(fname, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 24), b''):
+                h.update(block)
+    opts_here = dict((k, v) for k, v in opts_dict.items() if not(k in ignore))
+    h.update(json.dumps(opts_here, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def save_fit_cache(fname, key, fit, metadata=None):
+    """
+    Write the fit (any picklable-by-value object, including closures) and its metadata.  Returns True on success.
+    """
+    if cloudpickle is None:
+        print(" fit_cache: cloudpickle not available, fit not cached ")
+        return False
+    fd, fname_tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(fname)), prefix='.fit_cache_')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            cloudpickle.dump({'key': key, 'fit': fit, 'metadata': metadata}, f)
+        os.replace(fname_tmp, fname)
+    except Exception as e:
+        print(" fit_cache: could not cache fit ", e)
+        if os.path.exists(fname_tmp):
+            os.remove(fname_tmp)
+        return False
+    return True
+
+
+def load_fit_cache(fname, key):
+    """
+    Returns (fit, metadata) if fname exists and holds a fit with this key, else None
+    """
+    if cloudpickle is None or not os.path.exists(fname):
+        return None
+    try:
+        with open(fname, 'rb') as f:
+            dat = cloudpickle.load(f)
+    except Exception as e:
+        print(" fit_cache: could not read ", fname, e)
+        return None
+    if dat['key'] != key:
+        print(" fit_cache: ", fname, " was made with other data or fit options; refitting ")
+        return None
+    return dat['fit'], dat['metadata']
@@ -0,0 +1,123 @@
+#
+# forest_fit.py
+#
+# GOAL
+#   - ExtraTrees fit of lnL, as in CIP's fit_rf, with
+#       - warm start: a model from a previous iteration is updated by adding trees trained only on the new ILE points,
+#         dropping the oldest trees, instead of refitting all trees from scratch
+#       - prediction on a persistent thread pool (the trees release the GIL), avoiding the per-call joblib setup cost
+#         of ExtraTreesRegressor.predict with n_jobs=-1
+#       - save/load with joblib, so later CIP workers in the same iteration reuse the fit
+#   - points are identified as 'new' by a hash of their (fit-coordinate) row
+#   - y is lnL minus an offset (CIP's lnL_shift).  The offset of the original fit is stored (y_offset_), so warm-start
+#     updates with a different offset train their trees in the same frame; predictions are relative to y_offset_
+
+import os
+import numpy as np
+import joblib
+from concurrent.futures import ThreadPoolExecutor
+
+from sklearn.ensemble import ExtraTreesRegressor
+
+
+def row_hashes(x):
+    """
+    64-bit hash of each row of x (exact float values), used to recognize points already used in a fit
+    """
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    bits = x.view(np.uint64).reshape(x.shape)
+    rng = np.random.RandomState(12345)   # fixed: hashes must agree between jobs
+    mult = rng.randint(1, 2**62, size=x.shape[1], dtype=np.int64).astype(np.uint64)*np.uint64(2) + np.uint64(1)
+    with np.errstate(over='ignore'):
+        h = np.zeros(len(x), dtype=np.uint64)
+        for k in np.arange(x.shape[1]):
+            h = (h ^ (bits[:,k]*mult[k])) * np.uint64(0x9E3779B97F4A7C15)
+    return h
+
+
+class IncrementalForestFit(object):
+    """
+    Forest of extremely randomized trees, fit to (x,y) with optional sample weights.
+    n_estimators   -- number of trees in the forest
+    n_update       -- number of trees retrained on a warm-start update (the oldest n_update trees are dropped)
+    min_new_points -- warm-start updates need at least this many new points; otherwise the model is reused unchanged
+    n_threads      -- prediction threads (None: os.cpu_count())
+    """
+    def __init__(self, n_estimators=100, n_update=20, min_new_points=50, n_threads=None, verbose=False):
+        self.n_estimators = n_estimators
+        self.n_update = n_update
+        self.min_new_points = min_new_points
+        self.n_threads = n_threads
+        self.verbose = verbose
+        self.estimators_ = []
+        self.hashes_ = np.array([], dtype=np.uint64)
+        self.n_features_ = None
+        self.y_offset_ = 0
+        self._pool = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_pool'] = None     # thread pools are not serializable
+        return state
+
+    def _train(self, x, y, n_trees, sample_weight=None):
+        rf = ExtraTreesRegressor(n_estimators=n_trees, verbose=self.verbose, n_jobs=-1)
+        rf.fit(x, y, sample_weight=sample_weight)
+        return list(rf.estimators_)
+
+    def fit(self, x, y, sample_weight=None, y_offset=0):
+        """
+        Fit all trees from scratch.  y is lnL - y_offset
+        """
+        self.y_offset_ = y_offset
+        self.estimators_ = self._train(x, y, self.n_estimators, sample_weight)
+        self.hashes_ = np.unique(row_hashes(x))
+        self.n_features_ = x.shape[1]
+        return self
+
+    def update(self, x, y, sample_weight=None, y_offset=0):
+        """
+        Warm start.  x,y is the full current training set: rows already used are recognized by hash, n_update new trees are
+        trained on the new rows only, and replace the n_update oldest trees.  Falls back to fit() if the model is empty or
+        the coordinates changed.  Returns the number of new points.
+        """
+        if len(self.estimators_) == 0 or self.n_features_ != x.shape[1]:
+            self.fit(x, y, sample_weight, y_offset)
+            return len(x)
+        h = row_hashes(x)
+        indx_new = ~np.isin(h, self.hashes_)
+        n_new = int(np.sum(indx_new))
+        if n_new < self.min_new_points:
+            return n_new
+        weight_new = None if sample_weight is None else sample_weight[indx_new]
+        n_update = min(self.n_update, self.n_estimators)
+        trees_new = self._train(x[indx_new], y[indx_new] + (y_offset - self.y_offset_), n_update, weight_new)
+        self.estimators_ = self.estimators_[n_update:] + trees_new
+        self.hashes_ = np.union1d(self.hashes_, h[indx_new])
+        return n_new
+
+    def predict(self, x):
+        """
+        Mean prediction of all trees (lnL - y_offset_).  Trees are split across a persistent thread pool.
+        """
+        x32 = np.ascontiguousarray(x, dtype=np.float32)   # trees work in float32
+        n_threads = self.n_threads or os.cpu_count() or 1
+        n_threads = min(n_threads, len(self.estimators_))
+        if n_threads <= 1 or len(x32) < 1000:
+            return np.sum([tree.predict(x32, check_input=False) for tree in self.estimators_], axis=0)/len(self.estimators_)
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(n_threads)
+        groups = [self.estimators_[k::n_threads] for k in np.arange(n_threads)]
+        def predict_group(trees):
+            out = np.zeros(len(x32))
+            for tree in trees:
+                out += tree.predict(x32, check_input=False)
+            return out
+        return np.sum(list(self._pool.map(predict_group, groups)), axis=0)/len(self.estimators_)
+
+    def save(self, fname):
+        joblib.dump(self, fname)
+
+    @staticmethod
+    def load(fname):
+        return joblib.load(fname)
@@ -33,8 +33,10 @@ def compact_kernel(Xp, Xq,
     '''
     compact_kernel: Return a sparse representation of the 
         compact kernel described on page 88 of R&W.
-        Most of the functions which generate the sparse kernel
-        involve non-sparse matricies.
+        The kernel vanishes for scaled distance r >= 1, so only the pairs
+        within unit distance (in the theta-scaled space) are found, with a
+        KD-tree, and K is built directly in sparse form: memory and time
+        scale with the number of in-support pairs, not with len(Xp)*len(Xq).
 
     Inputs:
         Xp: Dense array containing input vector
@@ -47,43 +49,36 @@ def compact_kernel(Xp, Xq,
         K: Sparse kernel representation (csc matrix)
     '''
     import numpy as np
+    from scipy.spatial import cKDTree
+    from scipy.sparse import eye
     
     # If no Xq, make one
     if Xq is None:
-        Xq = np.copy(Xp)
-
-    # Copy Xp
-    Xp = np.copy(Xp).astype(float)
-    Xq = np.copy(Xq).astype(float)
+        Xq = Xp
 
     # Identify dimensionality
     ndim = len(thetas)
     j = np.floor(float(ndim)/2.0) + 2
 
     # Scale by thetas
-    if len(thetas) >= 1:
-        for i in range(ndim):
-            Xp[:,i] = Xp[:,i]/thetas[i]
-            Xq[:,i] = Xq[:,i]/thetas[i]
-
-    # Compute the difference matrix
-    x2 = ((np.ones((Xq.shape + (Xp.shape[0],)))*Xp.T).T)
-    x1 = (np.ones((Xp.shape + (Xq.shape[0],)))*Xq.T)
+    Xp = np.array(Xp, dtype=float)/np.asarray(thetas, dtype=float)
+    Xq = np.array(Xq, dtype=float)/np.asarray(thetas, dtype=float)
 
-    # Assumption: real X and real k
-    r = np.linalg.norm(x2 - x1, axis = 1)
+    # All pairs with r <= 1 (Xp index, Xq index, distance)
+    pairs = cKDTree(Xp).sparse_distance_matrix(cKDTree(Xq), 1.0, output_type='ndarray')
+    pairs = pairs[pairs['v'] < 1.0]
+    r = pairs['v']
 
     # K = ((1 - r)^2)_+
     eta = (1.0 - r)
-    eta[eta < 0.0] = 0.0
     #K = eta**2
     K = (eta**(j + 1))*((j + 1)*r + 1.0)
 
-    if white_noise != 0.0:
-        K += white_noise*np.eye(K.shape[0], K.shape[1])
-
     # Construct sparse matrix
-    K = csc_matrix(K)
+    K = csc_matrix((K, (pairs['i'], pairs['j'])), shape=(len(Xp), len(Xq)))
+
+    if white_noise != 0.0:
+        K = K + white_noise*eye(len(Xp), len(Xq), format='csc')
 
     return K
 
@@ -91,12 +86,16 @@ def compact_kernel(Xp, Xq,
 
 def GP_fit_function(x_train, y_train, thetas, white_noise,
                     kernel_function = compact_kernel,
+                    n_chunk = 10000,
                     **kwargs):
     '''
     Objective: return a function which can sample the distribution
         with only the test inputs as an input.
         This function only needs to return a mean.
+        The fit is evaluated on blocks of n_chunk samples, so only one
+        block of the test kernel is held in memory at a time.
     '''
+    import numpy as np
     from sksparse.cholmod import cholesky
     ## Guarantee dimensionality ##
     ## Find initial kernel ##
@@ -108,8 +107,11 @@ def GP_fit_function(x_train, y_train, thetas, white_noise,
     ## Construct function ##
     def my_fit(x_sample):
         #print(len(x_sample))
-        Kt = kernel_function(x_sample, x_train, thetas, white_noise = 0.0)
-        y_mean = Kt.dot(alpha)
+        y_mean = np.empty(len(x_sample))
+        for indx_start in np.arange(0, len(x_sample), n_chunk):
+            x_here = x_sample[indx_start:indx_start+n_chunk]
+            Kt = kernel_function(x_here, x_train, thetas, white_noise = 0.0)
+            y_mean[indx_start:indx_start+n_chunk] = Kt.dot(alpha)
         return y_mean
 
     return my_fit
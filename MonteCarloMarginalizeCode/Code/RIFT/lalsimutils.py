@@ -1944,7 +1944,12 @@ def hdf5_to_ChooseWaveformParams_array(fname="injections",
 class InnerProduct(object):
     """
     Base class for inner products
+
+    Besides ip/norm on COMPLEX16FrequencySeries, every inner product has array-native methods for many templates:
+        norm_many(h_many), ip_many(h1, h2_many), overlap_matrix(h1_many, h2_many)
+    which take (n_templates, n_freq) arrays (or lists of COMPLEX16FrequencySeries) and use the stored PSD weights.
     """
+    two_sided = False   # True if inputs are non-Hermitian (len2side, weights2side, factor 2); else len1side, weights, factor 4
     def __init__(self, fLow=10., fMax=None, fNyq=2048., deltaF=1./8.,
             psd=lalsim.SimNoisePSDaLIGOZeroDetHighPower, analyticPSD_Q=True,
             inv_spec_trunc_Q=False, T_spec=0., waveform_is_psi4=False):
@@ -2049,6 +2054,89 @@ class InnerProduct(object):
         """
         raise Exception("This is the base InnerProduct class! Use a subclass")
 
+    def _as_array(self, h_many):
+        """
+        (n_templates, n_freq) array from an array, a COMPLEX16FrequencySeries, or a list of them
+        """
+        if isinstance(h_many, np.ndarray):
+            pass
+        elif hasattr(h_many, 'data'):
+            h_many = h_many.data.data
+        elif len(h_many) and not(isinstance(h_many[0], np.ndarray)) and hasattr(h_many[0], 'data'):
+            h_many = [h.data.data for h in h_many]
+        h_many = np.atleast_2d(h_many)
+        assert h_many.shape[-1] == (self.len2side if self.two_sided else self.len1side)
+        return h_many
+
+    def _weights_many(self):
+        """
+        PSD weights and prefactor (2 for two-sided, 4 for one-sided) of the inner product
+        """
+        if self.two_sided:
+            return self.weights2side, 2.
+        return self.weights, 4.
+
+    def norm_many(self, h_many):
+        """
+        Norms of each row of h_many (as norm())
+        """
+        h_many = self._as_array(h_many)
+        weights, fac = self._weights_many()
+        val = np.dot(np.real(np.conj(h_many)*h_many), weights)
+        return np.sqrt( fac * self.deltaF * np.abs(val) )
+
+    def ip_many(self, h1, h2_many):
+        """
+        Inner products (as ip()) of h1 with each row of h2_many.  Complex-valued; RealIP returns the real part
+        """
+        h1 = self._as_array(h1)[0]
+        h2_many = self._as_array(h2_many)
+        weights, fac = self._weights_many()
+        return fac * self.deltaF * np.dot(h2_many, np.conj(h1)*weights)
+
+    def overlap_matrix(self, h1_many, h2_many=None):
+        """
+        (n1, n2) matrix of ip(h1_many[i], h2_many[j]).  h2_many defaults to h1_many
+        """
+        h1_many = self._as_array(h1_many)
+        h2_many = h1_many if h2_many is None else self._as_array(h2_many)
+        weights, fac = self._weights_many()
+        return fac * self.deltaF * np.dot(np.conj(h1_many)*weights, h2_many.T)
+
+    def _maximize_many(self, intgd, full_output=False):
+        """
+        For the time/phase maximized overlaps: reverse FFT (one numpy batched FFT, with LAL's two-sided frequency
+        ordering and deltaF normalization) of each row of the (n, len2side) integrand, and the peak of its modulus.
+        Returns rho, or (rho, tPeak, rhoPhase) with tPeak the time shift of the peak (as wrap_times()).
+        """
+        ovlp = np.fft.ifft(np.fft.ifftshift(intgd, axes=-1), axis=-1)*(self.len2side*self.deltaF)
+        rhoSeries = np.abs(ovlp)
+        rhoIdx = np.argmax(rhoSeries, axis=-1)
+        rows = np.arange(len(rhoSeries))
+        rho = rhoSeries[rows, rhoIdx]
+        if getattr(self, 'interpolate_max', False):
+            # as ip(): quadratic through the 4 points around the peak, if the peak is not at the edge
+            indx_ok = (rhoIdx >= 2) & (rhoIdx <= self.len2side-2)
+            rows_ok = rows[indx_ok]
+            if len(rows_ok):
+                datReduced = rhoSeries[rows_ok[:,np.newaxis], rhoIdx[rows_ok,np.newaxis] + np.arange(-2,2)]
+                z = np.polyfit(np.arange(4), datReduced.T, 2)
+                indx_max = z[0] < 0
+                rho[rows_ok[indx_max]] = (z[2] - z[1]*z[1]/4/z[2])[indx_max]
+            for indx in rows[~indx_ok]:
+                datReduced = rhoSeries[indx][rhoIdx[indx]-2:rhoIdx[indx]+2]
+                try:
+                    z =np.polyfit(np.arange(len(datReduced)),datReduced,2)
+                    if z[0]<0:
+                        rho[indx] = z[2] - z[1]*z[1]/4/z[2]
+                except:
+                    print( " Duration error ", datReduced, " skipping interpolation in time to best point ")
+        if not full_output:
+            return rho
+        tPeak = rhoIdx*self.deltaT - (rhoIdx >= self.len1side)*self.len2side*self.deltaT
+        rhoPhase = np.angle(ovlp[rows, rhoIdx])
+        return rho, tPeak, rhoPhase
+
 
 class RealIP(InnerProduct):
     """
@@ -2074,6 +2162,12 @@ class RealIP(InnerProduct):
         val = 4. * self.deltaF * np.real(val)
         return val
 
+    def ip_many(self, h1, h2_many):
+        return np.real(super(RealIP, self).ip_many(h1, h2_many))
+
+    def overlap_matrix(self, h1_many, h2_many=None):
+        return np.real(super(RealIP, self).overlap_matrix(h1_many, h2_many))
+
     def norm(self, h):
         """
         Compute norm of a COMPLEX16Frequency Series
@@ -2137,6 +2231,8 @@ class ComplexIP(InnerProduct):
     [ -N/2 * df, ..., -df, 0, df, ..., (N/2-1) * df ]
     DOES NOT maximize over time or phase
     """
+    two_sided = True
+
     def ip(self, h1, h2,include_epoch_differences=False):
         """
         Compute inner product between two COMPLEX16Frequency Series
@@ -2233,6 +2329,29 @@ class Overlap(InnerProduct):
             rhoTS.data.data[:] = self.ovlp.data.data[:]
             return rho, rhoTS, rhoIdx, rhoPhase
 
+    def ip_many(self, h1, h2_many, full_output=False):
+        """
+        Overlaps (maximized over time, phase) of h1 with each row of h2_many, from one batched FFT.
+        Returns rho, or if full_output (rho, tPeak, rhoPhase) as arrays
+        """
+        h1 = self._as_array(h1)[0]
+        h2_many = self._as_array(h2_many)
+        # negative freqs. of the integrand are zero
+        intgd = np.zeros((len(h2_many), self.len2side), dtype=complex)
+        intgd[:,self.len1side-1:] = (4.*np.conj(h1)*self.weights*h2_many)[:,:-1]
+        return self._maximize_many(intgd, full_output=full_output)
+
+    def overlap_matrix(self, h1_many, h2_many=None, full_output=False):
+        """
+        (n1, n2) matrix of maximized overlaps (and, if full_output, of peak times and phases)
+        """
+        h1_many = self._as_array(h1_many)
+        h2_many = h1_many if h2_many is None else self._as_array(h2_many)
+        out = [self.ip_many(h1, h2_many, full_output=full_output) for h1 in h1_many]
+        if full_output:
+            return tuple(np.array(x) for x in zip(*out))
+        return np.array(out)
+
     def norm(self, h):
         """
         Compute norm of a COMPLEX16Frequency Series
@@ -2285,6 +2404,8 @@ class ComplexOverlap(InnerProduct):
         The index of the above time series at which the maximum occurs
         The phase rotation which maximizes the real-valued overlap
     """
+    two_sided = True
+
     def __init__(self, fLow=10., fMax=None, fNyq=2048., deltaF=1./8.,
             psd=lalsim.SimNoisePSDaLIGOZeroDetHighPower, analyticPSD_Q=True,
             inv_spec_trunc_Q=False, T_spec=0., full_output=False,interpolate_max=False, waveform_is_psi4=False):
@@ -2343,6 +2464,20 @@ class ComplexOverlap(InnerProduct):
             rhoTS.data.data[:] = self.ovlp.data.data[:]
             return rho, rhoTS, rhoIdx, rhoPhase
 
+    def ip_many(self, h1, h2_many, full_output=False):
+        """
+        Overlaps (maximized over time, phase) of h1 with each row of h2_many, as ip(), from one batched FFT.
+            h1      : COMPLEX16FrequencySeries or array (len2side)
+            h2_many : array (n_templates, len2side), in the same (LAL) frequency ordering as h1.data.data, or a list of series
+        The weighted spectrum of h1 is formed once.  Returns rho, or if full_output (rho, tPeak, rhoPhase) as arrays
+        """
+        h1 = self._as_array(h1)[0]
+        h2_many = self._as_array(h2_many)
+        h1_weighted = 2*np.conj(h1)*self.weights2side
+        return self._maximize_many(h1_weighted[np.newaxis,:]*h2_many, full_output=full_output)
+
+    overlap_matrix = Overlap.overlap_matrix
+
     def norm(self, h):
         """
         Compute norm of a non-Hermitian COMPLEX16FrequencySeries
@@ -4804,6 +4939,551 @@ def DataRollTime(ht,DeltaT):  # ONLY FOR TIME DOMAIN. ACTS IN PLACE
     return DataRollBins(ht, nL)            
 
 
+#
+# Vectorized coordinate engine
+#   ChooseWaveformParamsVector holds one array per ChooseWaveformParams attribute, and reproduces
+#   assign_param/extract_param for every coordinate name they understand, acting on all rows at once.
+#   Transformations compose through the physical state: low-level coordinates are assigned (in order, with the
+#   same held-fixed conventions as assign_param) into (m1,m2,spins,lambdas,...), and targets are extracted from it.
+#   The dispatch is table-driven (_vector_assign_table, _vector_extract_table), so new names are added in one place.
+#
+#   Semantics: every row starts from a default ChooseWaveformParams(), as the first row of the old per-row loop did.
+#   The system-frame transformations are numpy ports of SimInspiralTransformPrecessingWvf2PE and
+#   SimInspiralTransformPrecessingNewInitialConditions, including their unit conventions.
+#
+def _vec_Lhat(P):
+    if spin_convention == "L":
+        return np.zeros(P.n), np.zeros(P.n), np.ones(P.n)
+    return np.sin(P.incl), np.zeros(P.n), np.cos(P.incl)
+
+def _vec_dot(a, b):
+    return a[0]*b[0] + a[1]*b[1] + a[2]*b[2]
+
+def _vec_spins(P):
+    return (P.s1x, P.s1y, P.s1z), (P.s2x, P.s2y, P.s2z)
+
+def _vec_orbital_angular_momentum_over_M2(P):
+    """
+    Vector form of OrbitalAngularMomentumAtReferenceOverM2
+    """
+    f = np.maximum(P.fref, P.fmin)
+    v = ((P.m1+P.m2)*lsu_G/lsu_C**3 * lsu_PI*f)**(1./3.)
+    eta = symRatio(P.m1, P.m2)
+    Lmag = eta/v * (1 + (1.5 + eta/6)*v*v + (27./8 - 19*eta/8 + eta*eta/24.)*(v**4))
+    Lhat = _vec_Lhat(P)
+    return Lhat[0]*Lmag, Lhat[1]*Lmag, Lhat[2]*Lmag
+
+def _vec_total_angular_momentum_over_M2(P):
+    """
+    Vector form of TotalAngularMomentumAtReferenceOverM2
+    """
+    L = _vec_orbital_angular_momentum_over_M2(P)
+    M2 = (P.m1+P.m2)**2
+    chi1, chi2 = _vec_spins(P)
+    return tuple(L[k] + (P.m1**2*chi1[k] + P.m2**2*chi2[k])/M2 for k in range(3))
+
+def _vec_unit(v):
+    norm = np.sqrt(_vec_dot(v, v))
+    return v[0]/norm, v[1]/norm, v[2]/norm
+
+def _vec_rotate_z(angle, v):
+    c, s = np.cos(angle), np.sin(angle)
+    return c*v[0] - s*v[1], s*v[0] + c*v[1], v[2]
+
+def _vec_rotate_y(angle, v):
+    c, s = np.cos(angle), np.sin(angle)
+    return c*v[0] + s*v[2], v[1], -s*v[0] + c*v[2]
+
+def _vec_require_fref(P):
+    if np.any(P.fref == 0):
+        print(" Changing geometry requires a reference frequency ")
+        sys.exit(1)
+
+def _vec_extract_system_frame(P):
+    """
+    Vector form of extract_system_frame: thetaJN, phiJL, theta1, theta2, phi12, chi1, chi2, psiJ
+    """
+    Jref = _vec_total_angular_momentum_over_M2(P)
+    psiJ = P.psi + np.arctan2(Jref[1], Jref[0])
+    # Port of SimInspiralTransformPrecessingWvf2PE (masses passed through as provided, frequency max(fref,fmin))
+    m1, m2 = P.m1, P.m2
+    fref = np.maximum(P.fref, P.fmin)
+    chi1 = np.sqrt(P.s1x**2 + P.s1y**2 + P.s1z**2)
+    chi2 = np.sqrt(P.s2x**2 + P.s2y**2 + P.s2z**2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        theta1 = np.where(chi1 > 0, np.arccos(P.s1z/chi1), np.pi/2)
+        theta2 = np.where(chi2 > 0, np.arccos(P.s2z/chi2), np.pi/2)
+    phi12 = np.mod(np.arctan2(P.s2y, P.s2x) - np.arctan2(P.s1y, P.s1x), 2*np.pi)
+    M = m1 + m2
+    eta = m1*m2/M/M
+    v0 = np.cbrt(np.pi*M*lal.MTSUN_SI*fref)
+    Lmag = eta/v0*(1 + v0*v0*(1.5 + eta/6.))
+    J = ((m1/M)**2*P.s1x + (m2/M)**2*P.s2x, (m1/M)**2*P.s1y + (m2/M)**2*P.s2y, Lmag + (m1/M)**2*P.s1z + (m2/M)**2*P.s2z)
+    Jhat = _vec_unit(J)
+    N = (np.sin(P.incl)*np.cos(np.pi/2 - P.phiref), np.sin(P.incl)*np.sin(np.pi/2 - P.phiref), np.cos(P.incl))
+    thetaJN = np.arccos(_vec_dot(Jhat, N))
+    thetaJ = np.arccos(Jhat[2])
+    phiJ = np.arctan2(Jhat[1], Jhat[0])
+    N_J = _vec_rotate_y(-thetaJ, _vec_rotate_z(-phiJ, N))
+    L_J = _vec_rotate_y(-thetaJ, _vec_rotate_z(-phiJ, (np.zeros(P.n), np.zeros(P.n), np.ones(P.n))))
+    # rotate N into the y-z plane.  Keep the same operation order as lalsimulation: for L parallel to J, phiJL is set by signed zeros
+    L_J = _vec_rotate_z(-(np.arctan2(N_J[1], N_J[0]) - np.pi/2), L_J)
+    phiJL = np.arctan2(L_J[1], L_J[0])
+    phiJL = np.where(phiJL < 0, phiJL + 2*np.pi, phiJL)
+    return thetaJN, phiJL, theta1, theta2, phi12, chi1, chi2, psiJ
+
+def _vec_init_via_system_frame(P, thetaJN, phiJL, theta1, theta2, phi12, chi1, chi2, psiJ):
+    """
+    Vector form of init_via_system_frame
+    """
+    f_to_use = np.where(P.fref == 0, P.fmin, P.fref)
+    # Port of SimInspiralTransformPrecessingNewInitialConditions (masses in kg)
+    m1, m2 = P.m1/lal.MSUN_SI, P.m2/lal.MSUN_SI
+    phiref = P.phiref
+    LN = (np.zeros(P.n), np.zeros(P.n), np.ones(P.n))
+    s1 = (np.sin(theta1)*np.cos(phiref), np.sin(theta1)*np.sin(phiref), np.cos(theta1))
+    s2 = (np.sin(theta2)*np.cos(phi12+phiref), np.sin(theta2)*np.sin(phi12+phiref), np.cos(theta2))
+    M = m1 + m2
+    eta = m1*m2/M/M
+    v0 = np.cbrt(M*lal.MTSUN_SI*np.pi*f_to_use)
+    Lmag = M*M*eta/v0*(1 + v0*v0*(1.5 + eta/6.))
+    J = tuple(LN[k]*Lmag + m1*m1*chi1*s1[k] + m2*m2*chi2*s2[k] for k in range(3))
+    Jhat = _vec_unit(J)
+    theta0 = np.arccos(Jhat[2])
+    phi0 = np.arctan2(Jhat[1], Jhat[0])
+    LN, s1, s2 = [_vec_rotate_z(phiJL - np.pi, _vec_rotate_y(-theta0, _vec_rotate_z(-phi0, v))) for v in (LN, s1, s2)]
+    N = (np.zeros(P.n), np.sin(thetaJN), np.cos(thetaJN))
+    incl = np.arccos(_vec_dot(N, LN))
+    thetaLJ = np.arccos(LN[2])
+    phiL = np.arctan2(LN[1], LN[0])
+    s1, s2, N = [_vec_rotate_y(-thetaLJ, _vec_rotate_z(-phiL, v)) for v in (s1, s2, N)]
+    phiN = np.arctan2(N[1], N[0])
+    s1, s2 = [_vec_rotate_z(np.pi/2 - phiN - phiref, v) for v in (s1, s2)]
+    P.incl = incl
+    P.s1x, P.s1y, P.s1z = chi1*s1[0], chi1*s1[1], chi1*s1[2]
+    P.s2x, P.s2y, P.s2z = chi2*s2[0], chi2*s2[1], chi2*s2[2]
+    # Define psiL via the deficit angle between Jhat in the radiation frame and the psiJ we want to achieve
+    Jref = _vec_total_angular_momentum_over_M2(P)
+    P.psi = np.mod(psiJ - np.arctan2(Jref[1], Jref[0]), 2*np.pi)
+    return P
+
+def _vec_assign_system_frame(indx):
+    def assign(P, val):
+        _vec_require_fref(P)
+        frame = list(_vec_extract_system_frame(P))
+        frame[indx] = val
+        return _vec_init_via_system_frame(P, *frame)
+    return assign
+
+def _vec_extract_system_frame_param(indx, fn=None):
+    def extract(P):
+        _vec_require_fref(P)
+        val = _vec_extract_system_frame(P)[indx]
+        return fn(val) if fn else val
+    return extract
+
+def _vec_mass_scale(P):
+    # Sometimes we use fits where we are NOT in solar mass units, so be careful!
+    return np.where(P.m1 > 1e10, lal.MSUN_SI, 1.)
+
+def _vec_assign_masses(P, m1, m2):
+    P.m1, P.m2 = m1, m2
+    return P
+
+def _vec_assign_spin_magnitude(P, k, val):
+    chi = _vec_spins(P)[k-1]
+    chi_mag = np.sqrt(_vec_dot(chi, chi))
+    Lhat = _vec_unit(_vec_orbital_angular_momentum_over_M2(P))
+    small = chi_mag < 1e-5
+    with np.errstate(divide='ignore', invalid='ignore'):
+        new = [np.where(small, val*Lhat[c], val*chi[c]/chi_mag) for c in range(3)]
+    setattr(P, 's{}x'.format(k), new[0])
+    setattr(P, 's{}y'.format(k), new[1])
+    setattr(P, 's{}z'.format(k), new[2])
+    return P
+
+def _vec_assign_theta(P, k, val):
+    sx, sy, sz = _vec_spins(P)[k-1]
+    chiperp_now = np.sqrt(sx**2 + sy**2)
+    chi_now = np.sqrt(sz**2 + chiperp_now**2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        aligned = chiperp_now/chi_now < 1e-9
+        new_x = np.where(aligned, chi_now*np.sin(val), chi_now*np.sin(val)*sx/chiperp_now)
+        new_y = np.where(aligned, 0., chi_now*np.sin(val)*sy/chiperp_now)
+    setattr(P, 's{}x'.format(k), new_x)
+    setattr(P, 's{}y'.format(k), new_y)
+    setattr(P, 's{}z'.format(k), chi_now*np.cos(val))
+    return P
+
+def _vec_assign_phi(P, k, val):
+    sx, sy, sz = _vec_spins(P)[k-1]
+    chiperp_now = np.sqrt(sx**2 + sy**2)
+    setattr(P, 's{}x'.format(k), chiperp_now*np.cos(val))
+    setattr(P, 's{}y'.format(k), chiperp_now*np.sin(val))
+    return P
+
+def _vec_assign_perp_bar(P, k, val):
+    sx, sy, sz = _vec_spins(P)[k-1]
+    phi = np.arctan2(sy, sx)
+    chi_perp_new = val*np.sqrt(1-sz**2)  # R=Rbar*(1-z^2)^0.5
+    setattr(P, 's{}x'.format(k), chi_perp_new*np.cos(phi))
+    setattr(P, 's{}y'.format(k), chi_perp_new*np.sin(phi))
+    return P
+
+def _vec_assign_chieff_aligned(P, val):
+    m1, m2 = P.m1, P.m2
+    chi1, chi2 = P.s1z, P.s2z
+    chiminus = (m2*chi1 - m1*chi2)/(m1 + m2)
+    chi1_new = (m1+m2)/(m1**2+m2**2) * (m1*val + m2*chiminus)
+    chi2_new = (m1+m2)/(m1**2+m2**2) * (m2*val + m1*chiminus)
+    unequal = np.abs(m1/m2 - 1) > 1e-5
+    # for equal mass, require them to have the same value
+    P_equal = P.copy()
+    _vec_assign_spin_magnitude(P_equal, 1, val)
+    _vec_assign_spin_magnitude(P_equal, 2, val)
+    P.s1x, P.s1y = np.where(unequal, P.s1x, P_equal.s1x), np.where(unequal, P.s1y, P_equal.s1y)
+    P.s2x, P.s2y = np.where(unequal, P.s2x, P_equal.s2x), np.where(unequal, P.s2y, P_equal.s2y)
+    P.s1z = np.where(unequal, chi1_new, P_equal.s1z)
+    P.s2z = np.where(unequal, chi2_new, P_equal.s2z)
+    return P
+
+def _vec_assign_mu(which):
+    def assign(P, val):
+        fac_scale = _vec_mass_scale(P)
+        q = P.m2/P.m1
+        mc = mchirp(P.m1/fac_scale, P.m2/fac_scale)
+        mu1, mu2, mu3 = tools.Mcqchi1chi2Tomu1mu2mu3(mc, q, P.s1z, P.s2z)
+        if which == 'mu1':
+            mu1 = val
+        else:
+            mu2 = val
+        mcNew, q, chi1z, chi2z = tools.mu1mu2qchi2ToMcqchi1chi2(mu1, mu2, q, P.s2z)  # q,chi2z is fixed
+        P.s1z = chi1z
+        # now change mc at fixed q
+        return P.assign_param('mc', mcNew*fac_scale)
+    return assign
+
+def _vec_assign_beta(P, val):
+    # Documentation: *changing* beta is designed for a single-spin binary at present
+    _vec_require_fref(P)
+    thetaJN, phiJL, theta1, theta2, phi12, chi1, chi2, psiJ = _vec_extract_system_frame(P)
+    if np.any(chi2 > 1e-5):
+        print(" Changing beta only supported for single spin ")
+        sys.exit(2)
+    small = np.abs(val) < 1e-4
+    if not np.all(small):
+        SoverL = chi1 * P.VelocityAtFrequency(P.fref) * P.m1/P.m2  # S/L = m1 chi v/m2
+        if np.any((~small) & (np.cos(val)**2 < 1-SoverL**2)):
+            print(" This value of beta cannot be attained, because SoverL= ", SoverL)
+            sys.exit(3)
+        if spin_convention != "radiation":
+            print(" beta assignment not implemented in non-radiation gauge ")
+            sys.exit(4)
+        x = np.cos(val)
+        with np.errstate(invalid='ignore'):
+            kappa = (- np.sin(val)**2 + x * np.sqrt( SoverL**2 - np.sin(val)**2))/SoverL
+        theta1 = np.arccos(kappa)
+    theta1 = np.where(small, 0., theta1)
+    return _vec_init_via_system_frame(P, val, phiJL, theta1, theta2, phi12, chi1, chi2, psiJ)
+
+def _vec_assign_lambda_tilde(which):
+    def assign(P, val):
+        Lt, dLt = tidal_lambda_tilde(P.m1, P.m2, P.lambda1, P.lambda2)
+        if which == 'LambdaTilde':
+            Lt = val
+        else:
+            dLt = val
+        P.lambda1, P.lambda2 = tidal_lambda_from_tilde(P.m1, P.m2, Lt, dLt)
+        return P
+    return assign
+
+def _vec_assign_mc(P, val):
+    # change implemented at fixed chi1, chi2, eta (and ecc)
+    return _vec_assign_masses(P, *m1m2(val, symRatio(P.m1, P.m2)))
+
+def _vec_assign_eta(P, val):
+    # change implemented at fixed chi1, chi2, mc
+    return _vec_assign_masses(P, *m1m2(mchirp(P.m1, P.m2), val))
+
+def _vec_set(**kwargs):
+    # helper: assign functions that set attributes directly from other attributes and the new value
+    def assign(P, val):
+        new_vals = dict((name, fn(P, val)) for name, fn in kwargs.items())
+        for name in new_vals:
+            setattr(P, name, new_vals[name])
+        return P
+    return assign
+
+_vector_assign_table = {
+    'mtot': _vec_set(m1=lambda P, val: val/(1+P.m2/P.m1), m2=lambda P, val: val*(P.m2/P.m1)/(1+P.m2/P.m1)),
+    'q': _vec_set(m1=lambda P, val: (P.m1+P.m2)/(1.+val), m2=lambda P, val: val*(P.m1+P.m2)/(1.+val)),
+    'log_mc': lambda P, val: _vec_assign_mc(P, 10**val),
+    'mc': _vec_assign_mc,
+    'mc_ecc': _vec_assign_mc,
+    'eta': _vec_assign_eta,
+    'delta': _vec_set(m1=lambda P, val: (P.m1+P.m2)*(1+val)/2, m2=lambda P, val: (P.m1+P.m2)*(1-val)/2),
+    'delta_mc': lambda P, val: _vec_assign_eta(P, 0.25*(1 - val*val)),
+    'chiz_plus': _vec_set(s1z=lambda P, val: val + (P.s1z-P.s2z)/2., s2z=lambda P, val: val - (P.s1z-P.s2z)/2.),
+    'chiz_minus': _vec_set(s1z=lambda P, val: (P.s1z+P.s2z)/2. + val, s2z=lambda P, val: (P.s1z+P.s2z)/2. - val),
+    's1z_bar': _vec_set(s1z=lambda P, val: val),
+    's2z_bar': _vec_set(s2z=lambda P, val: val),
+    'chi1_perp_bar': lambda P, val: _vec_assign_perp_bar(P, 1, val),
+    'chi1_perp_u': lambda P, val: _vec_assign_perp_bar(P, 1, np.power(val, 1./p_R)),
+    'chi2_perp_bar': lambda P, val: _vec_assign_perp_bar(P, 2, val),
+    'chi2_perp_u': lambda P, val: _vec_assign_perp_bar(P, 2, np.power(val, 1./p_R)),
+    'lambda_plus': _vec_set(lambda1=lambda P, val: val + (P.lambda1-P.lambda2)/2., lambda2=lambda P, val: val - (P.lambda1-P.lambda2)/2.),
+    'lambda_minus': _vec_set(lambda1=lambda P, val: (P.lambda1+P.lambda2)/2. + val, lambda2=lambda P, val: (P.lambda1+P.lambda2)/2. - val),
+    'chi1': lambda P, val: _vec_assign_spin_magnitude(P, 1, val),
+    'chi2': lambda P, val: _vec_assign_spin_magnitude(P, 2, val),
+    'thetaJN': _vec_assign_system_frame(0),
+    'phiJL': _vec_assign_system_frame(1),
+    'theta1_Jfix': _vec_assign_system_frame(2),
+    'theta2_Jfix': _vec_assign_system_frame(3),
+    'psiJ': _vec_assign_system_frame(7),
+    'theta1': lambda P, val: _vec_assign_theta(P, 1, val),
+    'theta2': lambda P, val: _vec_assign_theta(P, 2, val),
+    'cos_theta1': lambda P, val: _vec_assign_theta(P, 1, np.arccos(val)),
+    'cos_theta2': lambda P, val: _vec_assign_theta(P, 2, np.arccos(val)),
+    'phi1': lambda P, val: _vec_assign_phi(P, 1, val),
+    'phi2': lambda P, val: _vec_assign_phi(P, 2, val),
+    'beta': _vec_assign_beta,
+    'LambdaTilde': _vec_assign_lambda_tilde('LambdaTilde'),
+    'DeltaLambdaTilde': _vec_assign_lambda_tilde('DeltaLambdaTilde'),
+    'chieff_aligned': _vec_assign_chieff_aligned,
+    'mu1': _vec_assign_mu('mu1'),
+    'mu2': _vec_assign_mu('mu2'),
+}
+
+def _vec_projection_L(vec_fn):
+    # component of a (vector) quantity along Lhat
+    def extract(P):
+        return _vec_dot(_vec_Lhat(P), vec_fn(P))
+    return extract
+
+def _vec_perp_L(vec_fn):
+    # magnitude of the component of a (vector) quantity perpendicular to Lhat
+    def extract(P):
+        v = vec_fn(P)
+        return np.sqrt(_vec_dot(v, v) - _vec_dot(_vec_Lhat(P), v)**2)
+    return extract
+
+def _vec_S_over_M2(P):
+    chi1, chi2 = _vec_spins(P)
+    return tuple((chi1[k]*P.m1**2 + chi2[k]*P.m2**2)/(P.m1+P.m2)**2 for k in range(3))
+
+def _vec_Delta_over_M2(P):
+    chi1, chi2 = _vec_spins(P)
+    return tuple(-1*(chi1[k]*P.m1 - chi2[k]*P.m2)/(P.m1+P.m2) for k in range(3))
+
+def _vec_S0(P):
+    chi1, chi2 = _vec_spins(P)
+    return tuple((chi1[k]*P.m1 + chi2[k]*P.m2)/(P.m1+P.m2) for k in range(3))
+
+def _vec_chi_p(P):
+    # see e.g.,https://journals.aps.org/prd/pdf/10.1103/PhysRevD.91.024043 Eq. 3.3, 3.4
+    m1, m2 = P.m1, P.m2
+    q = m2/m1  # note convention
+    A1 = (2+ 3.*q/2); A2 = (2+3./(2*q))
+    S1p = np.abs(A1)*m1**2*np.sqrt(P.s1x**2 + P.s1y**2)
+    S2p = np.abs(A2)*m2**2*np.sqrt(P.s2x**2 + P.s2y**2)
+    return np.maximum(S1p, S2p)/(A1*m1**2)  # divide by term for *larger* BH
+
+def _vec_chi_pavg(P):
+    # Averaged precession parameter requires a numerical quadrature for each binary: evaluate point by point
+    out = np.zeros(P.n)
+    for indx in np.arange(P.n):
+        out[indx] = P.to_ChooseWaveformParams(indx).extract_param('chi_pavg')
+    return out
+
+def _vec_beta_cos(P):
+    Jhat = _vec_unit(_vec_total_angular_momentum_over_M2(P))
+    Lhat = _vec_unit(_vec_orbital_angular_momentum_over_M2(P))
+    return _vec_dot(Lhat, Jhat)
+
+def _vec_require_fref_then(fn):
+    def extract(P):
+        _vec_require_fref(P)
+        return fn(P)
+    return extract
+
+def _vec_theta(k):
+    def extract(P):
+        sx, sy, sz = _vec_spins(P)[k-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.arccos(sz/np.sqrt(sz**2 + sx**2 + sy**2))
+    return extract
+
+def _vec_perp_bar(k, power=1):
+    def extract(P):
+        sx, sy, sz = _vec_spins(P)[k-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.power(np.sqrt(sx**2 + sy**2)/np.sqrt(1-sz**2), power)
+    return extract
+
+def _vec_mu(indx):
+    def extract(P):
+        mc = mchirp(P.m1, P.m2)/_vec_mass_scale(P)
+        return tools.Mcqchi1chi2Tomu1mu2mu3(mc, P.m2/P.m1, P.s1z, P.s2z)[indx]
+    return extract
+
+def _vec_shu(P):
+    # https://arxiv.org/pdf/1801.08162.pdf Eq. 27
+    chi1, chi2 = _vec_spins(P)
+    Lhat = _vec_Lhat(P)
+    xi = _vec_dot(Lhat, tuple(P.m1*chi1[k] + P.m2*chi2[k] for k in range(3)))/(P.m1+P.m2)
+    return xi - 0.5*_vec_dot(Lhat, tuple(chi1[k]+chi2[k] for k in range(3))) * (P.m1*P.m2)/(P.m1+P.m2)**2
+
+_vector_extract_table = {
+    'mtot': lambda P: P.m1 + P.m2,
+    'q': lambda P: P.m2/P.m1,
+    'delta': lambda P: (P.m1-P.m2)/(P.m1+P.m2),
+    'delta_mc': lambda P: (P.m1-P.m2)/(P.m1+P.m2),
+    'mc': lambda P: mchirp(P.m1, P.m2),
+    'mc_ecc': lambda P: mchirp(P.m1, P.m2)/np.power(1 - 157*P.eccentricity**2/24., 3./5.),
+    'log_mc': lambda P: np.log10(mchirp(P.m1, P.m2)),
+    'eta': lambda P: symRatio(P.m1, P.m2),
+    'chi1': lambda P: np.sqrt(P.s1x**2 + P.s1y**2 + P.s1z**2),
+    'chi2': lambda P: np.sqrt(P.s2x**2 + P.s2y**2 + P.s2z**2),
+    'chi1_perp': _vec_perp_L(lambda P: _vec_spins(P)[0]),
+    'chi2_perp': _vec_perp_L(lambda P: _vec_spins(P)[1]),
+    'chi1_perp_bar': _vec_perp_bar(1),
+    'chi2_perp_bar': _vec_perp_bar(2),
+    'chi1_perp_u': _vec_perp_bar(1, p_R),
+    'chi2_perp_u': _vec_perp_bar(2, p_R),
+    's1z_bar': lambda P: P.s1z,
+    's2z_bar': lambda P: P.s2z,
+    'xi': _vec_projection_L(lambda P: tuple((P.m1*_vec_spins(P)[0][k] + P.m2*_vec_spins(P)[1][k])/(P.m1+P.m2) for k in range(3))),
+    'chieff_aligned': _vec_projection_L(lambda P: tuple((P.m1*_vec_spins(P)[0][k] + P.m2*_vec_spins(P)[1][k])/(P.m1+P.m2) for k in range(3))),
+    'chiMinus': _vec_projection_L(lambda P: tuple((P.m1*_vec_spins(P)[0][k] - P.m2*_vec_spins(P)[1][k])/(P.m1+P.m2) for k in range(3))),
+    'chiMinusAlt': _vec_projection_L(lambda P: tuple((P.m1*_vec_spins(P)[0][k] - P.m2*_vec_spins(P)[1][k])/(P.m1-P.m2) for k in range(3))),
+    'chiz_plus': lambda P: (P.s1z+P.s2z)/2.,
+    'chiz_minus': lambda P: (P.s1z-P.s2z)/2.,
+    'shu': _vec_shu,
+    'mu1': _vec_mu(0),
+    'mu2': _vec_mu(1),
+    'q_mu': lambda P: P.m2/P.m1,
+    'chi2z_mu': lambda P: P.s2z,
+    'lambda_plus': lambda P: (P.lambda1+P.lambda2)/2.,
+    'lambda_minus': lambda P: (P.lambda1-P.lambda2)/2.,
+    'thetaJN': _vec_extract_system_frame_param(0),
+    'phiJL': _vec_extract_system_frame_param(1),
+    'theta1_Jfix': _vec_extract_system_frame_param(2),
+    'theta2_Jfix': _vec_extract_system_frame_param(3),
+    'cos_theta1_alt': _vec_extract_system_frame_param(2, np.cos),
+    'cos_theta2_alt': _vec_extract_system_frame_param(3, np.cos),
+    'psiJ': _vec_extract_system_frame_param(7),
+    'sin_phiJL': _vec_extract_system_frame_param(1, np.sin),
+    'cos_phiJL': _vec_extract_system_frame_param(1, np.cos),
+    'theta1': _vec_theta(1),
+    'theta2': _vec_theta(2),
+    'cos_theta1': lambda P: np.cos(_vec_theta(1)(P)),
+    'cos_theta2': lambda P: np.cos(_vec_theta(2)(P)),
+    'phi1': lambda P: np.angle(P.s1x + 1j*P.s1y),
+    'phi2': lambda P: np.angle(P.s2x + 1j*P.s2y),
+    'beta': _vec_require_fref_then(lambda P: np.arccos(_vec_beta_cos(P))),
+    'cos_beta': _vec_require_fref_then(_vec_beta_cos),
+    'sin_beta': _vec_require_fref_then(lambda P: np.sqrt(1 - _vec_beta_cos(P)**2)),
+    'SoverM2': lambda P: np.sqrt(_vec_dot(_vec_S_over_M2(P), _vec_S_over_M2(P))),
+    'SOverM2_vec': lambda P: np.array(_vec_S_over_M2(P)).T,
+    'SOverM2_perp': _vec_perp_L(_vec_S_over_M2),
+    'DeltaOverM2_vec': lambda P: np.array(_vec_Delta_over_M2(P)).T,
+    'DeltaOverM2_perp': _vec_perp_L(_vec_Delta_over_M2),
+    'DeltaOverM2_L': _vec_projection_L(_vec_Delta_over_M2),
+    'S0_vec': lambda P: np.array(_vec_S0(P)).T,
+    'chi_p': _vec_chi_p,
+    'chi_pavg': _vec_chi_pavg,
+    'LambdaTilde': lambda P: tidal_lambda_tilde(P.m1, P.m2, P.lambda1, P.lambda2)[0],
+    'DeltaLambdaTilde': lambda P: tidal_lambda_tilde(P.m1, P.m2, P.lambda1, P.lambda2)[1],
+}
+
+class ChooseWaveformParamsVector(object):
+    """
+    Array-valued counterpart of ChooseWaveformParams, for coordinate transformations of many binaries at once.
+    Each numerical attribute of ChooseWaveformParams is an array of length n; assign_param/extract_param accept and
+    return arrays, with the same conventions as the scalar versions.
+    Example:
+       P = ChooseWaveformParamsVector(len(x))
+       P.assign_param('mc', x[:,0]); P.assign_param('delta_mc', x[:,1])
+       q = P.extract_param('q')
+    """
+    def __init__(self, n, **kwargs):
+        self.n = n
+        P = ChooseWaveformParams(**kwargs)
+        for name, val in P.__dict__.items():
+            if isinstance(val, (bool, type(None))) or not isinstance(val, (int, float)):
+                setattr(self, name, val)
+            else:
+                setattr(self, name, np.full(n, val, dtype=float))
+
+    def copy(self):
+        P = copy.copy(self)
+        P.__dict__ = dict((name, val.copy() if isinstance(val, np.ndarray) else val) for name, val in self.__dict__.items())
+        return P
+
+    def VelocityAtFrequency(self, f):  # in units of c
+        return ( (self.m1+self.m2)*lsu_G / lsu_C**3 * lsu_PI * f)**(1./3.)
+
+    def to_ChooseWaveformParams(self, indx):
+        """
+        Scalar ChooseWaveformParams for row indx
+        """
+        P = ChooseWaveformParams()
+        for name, val in self.__dict__.items():
+            if name == 'n':
+                continue
+            if isinstance(val, np.ndarray):
+                val = val[indx]
+                default = getattr(P, name, None)
+                if isinstance(default, int) and not isinstance(default, bool):
+                    val = int(val)    # integer flags: approx, ampO, phaseO, taper
+                else:
+                    val = float(val)
+            setattr(P, name, val)
+        return P
+
+    def swap_components(self, mask=None):
+        """
+        Same as ChooseWaveformParams.swap_components, for the rows selected by the boolean array mask (default: all rows)
+        """
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        for name1, name2 in [('m1','m2'), ('s1x','s2x'), ('s1y','s2y'), ('s1z','s2z'), ('lambda1','lambda2')]:
+            val1 = getattr(self, name1)
+            val2 = getattr(self, name2)
+            setattr(self, name1, np.where(mask, val2, val1))
+            setattr(self, name2, np.where(mask, val1, val2))
+        self.phiref = np.where(mask, self.phiref + np.pi, self.phiref)
+
+    def assign_param(self, p, val):
+        val = np.array(np.broadcast_to(np.asarray(val, dtype=float), (self.n,)))
+        if p in _vector_assign_table:
+            _vector_assign_table[p](self, val)
+            return self
+        if p == 'chi1z_mu':
+            raise Exception("Not implemented yet")
+        if hasattr(self, p):
+            setattr(self, p, val)
+            return self
+        print(" No attribute ", p, " in ", dir(self))
+        print(" Is in valid_params? ", p in valid_params)
+        sys.exit(1)
+
+    def extract_param(self, p):
+        if p in _vector_extract_table:
+            return _vector_extract_table[p](self)
+        if 'product(' in p:
+            # Drop first and last characters
+            a = p.replace(' ', '')[8:-1]
+            return np.prod([self.extract_param(term) for term in a.split(',')], axis=0)
+        if hasattr(self, p):
+            val = getattr(self, p)
+            if isinstance(val, np.ndarray):
+                return val
+            return np.full(self.n, val)
+        print( " No attribute ", p, " in ", dir(self))
+        sys.exit(0)
+
+
 def convert_waveform_coordinates(x_in,coord_names=['mc', 'eta'],low_level_coord_names=['m1','m2'],enforce_kerr=False,source_redshift=0):
     """
     A wrapper for ChooseWaveformParams() 's coordinate tools (extract_param, assign_param) providing array-formatted coordinate changes.  BE VERY CAREFUL, because coordinates may be defined inconsistently (e.g., holding different variables constant: M and eta, or mc and q).  Note that if ChooseWaveformParam structuers are built ,the loops can be quite slow
@@ -5171,23 +5851,24 @@ def convert_waveform_coordinates(x_in,coord_names=['mc', 'eta'],low_level_coord_
     if len(coord_names_reduced)<1:
         return x_out
 
-    print(" Fallthrough to non-vector-coords for ", coord_names_reduced,low_level_coord_names)
-    
-    P = ChooseWaveformParams()
+    if rosDebugMessagesContainer[0]:
+        print(" Fallthrough to vectorized ChooseWaveformParamsVector coords for ", coord_names_reduced,low_level_coord_names)
+
+    # All rows at once: same sequence of assign_param/extract_param calls as for a single ChooseWaveformParams
+    P = ChooseWaveformParamsVector(len(x_in))
     # note NO MASS CONVERSION here, because the fit is in solar mass units!
-    for indx_out  in np.arange(len(x_in)):
-        for indx in np.arange(len(low_level_coord_names)):
-            if low_level_coord_names[indx] != 'chi_pavg':
-                P.assign_param( low_level_coord_names[indx], x_in[indx_out,indx])            
-        # Apply redshift: assume input is source-frame mass, convert m1 -> m1(1+z) = m1_z, as fit used detector frame
-        P.m1 = P.m1*(1+source_redshift)
-        P.m2 = P.m2*(1+source_redshift)
-        for indx in np.arange(len(coord_names_reduced)):
-            p = coord_names_reduced[indx]
-            indx_p_out= coord_names.index(p)
-            x_out[indx_out,indx_p_out] = P.extract_param(p)
-        if enforce_kerr and (P.extract_param('chi1') > 1 or P.extract_param('chi2') >1):  # insure Kerr bound satisfied
-            x_out[indx_out] = -np.inf*np.ones( len(coord_names) ) # return negative infinity for all coordinates, if Kerr bound violated
+    for indx in np.arange(len(low_level_coord_names)):
+        if low_level_coord_names[indx] != 'chi_pavg':
+            P.assign_param( low_level_coord_names[indx], x_in[:,indx])
+    # Apply redshift: assume input is source-frame mass, convert m1 -> m1(1+z) = m1_z, as fit used detector frame
+    P.m1 = P.m1*(1+source_redshift)
+    P.m2 = P.m2*(1+source_redshift)
+    for indx in np.arange(len(coord_names_reduced)):
+        p = coord_names_reduced[indx]
+        indx_p_out= coord_names.index(p)
+        x_out[:,indx_p_out] = P.extract_param(p)
+    if enforce_kerr:  # insure Kerr bound satisfied
+        x_out[(P.extract_param('chi1') > 1) | (P.extract_param('chi2') > 1)] = -np.inf # return negative infinity for all coordinates, if Kerr bound violated
     return x_out
 
 def convert_waveform_coordinates_with_eos(x_in,coord_names=['mc', 'eta'],low_level_coord_names=['m1','m2'],enforce_kerr=False,eos_class=None,no_matter1=False,no_matter2=False,source_redshift=0):
@@ -5200,49 +5881,51 @@ def convert_waveform_coordinates_with_eos(x_in,coord_names=['mc', 'eta'],low_lev
         print( " - Failed to load EOSManager - ")  # this will occur at the start
     assert not (eos_class==None)
     x_out = np.zeros( (len(x_in), len(coord_names) ) )
-    P = ChooseWaveformParams()
-    for indx_out  in np.arange(len(x_in)):
-        # WARNING UNUSUAL CONVENTION
-        #   note, P.m1, P.m2 in Msun units here
-        for indx in np.arange(len(low_level_coord_names)):
-            P.assign_param( low_level_coord_names[indx], x_in[indx_out,indx])
-        # Impose EOS, unless no_matter1
-        if no_matter1:
-            P.lambda1=0
-        else:
-          try:
-            if P.m1 < eos_class.mMaxMsun:
-                P.lambda1 = eos_class.lambda_from_m(P.m1*lal.MSUN_SI)
-            else:
-                if rosDebugMessagesContainer[0]:
-                    print( " Failed (safely) for ", P.m1)
-                P.lambda1= -np.inf
-          except:
-#              print " Failed for ", P.m1
-              P.lambda1 = - np.inf
-        if no_matter2:
-            P.lambda2=0
-        else:
-          try:
-            if P.m2 < eos_class.mMaxMsun:
-                P.lambda2 = eos_class.lambda_from_m(P.m2*lal.MSUN_SI)
-            else:
-                if rosDebugMessagesContainer[0]:
-                    print( " Failed (safely) for ", P.m2)
-                P.lambda2= -np.inf
-          except:
-#              print " Failed for ", P.m2
-              P.lambda2=-np.inf
-        # Apply redshift: assume input is source-frame mass, convert m1 -> m1(1+z) = m1_z, as fit used detector frame
-        P.m1 = P.m1*(1+source_redshift)
-        P.m2 = P.m2*(1+source_redshift)
-        # extract
-        for indx in np.arange(len(coord_names)):
-            x_out[indx_out,indx] = P.extract_param(coord_names[indx])
-        if enforce_kerr and (P.extract_param('chi1') > 1 or P.extract_param('chi2') >1):  # insure Kerr bound satisfied
-            x_out[indx_out] = -np.inf*np.ones( len(coord_names) ) # return negative infinity for all coordinates, if Kerr bound violated
+    # All rows at once: see convert_waveform_coordinates
+    P = ChooseWaveformParamsVector(len(x_in))
+    # WARNING UNUSUAL CONVENTION
+    #   note, P.m1, P.m2 in Msun units here
+    for indx in np.arange(len(low_level_coord_names)):
+        P.assign_param( low_level_coord_names[indx], x_in[:,indx])
+    # Impose EOS, unless no_matter1.  Masses the EOS cannot support (e.g., above mMaxMsun) have lambda = -inf
+    if no_matter1:
+        P.lambda1 = np.zeros(len(x_in))
+    else:
+        P.lambda1 = eos_lambda_from_m_array(eos_class, P.m1)
+    if no_matter2:
+        P.lambda2 = np.zeros(len(x_in))
+    else:
+        P.lambda2 = eos_lambda_from_m_array(eos_class, P.m2)
+    # Apply redshift: assume input is source-frame mass, convert m1 -> m1(1+z) = m1_z, as fit used detector frame
+    P.m1 = P.m1*(1+source_redshift)
+    P.m2 = P.m2*(1+source_redshift)
+    # extract
+    for indx in np.arange(len(coord_names)):
+        x_out[:,indx] = P.extract_param(coord_names[indx])
+    if enforce_kerr:  # insure Kerr bound satisfied
+        x_out[(P.extract_param('chi1') > 1) | (P.extract_param('chi2') > 1)] = -np.inf # return negative infinity for all coordinates, if Kerr bound violated
     return x_out
 
+def eos_lambda_from_m_array(eos_class, m_Msun):
+    """
+    Lambda(m) for an array of masses (in Msun), for use with convert_waveform_coordinates_with_eos.
+    Uses the batch interface eos_class.lambda_from_m_array if available and backed by a lalsim family (eos_fam);
+    otherwise (e.g. EOSReprimand, EOSFromTabularData) calls eos_class.lambda_from_m point by point.
+    Masses above eos_class.mMaxMsun, or for which the EOS lookup fails, are assigned -np.inf
+    """
+    if hasattr(eos_class, 'lambda_from_m_array') and getattr(eos_class, 'eos_fam', None) is not None:
+        return eos_class.lambda_from_m_array(m_Msun)
+    lambda_out = -np.inf*np.ones(len(m_Msun))
+    for indx in np.arange(len(m_Msun)):
+        if m_Msun[indx] < eos_class.mMaxMsun:
+            try:
+                lambda_out[indx] = eos_class.lambda_from_m(m_Msun[indx]*lal.MSUN_SI)
+            except:
+                pass
+        elif rosDebugMessagesContainer[0]:
+            print( " Failed (safely) for ", m_Msun[indx])
+    return lambda_out
+
 def test_coord_output(x_out):
     """
     Checks if any of the x_out are -np.inf.  Returns a boolean array [ True, False, False, ...] with True if the corresponding coordinate row is ok, false otherwise
@@ -1,6 +1,11 @@
 from __future__ import division
-import cupy
+import numpy as np
+try:
+    import cupy
+except ImportError:
+    cupy = None
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 #ILE_base = os.environ["ILE_CODE_PATH"]  # default: store code inside main repo. Maintainer controls.
 _cuda_code = None
@@ -13,9 +18,13 @@ def Q_inner_product_cupy(Q, A, start_indices, window_size):
     assert not cupy.isfortran(Q)
     assert not cupy.isfortran(A)
 
+    # complex64 inputs use the single precision kernel
+    single = (Q.dtype == cupy.complex64)
+    dtype_out = cupy.complex64 if single else cupy.complex128
+    kernel_name = "Q_inner_float" if single else "Q_inner"
     out = cupy.empty(
         (num_extrinsic_samples, window_size),
-        dtype=cupy.complex128,
+        dtype=dtype_out,
         order="C",
     )
 
@@ -28,11 +37,11 @@ def Q_inner_product_cupy(Q, A, start_indices, window_size):
             path = os.path.join(os.path.split(os.path.dirname(__file__))[0], 'cuda_Q_inner_product.cu')
         with open(path, 'r') as f:
             _cuda_code = f.read()
-            Q_prod_fn = cupy.RawKernel(_cuda_code, "Q_inner")
+            Q_prod_fn = cupy.RawKernel(_cuda_code, kernel_name)
     else:
-        Q_prod_fn = cupy.RawKernel(_cuda_code, "Q_inner")
+        Q_prod_fn = cupy.RawKernel(_cuda_code, kernel_name)
 
-    float_prec = 16
+    float_prec = 8 if single else 16
     num_threads_x = 4
     num_threads_y = 1024 // 4
     block_size = num_threads_x, num_threads_y, 0
@@ -42,7 +51,7 @@ def Q_inner_product_cupy(Q, A, start_indices, window_size):
         0,
     )
     args = (
-        Q, A, start_indices, window_size,
+        Q, A.astype(dtype_out, copy=False), start_indices, window_size,
         num_time_points, num_extrinsic_samples, num_lms,
         out,
     )
@@ -52,3 +61,48 @@ def Q_inner_product_cupy(Q, A, start_indices, window_size):
     )
 
     return out
+
+
+# CPU kernel.  Persistent thread pool, recreated after a fork (ILE --n-workers)
+_pool = None
+_pool_pid = None
+
+def _default_n_threads():
+    try:
+        return len(os.sched_getaffinity(0))   # respects the batch system's cpu allocation
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def Q_inner_product_numpy(Q, A, start_indices, window_size, n_threads=None):
+    """
+    CPU equivalent of Q_inner_product_cupy:
+        out[i,t] = sum_lm Q[start_indices[i]+t, lm] A[i,lm]
+    Output is complex64 if Q and A are (single precision likelihood), complex128 otherwise.
+    Samples with the same start index share one window of Q, so each distinct start index is one matrix product
+    A[samples] . Q[start:start+window_size].T  on a view of Q (no copy).  Start indices span only the light-travel-time
+    range, so there are few distinct windows.  Windows are split over a thread pool (BLAS releases the GIL).
+    """
+    global _pool, _pool_pid
+    num_extrinsic_samples = A.shape[0]
+    out = np.empty((num_extrinsic_samples, window_size), dtype=np.result_type(Q.dtype, A.dtype))
+    start_indices = np.asarray(start_indices)
+    order = np.argsort(start_indices, kind='stable')
+    starts, first = np.unique(start_indices[order], return_index=True)
+    bounds = np.append(first, num_extrinsic_samples)
+
+    def window_product(k_range):
+        for k in k_range:
+            indx = order[bounds[k]:bounds[k+1]]
+            out[indx] = np.dot(A[indx], Q[starts[k]:starts[k]+window_size].T)
+
+    if n_threads is None:
+        n_threads = _default_n_threads()
+    n_threads = min(n_threads, len(starts))
+    if n_threads <= 1:
+        window_product(range(len(starts)))
+        return out
+    if _pool is None or _pool_pid != os.getpid() or _pool._max_workers < n_threads:
+        _pool = ThreadPoolExecutor(n_threads)
+        _pool_pid = os.getpid()
+    list(_pool.map(window_product, [range(k, len(starts), n_threads) for k in range(n_threads)]))
+    return out
@@ -28,17 +28,16 @@ import lal
 import lalsimulation as lalsim
 import RIFT.lalsimutils as lsu  # problem of relative comprehensive import - dangerous due to package name
 import numpy as np
+from . import Q_inner_product
 try:
   import cupy
   from . import optimized_gpu_tools
-  from . import Q_inner_product
   xpy_default=cupy
   junk_to_check_installed = cupy.array(5)  # this will fail if GPU not installed correctly
 except:
   print(' no cupy (factored)')
   cupy=np #import numpy as cupy  # make sure pointer is identical
   optimized_gpu_tools=None
-  Q_inner_product=None
   xpy_default=np
 
 # Old code
@@ -51,6 +50,8 @@ from scipy import interpolate, integrate
 from scipy import special
 from itertools import product
 import math
+import copy
+import time
 
 from .vectorized_lal_tools import ComputeDetAMResponse,TimeDelayFromEarthCenter
 
@@ -117,10 +118,15 @@ def PrecomputeLikelihoodTerms(event_time_geo, t_window, P, data_dict,
         ignore_threshold=1e-4,   # dangerous for peak lnL of 25^2/2~300 : biases
         use_gwsignal=False,
         use_gwsignal_approx=None,
-       use_external_EOB=False,nr_lookup=False,nr_lookup_valid_groups=None,no_memory=True,perturbative_extraction=False,perturbative_extraction_full=False,hybrid_use=False,hybrid_method='taper_add',use_provided_strain=False,ROM_group=None,ROM_param=None,ROM_use_basis=False,ROM_limit_basis_size=None,skip_interpolation=False):
+       use_external_EOB=False,nr_lookup=False,nr_lookup_valid_groups=None,no_memory=True,perturbative_extraction=False,perturbative_extraction_full=False,hybrid_use=False,hybrid_method='taper_add',use_provided_strain=False,ROM_group=None,ROM_param=None,ROM_use_basis=False,ROM_limit_basis_size=None,skip_interpolation=False,
+        data_terms=None, return_hlms=False, band_limited_rholms=False):
     """
     Compute < h_lm(t) | d > and < h_lm | h_l'm' >
 
+    data_terms: optional PrecomputedDataTerms, holding the detector-data side (PSD weights, weighted data) shared by all templates
+    band_limited_rholms: compute < h_lm(t) | d > only in the window kept, from the band where the integrand is nonzero (see ComputeModeIPTimeSeries)
+    return_hlms: if True, stop after generating the modes and return hlms, hlms_conj, (ROM catalog or None).  Used by PrecomputeLikelihoodTermsBatch
+
     Returns:
         - Dictionary of interpolating functions, keyed on detector, then (l,m)
           e.g. rholms_intp['H1'][(2,2)]
@@ -134,10 +140,6 @@ def PrecomputeLikelihoodTerms(event_time_geo, t_window, P, data_dict,
     global distMpcRef
     detectors = list(data_dict.keys())
     first_data = data_dict[detectors[0]]
-    rholms = {}
-    rholms_intp = {}
-    crossTerms = {}
-    crossTermsV = {}
 
     # Compute hlms at a reference distance, distance scaling is applied later
     P.dist = distMpcRef*1e6*lsu.lsu_PC
@@ -356,9 +358,12 @@ def PrecomputeLikelihoodTerms(event_time_geo, t_window, P, data_dict,
             sys.exit(0)
 
     if not(ignore_threshold is None) and (not ROM_use_basis):
-            crossTermsFiducial = ComputeModeCrossTermIP(hlms,hlms, psd_dict[detectors[0]], 
+            if data_terms is None:
+                crossTermsFiducial = ComputeModeCrossTermIP(hlms,hlms, psd_dict[detectors[0]], 
                                                         P.fmin, fMax,
                                                         1./2./P.deltaT, P.deltaF, analyticPSD_Q, inv_spec_trunc_Q, T_spec,verbose=verbose)
+            else:
+                crossTermsFiducial = data_terms.cross_terms(hlms, hlms, detectors[0], P.fmin, 1./2./P.deltaT, verbose=verbose)
             theWorthwhileModes =  IdentifyEffectiveModesForDetector(crossTermsFiducial, ignore_threshold, detectors)
             # Make sure worthwhile modes satisfy reflection symmetry! Do not truncate egregiously!
             theWorthwhileModes  = theWorthwhileModes.union(  set([(p,-q) for (p,q) in theWorthwhileModes]))
@@ -376,6 +381,55 @@ def PrecomputeLikelihoodTerms(event_time_geo, t_window, P, data_dict,
                     sys.exit(0)
 
 
+    acat_out = None
+    if ROM_use_basis:
+            acat_out = acatHere    # labels are misleading for use_rom_basis
+    if return_hlms:
+            return hlms, hlms_conj, acat_out
+
+    rholms_intp, crossTerms, crossTermsV, rholms, guess_snr = LikelihoodTermsFromHlms(event_time_geo, t_window, P, hlms, hlms_conj,
+            data_dict, psd_dict, fMax, analyticPSD_Q, inv_spec_trunc_Q, T_spec, verbose=verbose, skip_interpolation=skip_interpolation, data_terms=data_terms,
+            band_limited_rholms=band_limited_rholms)
+    return rholms_intp, crossTerms, crossTermsV,  rholms, guess_snr, acat_out
+
+def RholmWindow(det, P, hlms, data_dict, event_time_geo, t_window):
+    """
+    Time window of < h_lm(t) | d > needed for detector det: returns t_det, rho_epoch, t_shift, N_shift, N_window
+    """
+    # This is the event time at the detector
+    t_det = ComputeArrivalTimeAtDetector(det, P.phi, P.theta,event_time_geo)
+    # The is the difference between the time of the leading edge of the
+    # time window we wish to compute the likelihood in, and
+    # the time corresponding to the first sample in the rholms
+    rho_epoch = data_dict[det].epoch - hlms[list(hlms.keys())[0]].epoch
+    t_shift =  float(float(t_det) - float(t_window) - float(rho_epoch))
+#        assert t_shift > 0    # because NR waveforms may start at any time, they don't always have t_shift > 0 ! 
+    # tThe leading edge of our time window of interest occurs
+    # this many samples into the rholms
+    N_shift = int( t_shift / P.deltaT + 0.5 )  # be careful about rounding: might be one sample off!
+    # Number of samples in the window [t_ref - t_window, t_ref + t_window]
+    N_window = int( 2 * t_window / P.deltaT )
+    return t_det, rho_epoch, t_shift, N_shift, N_window
+
+def LikelihoodTermsFromHlms(event_time_geo, t_window, P, hlms, hlms_conj, data_dict, psd_dict, fMax,
+        analyticPSD_Q=False, inv_spec_trunc_Q=False, T_spec=0., verbose=True, skip_interpolation=False, data_terms=None, rholms=None,
+        band_limited_rholms=False):
+    """
+    Second half of PrecomputeLikelihoodTerms: given the modes hlms, hlms_conj of one template, compute
+    the cross terms, < h_lm(t) | d >, and their interpolating functions.
+    If rholms (keyed on detector, then mode) is provided, it is used instead of computing < h_lm(t) | d > (see PrecomputeLikelihoodTermsBatch)
+    band_limited_rholms: passed to ComputeModeIPTimeSeries as band_limited (with data_terms, the PrecomputedDataTerms setting is used)
+
+    Returns rholms_intp, crossTerms, crossTermsV, rholms, guess_snr
+    """
+    detectors = list(data_dict.keys())
+    first_data = data_dict[detectors[0]]
+    rholms_intp = {}
+    crossTerms = {}
+    crossTermsV = {}
+    if rholms is None:
+        rholms = {}
+
     # Print statistics on timeseries provided
     if verbose:
       print(" Mode  npts(data)   npts epoch  epoch/deltaT ")
@@ -383,30 +437,26 @@ def PrecomputeLikelihoodTerms(event_time_geo, t_window, P, data_dict,
         print(mode, first_data.data.length, hlms[mode].data.length, hlms[mode].data.length*P.deltaT, hlms[mode].epoch, hlms[mode].epoch/P.deltaT)
 
     for det in detectors:
-        # This is the event time at the detector
-        t_det = ComputeArrivalTimeAtDetector(det, P.phi, P.theta,event_time_geo)
-        # The is the difference between the time of the leading edge of the
-        # time window we wish to compute the likelihood in, and
-        # the time corresponding to the first sample in the rholms
-        rho_epoch = data_dict[det].epoch - hlms[list(hlms.keys())[0]].epoch
-        t_shift =  float(float(t_det) - float(t_window) - float(rho_epoch))
-#        assert t_shift > 0    # because NR waveforms may start at any time, they don't always have t_shift > 0 ! 
-        # tThe leading edge of our time window of interest occurs
-        # this many samples into the rholms
-        N_shift = int( t_shift / P.deltaT + 0.5 )  # be careful about rounding: might be one sample off!
-        # Number of samples in the window [t_ref - t_window, t_ref + t_window]
-        N_window = int( 2 * t_window / P.deltaT )
+        t_det, rho_epoch, t_shift, N_shift, N_window = RholmWindow(det, P, hlms, data_dict, event_time_geo, t_window)
         # Compute cross terms < h_lm | h_l'm' >
-        crossTerms[det] = ComputeModeCrossTermIP(hlms, hlms, psd_dict[det], P.fmin,
+        if data_terms is None:
+          crossTerms[det] = ComputeModeCrossTermIP(hlms, hlms, psd_dict[det], P.fmin,
                 fMax, 1./2./P.deltaT, P.deltaF, analyticPSD_Q,
                 inv_spec_trunc_Q, T_spec,verbose=verbose)
-        crossTermsV[det] = ComputeModeCrossTermIP(hlms_conj, hlms, psd_dict[det], P.fmin,
+          crossTermsV[det] = ComputeModeCrossTermIP(hlms_conj, hlms, psd_dict[det], P.fmin,
                 fMax, 1./2./P.deltaT, P.deltaF, analyticPSD_Q,
                 inv_spec_trunc_Q, T_spec,prefix="V",verbose=verbose)
+        else:
+          crossTerms[det], crossTermsV[det] = data_terms.cross_terms_UV(hlms, hlms_conj, det, P.fmin, 1./2./P.deltaT, verbose=verbose)
         # Compute rholm(t) = < h_lm(t) | d >
-        rholms[det] = ComputeModeIPTimeSeries(hlms, data_dict[det],
+        if det in rholms:
+          True  # provided by caller
+        elif data_terms is None:
+          rholms[det] = ComputeModeIPTimeSeries(hlms, data_dict[det],
                 psd_dict[det], P.fmin, fMax, 1./2./P.deltaT, N_shift, N_window,
-                analyticPSD_Q, inv_spec_trunc_Q, T_spec)
+                analyticPSD_Q, inv_spec_trunc_Q, T_spec, band_limited=band_limited_rholms)
+        else:
+          rholms[det] = data_terms.mode_ip_time_series([hlms], det, P.fmin, 1./2./P.deltaT, [N_shift], N_window)[0]
         rhoXX = rholms[det][list(rholms[det].keys())[0]]
         # The vector of time steps within our window of interest
         # for which we have discrete values of the rholms
@@ -454,10 +504,8 @@ def PrecomputeLikelihoodTerms(event_time_geo, t_window, P, data_dict,
       print("SNR guess (internal, from det response) ", rho_max,rho_max**2/2)
       guess_snr= rho_max
 
-    if not ROM_use_basis:
-            return rholms_intp, crossTerms, crossTermsV,  rholms, guess_snr, None
-    else:
-            return rholms_intp, crossTerms, crossTermsV,  rholms, guess_snr,  acatHere    # labels are misleading for use_rom_basis
+    return rholms_intp, crossTerms, crossTermsV,  rholms, guess_snr
+
 
 def ReconstructPrecomputedLikelihoodTermsROM(P,acat_rom,rho_intp_rom,crossTerms_rom, crossTermsV_rom, rho_rom,verbose=True):
         """
@@ -839,9 +887,61 @@ def SingleDetectorLogLikelihood(rholm_vals, crossTerms,crossTermsV, Ylms, F, dis
 
     return term1 + term2
 
+_window_twiddles = {}
+def WindowedModeIPTimeSeries(intgd, deltaF, N_shift, N_window, band=None):
+    r"""
+    The N_window samples of the overlap time series that ComputeModeIPTimeSeries keeps, without the full-length inverse FFT.
+        intgd : array (n_series, N) of integrands, in LAL (centered) frequency ordering, as ComplexOverlap.intgd
+        band  : (first, last+1) bins where the integrand can be nonzero (e.g. where the PSD weights are); found from intgd if None
+    Returns an array (n_series, N_window) equal to
+        np.roll(lal.COMPLEX16FreqTimeFFT(intgd), -N_shift)[:N_window]
+
+    Only the band of frequency bins where the integrand is nonzero (|f| in [fmin, fMax]) is used, and only the window is
+    produced, by transform decomposition: with N = L*M (M a power of two a few times N_window) and n = N_shift + m,
+        rho[n] = sum_r exp(2 pi i r n/N) T_r[n mod M],    T_r[j] = sum_q intgd[L q + r] exp(2 pi i q j/M)
+    i.e. L short FFTs of length M and one L-term twiddle sum per output sample: O(N log M) rather than O(N log N), with
+    no full-length output to copy, roll, or cut.  If N has no suitable factor, falls back to a single full-length transform.
+    """
+    intgd = np.atleast_2d(intgd)
+    n_series, npts = intgd.shape
+    if band is None:
+        indx_nonzero = np.nonzero(np.any(intgd != 0, axis=0))[0]
+        if len(indx_nonzero) == 0:
+            return np.zeros((n_series, N_window), dtype=complex)
+        band = (indx_nonzero[0], indx_nonzero[-1] + 1)
+    n_fft = 1 << int(np.ceil(np.log2(4*N_window)))
+    if n_fft >= npts or npts % n_fft:
+        n_fft = npts
+    n_sub = npts // n_fft
+    # Band, widened to a multiple of n_sub bins (the integrand is zero outside the band)
+    n_q = -(-(band[1] - band[0]) // n_sub)
+    c_lo = min(band[0], npts - n_q*n_sub)
+    # T[:, r, j], from the band only (bins relabeled from c_lo; the offset is restored below)
+    T = np.zeros((n_series, n_sub, n_fft), dtype=complex)
+    T[:, :, :n_q] = intgd[:, c_lo:c_lo + n_q*n_sub].reshape(n_series, n_q, n_sub).transpose(0, 2, 1)
+    T = np.fft.ifft(T, axis=-1)
+    # Phases use integer products reduced mod npts, to stay accurate for long segments
+    n = (N_shift + np.arange(N_window, dtype=np.int64)) % npts
+    r = np.arange(n_sub, dtype=np.int64)
+    key = (npts, n_sub, N_window)
+    if not(key in _window_twiddles):
+        _window_twiddles[key] = np.exp(2j*np.pi*((r[:, np.newaxis]*np.arange(N_window)) % npts)/npts)
+    twiddle_shift = np.exp(2j*np.pi*((r*(N_shift % npts)) % npts)/npts)
+    rho = np.einsum('krm,r,rm->km', T[:, :, n % n_fft], twiddle_shift, _window_twiddles[key])
+    # Offset of the band (c_lo - npts/2) and normalization of np.fft.ifft and lal.COMPLEX16FreqTimeFFT
+    kappa = (c_lo - npts//2) % npts
+    return rho*(deltaF*n_fft)*np.exp(2j*np.pi*((kappa*n) % npts)/npts)
+
+def WeightsBand(weights):
+    """
+    (first, last+1) bins where the PSD weights are nonzero: the band argument of WindowedModeIPTimeSeries
+    """
+    indx_nonzero = np.nonzero(weights)[0]
+    return (indx_nonzero[0], indx_nonzero[-1] + 1)
+
 def ComputeModeIPTimeSeries(hlms, data, psd, fmin, fMax, fNyq,
         N_shift, N_window, analyticPSD_Q=False,
-        inv_spec_trunc_Q=False, T_spec=0.):
+        inv_spec_trunc_Q=False, T_spec=0., band_limited=False):
     r"""
     Compute the complex-valued overlap between
     each member of a SphHarmFrequencySeries 'hlms'
@@ -855,6 +955,9 @@ def ComputeModeIPTimeSeries(hlms, data, psd, fmin, fMax, fNyq,
     Returns a SphHarmTimeSeries object containing the complex inner product
     for discrete values of the reference time tref.  The epoch of the
     SphHarmTimeSeries object is set to account for the transformation
+
+    If band_limited, only the N_window samples kept are computed, from the band where the integrand is nonzero
+    (see WindowedModeIPTimeSeries); the result is the same up to roundoff.
     """
     rholms = {}
     assert data.deltaF == hlms[list(hlms.keys())[0]].deltaF
@@ -865,6 +968,22 @@ def ComputeModeIPTimeSeries(hlms, data, psd, fmin, fMax, fNyq,
     IP = lsu.ComplexOverlap(fmin, fMax, fNyq, data.deltaF, psd,
             analyticPSD_Q, inv_spec_trunc_Q, T_spec, full_output=True)
 
+    if band_limited:
+        modes = list(hlms.keys())
+        band = WeightsBand(IP.weights2side)
+        wdata = 2*data.data.data[band[0]:band[1]]*IP.weights2side[band[0]:band[1]]
+        intgd = np.zeros((len(modes), data.data.length), dtype=complex)
+        for k, pair in enumerate(modes):
+            intgd[k, band[0]:band[1]] = np.conj(hlms[pair].data.data[band[0]:band[1]])*wdata
+        rho_window = WindowedModeIPTimeSeries(intgd, data.deltaF, N_shift, N_window, band=band)
+        for k, pair in enumerate(modes):
+            rhoTS = lal.CreateCOMPLEX16TimeSeries("Complex overlap", data.epoch - hlms[pair].epoch,
+                    0., IP.deltaT, lsu.lsu_DimensionlessUnit, N_window)
+            rhoTS.epoch += N_shift*IP.deltaT
+            rhoTS.data.data[:] = rho_window[k]
+            rholms[pair] = rhoTS
+        return rholms
+
     # Loop over modes and compute the overlap time series
     for pair in hlms.keys():
         rho, rhoTS, rhoIdx, rhoPhase = IP.ip(hlms[pair], data)
@@ -947,16 +1066,213 @@ def ComputeModeCrossTermIP(hlmsA, hlmsB, psd, fmin, fMax, fNyq, deltaF,
     IP = lsu.ComplexIP(fmin, fMax, fNyq, deltaF, psd, analyticPSD_Q,
             inv_spec_trunc_Q, T_spec)
 
-    crossTerms = {}
+    return ModeCrossTermMatrix([hlmsA], hlmsB, IP.weights2side, IP.deltaF, verbose=verbose, prefixes=[prefix])[0]
 
-    for mode1 in hlmsA.keys():
-        for mode2 in hlmsB.keys():
-            crossTerms[ (mode1,mode2) ] = IP.ip(hlmsA[mode1], hlmsB[mode2])
+def ModeCrossTermMatrix(hlmsA_list, hlmsB, weights, deltaF, verbose=False, prefixes=None):
+    """
+    < h_lm | h_l'm' > = 2 deltaF sum_f h_lm^*(f) h_l'm'(f) weights(f), for every mode of each hlmsA in hlmsA_list against every mode of hlmsB,
+    as one weighted Gram-matrix product of the stacked (n_modes, n_freq) arrays, over the band where the weights are nonzero.
+    (e.g. hlmsA_list = [hlms, hlms_conj] gives the U and V cross terms together)
+    Returns a list of dictionaries, one per hlmsA, keyed by tuples of mode indices ((l,m),(l',m'))
+    """
+    if prefixes is None:
+        prefixes = ["U", "V"][:len(hlmsA_list)]
+    indx_lo, indx_hi = WeightsBand(weights)
+    modesA = [(k, mode) for k, hlmsA in enumerate(hlmsA_list) for mode in hlmsA.keys()]
+    modesB = list(hlmsB.keys())
+    HA = np.array([hlmsA_list[k][mode].data.data[indx_lo:indx_hi] for k, mode in modesA])
+    HB = np.array([hlmsB[mode].data.data[indx_lo:indx_hi] for mode in modesB])
+    vals = 2.*deltaF*np.dot(np.conj(HA), (HB*weights[indx_lo:indx_hi]).T)
+    crossTerms_list = [{} for hlmsA in hlmsA_list]
+    for indx1, (k, mode1) in enumerate(modesA):
+        for indx2, mode2 in enumerate(modesB):
+            crossTerms_list[k][(mode1, mode2)] = vals[indx1, indx2]
             if verbose:
-                print("       : ", prefix, " populated ", (mode1, mode2), "  = ",\
-                        crossTerms[(mode1,mode2) ])
+                print("       : ", prefixes[k], " populated ", (mode1, mode2), "  = ",\
+                        vals[indx1, indx2])
+    return crossTerms_list
+
+
+class PrecomputedDataTerms(object):
+    """
+    Detector-data side of the likelihood precompute, shared by every template analyzed against the same data.
+    ComputeModeIPTimeSeries and ComputeModeCrossTermIP rebuild the PSD weights (an InnerProduct instance) on every call;
+    this class builds them once per (detector, fmin, fNyq), keeps the weighted data 2*data*weights2side, and evaluates
+      - < h_lm | h_l'm' > and < h_lm^* | h_l'm' > for all mode pairs as one matrix product
+      - < h_lm(t) | d > for all modes of many templates with one stacked inverse FFT
+    The results are identical (up to roundoff) to ComputeModeCrossTermIP and ComputeModeIPTimeSeries.
+    If band_limited, < h_lm(t) | d > is evaluated only in the window kept (see WindowedModeIPTimeSeries).  The time spent,
+    and an estimate of the time the full-length inverse FFT would take (timed once per array shape), are accumulated
+    and returned by pop_rholm_timing.
+    """
+    def __init__(self, data_dict, psd_dict, fMax, analyticPSD_Q=False, inv_spec_trunc_Q=False, T_spec=0., band_limited=False):
+        assert data_dict.keys() == psd_dict.keys()
+        self.data_dict = data_dict
+        self.psd_dict = psd_dict
+        self.fMax = fMax
+        self.analyticPSD_Q = analyticPSD_Q
+        self.inv_spec_trunc_Q = inv_spec_trunc_Q
+        self.T_spec = T_spec
+        self.band_limited = band_limited
+        self._weights = {}
+        self._weighted_data = {}
+        self._time_full_transform = {}
+        self.rholm_time = 0.
+        self.rholm_time_full_estimate = 0.
+
+    def pop_rholm_timing(self):
+        """
+        (time in the band-limited < h_lm(t) | d >, estimated time with full-length inverse FFTs) since the last call
+        """
+        out = (self.rholm_time, self.rholm_time_full_estimate)
+        self.rholm_time = self.rholm_time_full_estimate = 0.
+        return out
+
+    def weights2side(self, det, fmin, fNyq):
+        """
+        Two-sided PSD weights for detector det, as used by ComplexIP / ComplexOverlap
+        """
+        key = (det, fmin, fNyq)
+        if not(key in self._weights):
+            IP = lsu.ComplexIP(fmin, self.fMax, fNyq, self.data_dict[det].deltaF, self.psd_dict[det],
+                    self.analyticPSD_Q, self.inv_spec_trunc_Q, self.T_spec)
+            self._weights[key] = IP.weights2side
+        return self._weights[key]
+
+    def weighted_data(self, det, fmin, fNyq):
+        """
+        2*d(f)*weights2side(f): the data-dependent factor of the < h_lm(t) | d > integrand
+        """
+        key = (det, fmin, fNyq)
+        if not(key in self._weighted_data):
+            self._weighted_data[key] = 2*self.data_dict[det].data.data*self.weights2side(det, fmin, fNyq)
+        return self._weighted_data[key]
+
+    def cross_terms(self, hlmsA, hlmsB, det, fmin, fNyq, verbose=False, prefix="U"):
+        """
+        Same as ComputeModeCrossTermIP(hlmsA, hlmsB, psd_dict[det], ...), as one matrix product
+        """
+        return ModeCrossTermMatrix([hlmsA], hlmsB, self.weights2side(det, fmin, fNyq), self.data_dict[det].deltaF,
+                verbose=verbose, prefixes=[prefix])[0]
+
+    def cross_terms_UV(self, hlms, hlms_conj, det, fmin, fNyq, verbose=False):
+        """
+        U = < h_lm | h_l'm' > and V = < h_lm^* | h_l'm' > (cross_terms(hlms, hlms, ...) and cross_terms(hlms_conj, hlms, ...)) from one matrix product
+        """
+        return ModeCrossTermMatrix([hlms, hlms_conj], hlms, self.weights2side(det, fmin, fNyq), self.data_dict[det].deltaF,
+                verbose=verbose)
+
+    def mode_ip_time_series(self, hlms_list, det, fmin, fNyq, N_shift_list, N_window):
+        """
+        Same as ComputeModeIPTimeSeries(hlms, data_dict[det], ...) for each hlms in hlms_list (with the matching N_shift),
+        using one inverse FFT over the stacked modes of all templates.  Returns a list of SphHarmTimeSeries (dicts).
+        """
+        data = self.data_dict[det]
+        npts = data.data.length
+        deltaT = 1./data.deltaF/npts
+        wdata = self.weighted_data(det, fmin, fNyq)
+        labels = []
+        for indx, hlms in enumerate(hlms_list):
+            for mode in hlms.keys():
+                assert hlms[mode].data.length == npts
+                labels.append((indx, mode))
+        # Integrand 2 h_lm^*(f) d(f) / S_n(f) for all modes at once; the inverse FFT follows lal.COMPLEX16FreqTimeFFT conventions
+        # (band_limited: only the band where the weights are nonzero is filled)
+        band = WeightsBand(self.weights2side(det, fmin, fNyq)) if self.band_limited else (0, npts)
+        if self.band_limited and not((len(labels), npts) in self._time_full_transform):
+            # reference for the speedup: the full-band integrand and inverse FFT, as on the default path
+            t_start = time.time()
+            intgd = np.conj(np.array([hlms_list[indx][mode].data.data for indx, mode in labels]))*wdata
+            np.fft.ifft(np.fft.ifftshift(intgd, axes=-1), axis=-1)
+            self._time_full_transform[(len(labels), npts)] = time.time() - t_start
+        t_start = time.time()
+        intgd = np.zeros((len(labels), npts), dtype=complex)
+        for k, (indx, mode) in enumerate(labels):
+            intgd[k, band[0]:band[1]] = np.conj(hlms_list[indx][mode].data.data[band[0]:band[1]])*wdata[band[0]:band[1]]
+        if self.band_limited:
+            # rows of intgd are grouped by template
+            rho_window = np.empty((len(labels), N_window), dtype=complex)
+            k_start = 0
+            for indx, hlms in enumerate(hlms_list):
+                k_end = k_start + len(hlms)
+                rho_window[k_start:k_end] = WindowedModeIPTimeSeries(intgd[k_start:k_end], data.deltaF, N_shift_list[indx], N_window, band=band)
+                k_start = k_end
+            self.rholm_time += time.time() - t_start
+            self.rholm_time_full_estimate += self._time_full_transform[(len(labels), npts)]
+        else:
+            ovlp = data.deltaF*npts*np.fft.ifft(np.fft.ifftshift(intgd, axes=-1), axis=-1)
+            # Equivalent of DataRollBins by N_shift followed by a cut to N_window samples
+            rho_window = [np.roll(ovlp[k], -N_shift_list[indx])[:N_window] for k, (indx, mode) in enumerate(labels)]
+        rholms_list = [{} for hlms in hlms_list]
+        for k, (indx, mode) in enumerate(labels):
+            N_shift = N_shift_list[indx]
+            rhoTS = lal.CreateCOMPLEX16TimeSeries("Complex overlap", data.epoch - hlms_list[indx][mode].epoch,
+                    0., deltaT, lsu.lsu_DimensionlessUnit, N_window)
+            rhoTS.epoch += N_shift*deltaT
+            rhoTS.data.data[:] = rho_window[k]
+            rholms_list[indx][mode] = rhoTS
+        return rholms_list
+
+
+def PrecomputeLikelihoodTermsBatch(event_time_geo, t_window, P_list, data_dict, psd_dict, Lmax, fMax,
+        analyticPSD_Q=False, inv_spec_trunc_Q=False, T_spec=0., verbose=True, data_terms=None, skip_interpolation=False, band_limited_rholms=False, **kwargs):
+    """
+    PrecomputeLikelihoodTerms for a list of templates P_list against the same data.
+    The detector-data side (PSD weights, weighted data) is built once (or taken from data_terms), and < h_lm(t) | d >
+    for all templates is computed with one stacked inverse FFT per detector.  Memory scales as
+    len(P_list) x (number of modes) x (number of frequency bins): callers should pass P_list in modest chunks.
 
-    return crossTerms
+    band_limited_rholms: window-only < h_lm(t) | d > (see PrecomputedDataTerms); only used if data_terms is not provided.
+    Other keyword arguments are passed to PrecomputeLikelihoodTerms (e.g., approximant choices).
+
+    Returns a list with one entry per template: either the tuple returned by PrecomputeLikelihoodTerms,
+    or the exception raised while generating that template's modes.
+    """
+    if data_terms is None:
+        data_terms = PrecomputedDataTerms(data_dict, psd_dict, fMax, analyticPSD_Q, inv_spec_trunc_Q, T_spec, band_limited=band_limited_rholms)
+    detectors = list(data_dict.keys())
+    results = [None]*len(P_list)
+    hlm_list = []
+    indx_ok = []
+    for indx, P in enumerate(P_list):
+        try:
+            hlms, hlms_conj, acat_out = PrecomputeLikelihoodTerms(event_time_geo, t_window, P, data_dict, psd_dict, Lmax, fMax,
+                    analyticPSD_Q, inv_spec_trunc_Q, T_spec, verbose=verbose, data_terms=data_terms, return_hlms=True, **kwargs)
+            hlm_list.append((hlms, hlms_conj, acat_out))
+            indx_ok.append(indx)
+        except Exception as e:
+            results[indx] = e
+    if len(indx_ok) == 0:
+        return results
+    # Templates in one batch share fmin and sampling rate in practice; group on them to be safe
+    groups = {}
+    for k, indx in enumerate(indx_ok):
+        P = P_list[indx]
+        key = (P.fmin, 1./2./P.deltaT)
+        if not(key in groups):
+            groups[key] = []
+        groups[key].append(k)
+    rholms_batch = [{} for indx in indx_ok]
+    for (fmin, fNyq), members in groups.items():
+        for det in detectors:
+            N_shift_list = []
+            N_window = None
+            for k in members:
+                t_det, rho_epoch, t_shift, N_shift, N_window = RholmWindow(det, P_list[indx_ok[k]], hlm_list[k][0], data_dict, event_time_geo, t_window)
+                N_shift_list.append(N_shift)
+            rholms_here = data_terms.mode_ip_time_series([hlm_list[k][0] for k in members], det, fmin, fNyq, N_shift_list, N_window)
+            for k, rholms_k in zip(members, rholms_here):
+                rholms_batch[k][det] = rholms_k
+    for k, indx in enumerate(indx_ok):
+        hlms, hlms_conj, acat_out = hlm_list[k]
+        try:
+            rholms_intp, crossTerms, crossTermsV, rholms, guess_snr = LikelihoodTermsFromHlms(event_time_geo, t_window, P_list[indx],
+                    hlms, hlms_conj, data_dict, psd_dict, fMax, analyticPSD_Q, inv_spec_trunc_Q, T_spec,
+                    verbose=verbose, skip_interpolation=skip_interpolation, data_terms=data_terms, rholms=rholms_batch[k])
+            results[indx] = (rholms_intp, crossTerms, crossTermsV, rholms, guess_snr, acat_out)
+        except Exception as e:
+            results[indx] = e
+    return results
 
 
 def ComplexAntennaFactor(det, RA, DEC, psi, tref):
@@ -1734,7 +2050,46 @@ def _factored_lnL_helper(kappa_sq, rho_sq):
     return kappa_sq - 0.5 * rho_sq
 
 
-def  DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop(tvals, P_vec, lookupNKDict, rholmsArrayDict, ctUArrayDict,ctVArrayDict,epochDict,Lmax=2,array_output=False,xpy=np, loglikelihood=_factored_lnL_helper,return_lnLt=False,phase_marginalization=False):
+# Largest |lnL(single) - lnL(double)| found by the last precision_check of DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop
+last_precision_check = None
+
+# Approximate working memory of DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop per (extrinsic point, time sample):
+# kappa_sq, Q_prod_result and its scaled copy (complex128), rho_sq and lnL_t (float64), and temporaries of the loglikelihood
+_bytes_per_extrinsic_time_sample = 96
+
+def _auto_max_bytes(fraction=0.25):
+    """
+    Memory budget for max_bytes='auto': a fraction of the job's memory limit (cgroup limit, as set by the batch system,
+    if available; otherwise physical memory)
+    """
+    limit = None
+    for fname in ['/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes']:
+        try:
+            with open(fname) as f:
+                limit = int(f.read().strip())
+            break
+        except (IOError, ValueError):
+            continue
+    try:
+        mem_physical = os.sysconf('SC_PAGE_SIZE')*os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, AttributeError):
+        mem_physical = 4*1024**3
+    if limit is None or limit > mem_physical:
+        limit = mem_physical
+    return int(fraction*limit)
+
+def _slice_extrinsic(P_vec, npts_extrinsic, start, stop):
+    """
+    Shallow copy of P_vec, with every per-extrinsic-point array cut to [start:stop]
+    """
+    P_here = copy.copy(P_vec)
+    for name, val in vars(P_vec).items():
+        if hasattr(val, 'shape') and len(val.shape) > 0 and val.shape[0] == npts_extrinsic:
+            setattr(P_here, name, val[start:stop])
+    return P_here
+
+
+def  DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop(tvals, P_vec, lookupNKDict, rholmsArrayDict, ctUArrayDict,ctVArrayDict,epochDict,Lmax=2,array_output=False,xpy=np, loglikelihood=_factored_lnL_helper,return_lnLt=False,phase_marginalization=False,max_bytes=None,precision='double',precision_check=0):
     """
     DiscreteFactoredLogLikelihoodViaArray uses the array-ized data structures to compute the log likelihood,
     either as an array vs time *or* marginalized in time. 
@@ -1742,12 +2097,45 @@ def  DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop(tvals, P_vec, lookupNKDic
     The timeseries quantities are computed via discrete shifts of an existing grid
     Note 'P' must have the *sampling rate* set to correctly interpret the event time.
      Note arguments passed are NOW ARRAYS, in contrast to similar function which does not have 'Vector' postfix
+    max_bytes: memory budget (bytes, or 'auto').  If the (npts_extrinsic, npts) working arrays would exceed it, the extrinsic
+     points are done in blocks, each reduced to lnL before the next.  Ignored if return_lnLt.
+    precision: 'double' or 'single'.  In single precision the time series, F*Ylm and the kappa_sq accumulator are complex64;
+     rho_sq, lnL(t) and the time integral are float64.  Times are relative to the IFO epoch, so float32 is adequate.
+    precision_check: if nonzero (and precision='single'), also evaluate the first precision_check points in double precision
+     and report the largest lnL discrepancy
     """
-    global distMpcRef
+    global distMpcRef, last_precision_check
 
     detectors = rholmsArrayDict.keys()
     npts = len(tvals)
     npts_extrinsic = len(P_vec.phi)
+
+    if precision == 'single' and precision_check and not return_lnLt:
+        args = (tvals, P_vec, lookupNKDict, rholmsArrayDict, ctUArrayDict, ctVArrayDict, epochDict)
+        kwargs = {'Lmax':Lmax, 'array_output':array_output, 'xpy':xpy, 'loglikelihood':loglikelihood,
+                  'phase_marginalization':phase_marginalization, 'max_bytes':max_bytes}
+        lnL = DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop(*args, precision='single', **kwargs)
+        n_check = min(int(precision_check), npts_extrinsic)
+        P_check = _slice_extrinsic(P_vec, npts_extrinsic, 0, n_check)
+        lnL_double = DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop(tvals, P_check, *args[2:], precision='double', **kwargs)
+        with np.errstate(invalid='ignore'):
+            delta = xpy.abs(lnL[:n_check] - lnL_double)
+        last_precision_check = float(xpy.max(delta[xpy.isfinite(delta)])) if bool(xpy.any(xpy.isfinite(delta))) else 0.
+        print(" Likelihood precision check (single vs double, {} points): max |delta lnL| = {} ".format(n_check, last_precision_check))
+        return lnL
+
+    if not(max_bytes is None) and not return_lnLt:
+        if max_bytes == 'auto':
+            max_bytes = _auto_max_bytes()
+        n_block = max(1, int(float(max_bytes)/(_bytes_per_extrinsic_time_sample*npts)))
+        if n_block < npts_extrinsic:
+            lnL_blocks = []
+            for start in np.arange(0, npts_extrinsic, n_block):
+                P_here = _slice_extrinsic(P_vec, npts_extrinsic, start, start+n_block)
+                lnL_blocks.append(DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop(tvals, P_here, lookupNKDict, rholmsArrayDict,
+                        ctUArrayDict, ctVArrayDict, epochDict, Lmax=Lmax, array_output=array_output, xpy=xpy,
+                        loglikelihood=loglikelihood, phase_marginalization=phase_marginalization, precision=precision))
+            return xpy.concatenate(lnL_blocks)
     # npts_full = len(rholmsArrayDict[detectors[0]][0]) # all have same size
     # print " npts :", npts
     # print " npts_full:", npts_full
@@ -1782,7 +2170,13 @@ def  DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop(tvals, P_vec, lookupNKDic
 
     # Used to accumulate kappa^2 and rho^2 over all detectors.  They are just
     # the sum in quadrature of the individual detector contributions.
-    kappa_sq = xpy.zeros((npts_extrinsic, npts), dtype=np.complex128)
+    if precision == 'single':
+        dtype_complex = np.complex64
+        dtype_real = np.float32
+    else:
+        dtype_complex = np.complex128
+        dtype_real = np.float64
+    kappa_sq = xpy.zeros((npts_extrinsic, npts), dtype=dtype_complex)
     rho_sq = xpy.zeros((npts_extrinsic, npts), dtype=np.float64)
 
     if (xpy is np) or (optimized_gpu_tools is None):
@@ -1806,7 +2200,6 @@ def  DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop(tvals, P_vec, lookupNKDic
         V = ctVArrayDict[det]
 
         lms = lookupNKDict[det]
-        n_lms = len(lms)
 
         # These do depend on extrinsic params
         # Array of shape (npts_extrinsic, n_lms,)
@@ -1884,31 +2277,12 @@ def  DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop(tvals, P_vec, lookupNKDic
             )
         else:
             Q = xpy.ascontiguousarray(rholmsArrayDict[det].T)
-            # # Note: Very inefficient, need to avoid making `Qlms` by doing the
-            # # inner product in a CUDA kernel.
-            # det_rholms = xpy.asarray(rholmsArrayDict[det])
-            # Qlms = xpy.empty((npts_extrinsic, npts, n_lms), dtype=complex)
-            # for i in range(npts_extrinsic):
-            #     Qlms[i] = det_rholms[...,ifirst[i]:ilast[i]].T
-
-            # Has shape (npts_extrinsic, npts).
-            # Starts as term1, and accumulates term2 after.
-
             # View into F with shape (npts_extrinsic, n_lms)
             F_vec_dummy_lm = F_vec[..., np.newaxis]
-            # # View into F * Ylm with shape (npts_extrinsic, npts, n_lms)
-            # FY_dummy_t = xpy.broadcast_to(
-            #     (F_vec_dummy_lm * Ylms_vec)[:, np.newaxis],
-            #     Qlms.shape,
-            # )
-
-            # lnL_t_accum += xpy.einsum(
-            #     "...i,...i",
-            #     xpy.conj(FY_dummy_t), Qlms,
-            # ).real * (distMpcRef/distMpc)[...,None]
 
         if not (xpy is np):
-          FY_conj = xpy.conj(F_vec_dummy_lm * Ylms_vec)
+          FY_conj = xpy.conj(F_vec_dummy_lm * Ylms_vec).astype(dtype_complex)
+          Q = Q.astype(dtype_complex, copy=False)
           # Shape Q = (npts_time_full, nlms)
           # Shape A=FY_conj = (npts_extrinsic, nlms)
           # shape result = (npts_extrinsic, npts_time_*window* = npts)
@@ -1917,24 +2291,15 @@ def  DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop(tvals, P_vec, lookupNKDic
             ifirst, npts,
             )
         else:
-          # Use old code completely unchanged ... very wasteful on memory management!
-          Qlms = xpy.empty((npts_extrinsic, npts, n_lms), dtype=np.complex128)
-          for i in range(npts_extrinsic):
-              Qlms[i] = rholmsArrayDict[det][...,ifirst[i]:(ifirst[i]+npts)].T
-          if phase_marginalization:
-              Qlms[:, :, 1] = xpy.conj(Qlms[:, :, 1])
-
-          FY_dummy_t = np.broadcast_to(
-            (F_vec_dummy_lm * Ylms_vec)[:, np.newaxis],
-            Qlms.shape,
-            )
-
-          Q_prod_result =  np.einsum(
-            "...i,...i",
-            np.conj(FY_dummy_t), Qlms,
+          # CPU kernel: one matrix product per distinct window of Q, no (npts_extrinsic, npts, n_lms) temporary
+          FY_conj = np.conj(F_vec_dummy_lm * Ylms_vec).astype(dtype_complex)
+          Q = Q.astype(dtype_complex, copy=False)
+          Q_prod_result = Q_inner_product.Q_inner_product_numpy(
+            Q, FY_conj,
+            ifirst, npts,
             )
 
-        kappa_sq += Q_prod_result * (distMpcRef/distMpc)[..., np.newaxis]
+        kappa_sq += Q_prod_result * (distMpcRef/distMpc).astype(dtype_real)[..., np.newaxis]
         # lnL_t_accum += Q_prod_result * (distMpcRef/distMpc)[...,None]
 
         # lnL_t_accum += Q_inner_product.Q_inner_product_cupy(
@@ -1954,9 +2319,9 @@ def  DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop(tvals, P_vec, lookupNKDic
 
 
     if phase_marginalization:
-        lnL_t = loglikelihood(xpy.abs(kappa_sq), rho_sq)
+        lnL_t = loglikelihood(xpy.abs(kappa_sq).astype(np.float64, copy=False), rho_sq)
     else:
-        lnL_t = loglikelihood(kappa_sq.real, rho_sq)
+        lnL_t = loglikelihood(kappa_sq.real.astype(np.float64, copy=False), rho_sq)
 
     # Take exponential of the log likelihood in-place.
     lnLmax  = xpy.max(lnL_t)
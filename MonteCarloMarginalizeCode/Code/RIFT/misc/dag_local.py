@@ -0,0 +1,473 @@
+#
+# dag_local.py
+#
+#   Run a condor DAG, as written by glue.pipeline / dag_utils (e.g. by create_event_parameter_pipeline_BasicIteration),
+#   on the local machine without HTCondor:
+#     - the .dag file (JOB, VARS, PARENT/CHILD, RETRY, SCRIPT PRE/POST, CATEGORY/MAXJOBS, SUBDAG EXTERNAL, DONE) and the
+#       .sub files (executable, arguments, queue N, output/error, getenv/environment, initialdir, request_memory/cpus/gpus,
+#       should_transfer_files) are read
+#     - every queued process of a node runs as a subprocess as soon as the node's parents have succeeded and its requested
+#       cpus, memory and gpus fit in the local budget.  GPUs are assigned through CUDA_VISIBLE_DEVICES.
+#     - a node whose process (or POST script) fails is retried as a whole, up to its RETRY count, as DAGMan does
+#     - wall times (excluding time queued for resources, reported separately), attempts and status of every node are
+#       reported (per node, and summed by submit file)
+#   Differences from condor: jobs always start from the current environment (getenv is implied); requirements,
+#   accounting, periodic_remove and other scheduling commands are ignored; a SUBDAG is run by a nested executor with the
+#   same budget.
+#
+#   Command line:  util_RunDAGLocal.py my.dag [--n-cpus N] [--memory-mb M] [--n-gpus G] [--report report.txt]
+#                  (or python -m RIFT.misc.dag_local my.dag ...)
+
+import os
+import re
+import sys
+import time
+import shlex
+import shutil
+import tempfile
+import argparse
+import subprocess
+
+
+def _parse_size_mb(val, default=0):
+    """
+    Submit-file memory value (MB unless suffixed K/M/G/T) as MB.  Expressions (e.g. ifthenelse(...)) give default
+    """
+    m = re.match(r'^\s*([0-9.]+)\s*([KMGT]?)B?\s*$', str(val), re.IGNORECASE)
+    if m is None:
+        return default
+    fac = {'': 1, 'K': 1./1024, 'M': 1, 'G': 1024, 'T': 1024**2}[m.group(2).upper()]
+    return float(m.group(1))*fac
+
+def _parse_int(val, default=0):
+    try:
+        return int(float(str(val).strip().strip('"')))
+    except ValueError:
+        return default
+
+
+def parse_submit_file(fname):
+    """
+    Submit file as a dict of (lower-case) commands; 'queue' is the number of processes
+    """
+    sub = {'queue': 1}
+    with open(fname, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if len(line) == 0 or line.startswith('#'):
+                continue
+            if line.lower().startswith('queue'):
+                words = line.split()
+                sub['queue'] = int(words[1]) if len(words) > 1 else 1
+                continue
+            if not('=' in line):
+                continue
+            key, val = line.split('=', 1)
+            sub[key.strip().lower()] = val.strip()
+    return sub
+
+def split_arguments(args):
+    """
+    Argument list from a submit-file 'arguments' value.  New syntax ("..."): whitespace separated, single quotes group,
+    doubled quotes are literal quotes.  Old syntax: whitespace separated.
+    """
+    args = args.strip()
+    if not(args.startswith('"') and args.endswith('"') and len(args) >= 2):
+        return args.split()
+    args = args[1:-1].replace('""', '"')
+    lex = shlex.shlex(args.replace("''", "\x00"), posix=True)
+    lex.whitespace_split = True
+    lex.quotes = "'"
+    lex.escape = ''
+    lex.commenters = ''
+    return [word.replace("\x00", "'") for word in lex]
+
+def expand_macros(val, macros):
+    """
+    Replace $(name) by macros[name] (case-insensitive); undefined macros expand to the empty string, as in condor
+    """
+    macros = dict((k.lower(), str(v)) for k, v in macros.items())
+    for k in range(5):   # macro values may themselves hold macros
+        val_new = re.sub(r'\$\(([A-Za-z0-9_.+]+)\)', lambda m: macros.get(m.group(1).lower(), ''), val)
+        if val_new == val:
+            break
+        val = val_new
+    return val
+
+
+def parse_dag(fname):
+    """
+    Nodes of a DAG file: dict name -> node dict (sub, vars, retry, parents, children, pre, post, category, done, subdag, dir),
+    in file order, and the MAXJOBS limits per category
+    """
+    nodes = {}
+    maxjobs = {}
+    def new_node(name, sub, subdag=False):
+        nodes[name] = {'name': name, 'sub': sub, 'vars': {}, 'retry': 0, 'parents': set(), 'children': set(), 'pre': None,
+                       'post': None, 'category': None, 'done': False, 'subdag': subdag, 'dir': None}
+    with open(fname, 'r') as f:
+        lines = f.readlines()
+    for line in lines:
+        words = line.split()
+        if len(words) == 0 or words[0].startswith('#'):
+            continue
+        key = words[0].upper()
+        if key == 'JOB':
+            new_node(words[1], words[2])
+            rest = [w.upper() for w in words[3:]]
+            nodes[words[1]]['done'] = 'DONE' in rest
+            if 'DIR' in rest:
+                nodes[words[1]]['dir'] = words[3 + rest.index('DIR') + 1]
+        elif key == 'SUBDAG' and words[1].upper() == 'EXTERNAL':
+            new_node(words[2], words[3], subdag=True)
+            rest = [w.upper() for w in words[4:]]
+            nodes[words[2]]['done'] = 'DONE' in rest
+            if 'DIR' in rest:
+                nodes[words[2]]['dir'] = words[4 + rest.index('DIR') + 1]
+        elif key == 'RETRY':
+            nodes[words[1]]['retry'] = int(words[2])
+        elif key == 'VARS':
+            for m in re.finditer(r'([A-Za-z0-9_.+]+)\s*=\s*"((?:[^"\\]|\\.)*)"', line.split(None, 2)[2]):
+                nodes[words[1]]['vars'][m.group(1)] = m.group(2).replace('\\"', '"')
+        elif key == 'SCRIPT':
+            which = words[1].upper()
+            if which in ['PRE', 'POST']:
+                nodes[words[2]][which.lower()] = words[3:]
+        elif key == 'CATEGORY':
+            nodes[words[1]]['category'] = words[2]
+        elif key == 'MAXJOBS':
+            maxjobs[words[1]] = int(words[2])
+        elif key == 'DONE':
+            nodes[words[1]]['done'] = True
+        elif key == 'PARENT':
+            indx_child = [w.upper() for w in words].index('CHILD')
+            for parent in words[1:indx_child]:
+                for child in words[indx_child+1:]:
+                    nodes[child]['parents'].add(parent)
+                    nodes[parent]['children'].add(child)
+        # other commands (PRIORITY, CONFIG, DOT, ABORT-DAG-ON, NODE_STATUS_FILE, ...) do not change what runs
+    return nodes, maxjobs
+
+
+def default_n_cpus():
+    try:
+        return len(os.sched_getaffinity(0))   # respects the batch system's cpu allocation
+    except AttributeError:
+        return os.cpu_count() or 1
+
+class LocalDAGExecutor(object):
+    """
+    Runs the nodes of a DAG file as local subprocesses (see the module description).
+    n_cpus, memory_mb, n_gpus: local budget.  Defaults: available cores, physical memory, and the devices in
+    CUDA_VISIBLE_DEVICES (none if unset)
+    """
+    def __init__(self, fname_dag, n_cpus=None, memory_mb=None, n_gpus=None, poll_interval=0.5, verbose=False):
+        self.fname_dag = os.path.abspath(fname_dag)
+        self.dag_dir = os.path.dirname(self.fname_dag)
+        self.nodes, self.maxjobs = parse_dag(self.fname_dag)
+        self.n_cpus = n_cpus or default_n_cpus()
+        if memory_mb is None:
+            memory_mb = os.sysconf('SC_PAGE_SIZE')*os.sysconf('SC_PHYS_PAGES')/1024.**2
+        self.memory_mb = memory_mb
+        if n_gpus is None:
+            devices = os.environ.get('CUDA_VISIBLE_DEVICES', '')
+            self.gpu_ids = [d for d in devices.split(',') if d.strip() != '']
+        else:
+            self.gpu_ids = [str(k) for k in range(n_gpus)]
+        self.poll_interval = poll_interval
+        self.verbose = verbose
+        self.subs = {}
+        self.clipped = set()
+        self.next_cluster = 1
+        self.report = []
+
+    def _log(self, *args):
+        if self.verbose:
+            print(" dag_local: ", *args)
+            sys.stdout.flush()
+
+    def _sub(self, node):
+        fname = os.path.join(self._node_dir(node), node['sub'])
+        if not(fname in self.subs):
+            self.subs[fname] = parse_submit_file(fname)
+        return self.subs[fname]
+
+    def _node_dir(self, node):
+        if node['dir'] is None:
+            return self.dag_dir
+        return os.path.join(self.dag_dir, node['dir'])
+
+    def _requests(self, node):
+        """
+        (cpus, memory MB, gpus) requested by each process of the node, clipped to the budget so every node can run
+        """
+        if node['subdag']:
+            return 0, 0, 0
+        sub = self._sub(node)
+        cpus = _parse_int(sub.get('request_cpus', 1), 1)
+        mem = _parse_size_mb(sub.get('request_memory', 0))
+        gpus = _parse_int(sub.get('request_gpus', 0), 0)
+        if (cpus > self.n_cpus or mem > self.memory_mb or gpus > len(self.gpu_ids)) and not(node['name'] in self.clipped):
+            print(" dag_local: node ", node['name'], " requests more than the local budget (", cpus, mem, gpus, "): clipped")
+            self.clipped.add(node['name'])
+        return min(cpus, self.n_cpus), min(mem, self.memory_mb), min(gpus, len(self.gpu_ids))
+
+    def _run_script(self, node, script, retval=0):
+        if script is None:
+            return 0
+        args = [w.replace('$JOB', node['name']).replace('$RETURN', str(retval)).replace('$RETRY', str(node['attempts']-1)) for w in script]
+        if not(os.path.isabs(args[0])) and os.path.exists(os.path.join(self._node_dir(node), args[0])):
+            args[0] = os.path.join(self._node_dir(node), args[0])
+        self._log("script ", node['name'], args)
+        try:
+            return subprocess.call(args, cwd=self._node_dir(node))
+        except OSError as e:
+            print(" dag_local: cannot run script ", args, e)
+            return 1
+
+    def _command(self, node, process):
+        """
+        Command, working directory, environment, stdout/stderr files and sandbox (inputs, outputs) of one process
+        """
+        node_dir = self._node_dir(node)
+        if node['subdag']:
+            cmd = [sys.executable, '-m', 'RIFT.misc.dag_local', os.path.join(node_dir, node['sub']),
+                   '--n-cpus', str(self.n_cpus), '--memory-mb', str(self.memory_mb), '--n-gpus', str(len(self.gpu_ids))]
+            return {'cmd': cmd, 'cwd': os.path.dirname(os.path.join(node_dir, node['sub'])), 'env': dict(os.environ),
+                    'output': None, 'error': None, 'sandbox': None}
+        sub = self._sub(node)
+        macros = dict(node['vars'])
+        macros.update({'cluster': node['cluster'], 'clusterid': node['cluster'], 'process': process, 'procid': process,
+                       'job': node['name']})
+        def val(key, default=''):
+            return expand_macros(sub.get(key, default), macros)
+        iwd = os.path.join(node_dir, val('initialdir')) if val('initialdir') else node_dir
+        exe = val('executable').strip()
+        if not(os.path.isabs(exe)) and os.path.exists(os.path.join(iwd, exe)):
+            exe = os.path.join(iwd, exe)
+        cmd = [exe] + split_arguments(val('arguments'))
+        env = dict(os.environ)
+        environment = val('environment').strip().strip('"')
+        for item in shlex.split(environment.replace(';', ' ')):
+            if '=' in item:
+                k, v = item.split('=', 1)
+                env[k] = v
+        out = {'cmd': cmd, 'cwd': iwd, 'env': env, 'sandbox': None}
+        for key in ['output', 'error']:
+            out[key] = os.path.join(iwd, val(key)) if val(key) else None
+        if val('should_transfer_files').upper() == 'YES':
+            inputs = [os.path.join(iwd, f.strip()) for f in val('transfer_input_files').split(',') if f.strip()]
+            outputs = [f.strip() for f in val('transfer_output_files').split(',') if f.strip()]
+            out['sandbox'] = (inputs, outputs)
+        return out
+
+    def _launch(self, node, process, gpu_ids):
+        spec = self._command(node, process)
+        cwd = spec['cwd']
+        if spec['sandbox']:
+            # as condor file transfer: inputs are linked into a scratch directory, outputs are moved back to the iwd
+            cwd = tempfile.mkdtemp(prefix='dag_local_', dir=spec['cwd'])
+            for src in spec['sandbox'][0]:
+                os.symlink(os.path.abspath(src), os.path.join(cwd, os.path.basename(src.rstrip('/'))))
+        if gpu_ids:
+            spec['env']['CUDA_VISIBLE_DEVICES'] = ','.join(gpu_ids)
+        files = []
+        for key in ['output', 'error']:
+            if spec[key]:
+                os.makedirs(os.path.dirname(spec[key]), exist_ok=True)
+                files.append(open(spec[key], 'w'))
+            else:
+                files.append(subprocess.DEVNULL)
+        self._log("start ", node['name'], process, spec['cmd'])
+        if node['t_launch'] is None:
+            node['t_launch'] = time.time()
+        try:
+            proc = subprocess.Popen(spec['cmd'], cwd=cwd, env=spec['env'], stdout=files[0], stderr=files[1])
+        except OSError as e:
+            print(" dag_local: cannot start ", node['name'], spec['cmd'], e)
+            proc = None
+        return {'proc': proc, 'files': files, 'spec': spec, 'cwd': cwd}
+
+    def _finish(self, running):
+        for f in running['files']:
+            if not(f is subprocess.DEVNULL):
+                f.close()
+        spec = running['spec']
+        if spec['sandbox']:
+            outputs = spec['sandbox'][1]
+            if len(outputs) == 0:
+                outputs = [f for f in os.listdir(running['cwd']) if not(os.path.islink(os.path.join(running['cwd'], f)))]
+            for f in outputs:
+                if os.path.exists(os.path.join(running['cwd'], f)):
+                    shutil.move(os.path.join(running['cwd'], f), os.path.join(spec['cwd'], os.path.basename(f)))
+            shutil.rmtree(running['cwd'], ignore_errors=True)
+
+    def _start_node(self, node):
+        node['attempts'] += 1
+        node['cluster'] = self.next_cluster
+        self.next_cluster += 1
+        node['t_attempt'] = time.time()
+        node['t_queued'] = node['t_launch'] = None
+        if self._run_script(node, node['pre']) != 0:
+            self._end_attempt(node, 1)
+            return
+        node['t_queued'] = time.time()
+        node['state'] = 'running'
+        node['retvals'] = {}
+        node['n_proc'] = 1 if node['subdag'] else self._sub(node)['queue']
+        self.queue.extend([(node['name'], p) for p in range(node['n_proc'])])
+
+    def _end_attempt(self, node, retval):
+        if not(node['post'] is None):
+            retval = self._run_script(node, node['post'], retval)
+        # time waiting for free resources (release to first process launch) is not part of the wall time
+        wait = 0.
+        if not(node['t_queued'] is None):
+            wait = (node['t_launch'] or time.time()) - node['t_queued']
+        node['wait'] += wait
+        node['wall'] += time.time() - node['t_attempt'] - wait
+        if retval == 0:
+            node['state'] = 'done'
+            self._log("done ", node['name'])
+        elif node['attempts'] <= node['retry']:
+            self._log("retry ", node['name'], " (attempt ", node['attempts'], ")")
+            self._start_node(node)
+        else:
+            node['state'] = 'failed'
+            print(" dag_local: node failed ", node['name'], " after ", node['attempts'], " attempts ")
+
+    def _releasable(self, node):
+        return node['state'] == 'waiting' and all(self.nodes[p]['state'] == 'done' for p in node['parents'])
+
+    def _schedule(self):
+        """
+        Main loop of run(): release nodes whose parents are done, start the queued processes that fit, collect finished ones
+        """
+        while True:
+            for node in self.nodes.values():
+                if self._releasable(node):
+                    self._start_node(node)
+            for item in list(self.queue):
+                node = self.nodes[item[0]]
+                cpus, mem, gpus = self._requests(node)
+                cat = node['category']
+                nodes_cat = self.running_category.setdefault(cat, set())
+                if cat in self.maxjobs and not(node['name'] in nodes_cat) and len(nodes_cat) >= self.maxjobs[cat]:
+                    continue
+                if cpus > self.free['cpus'] or mem > self.free['memory'] or gpus > len(self.free['gpus']):
+                    continue
+                self.queue.remove(item)
+                gpu_ids = [self.free['gpus'].pop(0) for k in range(gpus)]
+                self.free['cpus'] -= cpus
+                self.free['memory'] -= mem
+                nodes_cat.add(node['name'])
+                if node['start'] is None:
+                    node['start'] = time.time() - self.t_start
+                record = self._launch(node, item[1], gpu_ids)
+                record['resources'] = (cpus, mem, gpu_ids)
+                self.running[item] = record
+            for item, record in list(self.running.items()):
+                retval = record['proc'].poll() if record['proc'] else 1
+                if retval is None:
+                    continue
+                self._finish(record)
+                del self.running[item]
+                cpus, mem, gpu_ids = record['resources']
+                self.free['cpus'] += cpus
+                self.free['memory'] += mem
+                self.free['gpus'].extend(gpu_ids)
+                node = self.nodes[item[0]]
+                node['retvals'][item[1]] = retval
+                if not(any(key[0] == node['name'] for key in self.running)):
+                    self.running_category[node['category']].discard(node['name'])
+                if len(node['retvals']) == node['n_proc']:
+                    self._end_attempt(node, max(node['retvals'].values(), key=abs))
+            if len(self.running) == 0 and len(self.queue) == 0 and not(any(self._releasable(node) for node in self.nodes.values())):
+                break
+            time.sleep(self.poll_interval)
+
+    def run(self):
+        """
+        Run the DAG.  Returns True if every node succeeded; otherwise writes <dag>.rescue_local (DONE lines) and returns False
+        """
+        for node in self.nodes.values():
+            node.update({'state': 'done' if node['done'] else 'waiting', 'attempts': 0, 'wall': 0., 'wait': 0., 'start': None})
+        self.free = {'cpus': self.n_cpus, 'memory': self.memory_mb, 'gpus': list(self.gpu_ids)}
+        self.running_category = {}   # category -> names of nodes with running processes (MAXJOBS counts nodes)
+        self.queue = []              # (node name, process) waiting for resources
+        self.running = {}            # (node name, process) -> process record
+        self.t_start = time.time()
+        try:
+            self._schedule()
+        except KeyboardInterrupt:
+            for record in self.running.values():
+                if record['proc']:
+                    record['proc'].terminate()
+            raise
+
+        names = list(self.nodes)
+        self.report = [{'node': n, 'sub': self.nodes[n]['sub'], 'state': self.nodes[n]['state'], 'attempts': self.nodes[n]['attempts'],
+                        'start': self.nodes[n]['start'], 'wall': self.nodes[n]['wall'], 'wait': self.nodes[n]['wait']} for n in names]
+        success = all(self.nodes[n]['state'] == 'done' for n in names)
+        if not success:
+            with open(self.fname_dag + '.rescue_local', 'w') as f:
+                for n in names:
+                    if self.nodes[n]['state'] == 'done':
+                        f.write("DONE {}\n".format(n))
+            print(" dag_local: DAG incomplete; completed nodes listed in ", self.fname_dag + '.rescue_local')
+        return success
+
+    def load_rescue(self, fname):
+        """
+        Mark nodes listed as DONE in fname (as written by run()) as complete
+        """
+        with open(fname, 'r') as f:
+            for line in f:
+                words = line.split()
+                if len(words) == 2 and words[0].upper() == 'DONE' and words[1] in self.nodes:
+                    self.nodes[words[1]]['done'] = True
+
+    def write_report(self, fname=None):
+        """
+        Per-node table (start time, wall time, time queued for resources, attempts, state) and wall time summed by submit file
+        """
+        lines = ["# node sub state attempts start_s wall_s wait_s"]
+        for rec in sorted(self.report, key=lambda r: (r['start'] is None, r['start'])):
+            start = "-" if rec['start'] is None else "{:.1f}".format(rec['start'])
+            lines.append("{} {} {} {} {} {:.1f} {:.1f}".format(rec['node'], rec['sub'], rec['state'], rec['attempts'], start, rec['wall'], rec['wait']))
+        lines.append("# sub n_nodes total_wall_s max_wall_s")
+        by_sub = {}
+        for rec in self.report:
+            by_sub.setdefault(rec['sub'], []).append(rec['wall'])
+        for sub, walls in by_sub.items():
+            lines.append("# {} {} {:.1f} {:.1f}".format(sub, len(walls), sum(walls), max(walls)))
+        if fname is None:
+            print("\n".join(lines))
+        else:
+            with open(fname, 'w') as f:
+                f.write("\n".join(lines) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a condor DAG (and its submit files) on this machine, without HTCondor")
+    parser.add_argument("fname_dag", help="DAG file")
+    parser.add_argument("--n-cpus", type=int, default=None, help="CPU budget. Default: available cores")
+    parser.add_argument("--memory-mb", type=float, default=None, help="Memory budget (MB), compared to request_memory. Default: physical memory")
+    parser.add_argument("--n-gpus", type=int, default=None, help="Number of GPUs (devices 0..n-1). Default: CUDA_VISIBLE_DEVICES, if set; else none")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="Seconds between checks of running jobs")
+    parser.add_argument("--rescue", default=None, help="Skip nodes listed as DONE in this file (e.g. <dag>.rescue_local from an earlier run)")
+    parser.add_argument("--report", default=None, help="Write per-node wall times here (default: print them)")
+    parser.add_argument("--verbose", action='store_true')
+    opts = parser.parse_args(argv)
+
+    executor = LocalDAGExecutor(opts.fname_dag, n_cpus=opts.n_cpus, memory_mb=opts.memory_mb, n_gpus=opts.n_gpus,
+                                poll_interval=opts.poll_interval, verbose=opts.verbose)
+    if opts.rescue:
+        executor.load_rescue(opts.rescue)
+    success = executor.run()
+    executor.write_report(opts.report)
+    return 0 if success else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
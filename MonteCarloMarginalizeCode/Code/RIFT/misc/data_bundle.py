@@ -0,0 +1,145 @@
+#
+# data_bundle.py
+#
+#   Pre-conditioned detector data for ILE, shared by every ILE job of an event.
+#   condition_data reproduces the ILE data stage: read each channel from frames (frame_data_to_non_herm_hoff: window, FFT),
+#   read each PSD from XML, resample it to the data frequency spacing, rescale it for the data/PSD windows (T1900249),
+#   and zero it below the per-instrument low frequency cutoff.
+#   write_data_bundle saves the result (frequency-domain data, processed PSDs, fmax and the conditioning metadata) to one
+#   binary file; read_data_bundle loads it back into LAL series, so an ILE job (--data-bundle) touches neither frames nor XML.
+#
+#   Layout: 8-byte magic, 8-byte little-endian header length, JSON header, then each array at a 64-byte aligned offset
+#   recorded in the header.
+#
+
+import json
+import sys
+import numpy as np
+import lal
+import RIFT.lalsimutils as lalsimutils
+
+bundle_magic = b'RIFTDB01'
+bundle_alignment = 64
+
+
+def condition_psd(psd, data, window_shape=0, psd_window_shape=0, fmin=None):
+    """
+    Process a REAL8FrequencySeries PSD for use with the COMPLEX16FrequencySeries data, as ILE does:
+    resample to data.deltaF, rescale by the ratio of windowing factors, zero it below fmin (if not None)
+    """
+    deltaF = data.deltaF
+    psd = lalsimutils.resample_psd_series(psd, deltaF)
+    # Implement PSD window rescaling: see T1900249
+    if psd_window_shape > 0 or window_shape > 0:
+        window_fac_psd = lalsimutils.psd_windowing_factor(psd_window_shape, len(psd.data.data))  # assume the windowing factor IS accounted for, and we have to undo it
+        window_fac_data = lalsimutils.psd_windowing_factor(window_shape, len(data.data.data))
+        psd.data.data *= window_fac_data/window_fac_psd
+    if not(fmin is None):
+        psd_fvals = psd.f0 + deltaF*np.arange(psd.data.length)
+        psd.data.data[psd_fvals < fmin] = 0
+    assert psd.deltaF == deltaF
+    return psd
+
+def integration_fmax(psd_dict, fmax=None):
+    """
+    Upper limit of the inner products: the highest frequency at which the (last) PSD is defined, or fmax if smaller.
+    fmax may not exceed the range of any PSD.
+    """
+    fmax_psd = None
+    for inst in psd_dict:
+        fmax_psd = psd_dict[inst].f0 + psd_dict[inst].deltaF*(psd_dict[inst].data.length - 1)
+        assert fmax is None or fmax <= fmax_psd
+    if fmax and fmax < fmax_psd:
+        return fmax
+    return fmax_psd
+
+def condition_data(cache_file, channel_dict, psd_file_dict, start_time, end_time, deltaT=None, window_shape=0, psd_window_shape=0,
+        fmin_ifo=None, fmax=None, verbose=True):
+    """
+    Read and condition the data and PSDs, as the ILE does.
+        channel_dict  : instrument -> channel name (without the instrument prefix)
+        psd_file_dict : instrument -> PSD XML file
+        fmin_ifo      : optional dict, instrument -> low frequency cutoff applied to the PSD
+    Returns data_dict, psd_dict, fmax (see integration_fmax)
+    """
+    if fmin_ifo is None:
+        fmin_ifo = {}
+    data_dict, psd_dict = {}, {}
+    for inst, chan in channel_dict.items():
+        print("Reading channel %s from cache %s" % (inst+":"+chan, cache_file))
+        data_dict[inst] = lalsimutils.frame_data_to_non_herm_hoff(cache_file,
+                inst+":"+chan, start=start_time, stop=end_time,
+                window_shape=window_shape, deltaT=deltaT, verbose=verbose)
+        print("Frequency binning: %f, length %d" % (data_dict[inst].deltaF,
+                data_dict[inst].data.length))
+    for inst, psdf in psd_file_dict.items():
+        print("Reading PSD for instrument %s from %s" % (inst, psdf))
+        psd = lalsimutils.get_psd_series_from_xmldoc(psdf, inst)
+        if not isinstance(psd, lal.REAL8FrequencySeries):
+            print('FAIL on PSD import')
+            sys.exit(1)
+        psd_dict[inst] = condition_psd(psd, data_dict[inst], window_shape, psd_window_shape, fmin_ifo.get(inst))
+        print("PSD deltaF after interpolation %f" % psd_dict[inst].deltaF)
+    return data_dict, psd_dict, integration_fmax(psd_dict, fmax)
+
+
+def _series_header(series):
+    return {'name': series.name, 'epoch': [series.epoch.gpsSeconds, series.epoch.gpsNanoSeconds], 'f0': series.f0,
+            'deltaF': series.deltaF, 'unit': str(series.sampleUnits), 'length': series.data.length}
+
+def write_data_bundle(fname, data_dict, psd_dict, fmax, metadata=None):
+    """
+    Save conditioned data (COMPLEX16FrequencySeries) and PSDs (REAL8FrequencySeries), keyed on instrument, with fmax and
+    metadata (a JSON-serializable dict, e.g. the conditioning options) to the binary file fname
+    """
+    arrays = []
+    header = {'fmax': fmax, 'metadata': metadata or {}, 'data': {}, 'psd': {}}
+    for kind, series_dict, dtype in [['data', data_dict, '<c16'], ['psd', psd_dict, '<f8']]:
+        for inst, series in series_dict.items():
+            header[kind][inst] = _series_header(series)
+            header[kind][inst]['dtype'] = dtype
+            arrays.append((kind, inst, np.ascontiguousarray(series.data.data, dtype=dtype)))
+    header['instruments'] = list(data_dict.keys())
+    # Offsets depend on the header length, so lay out the arrays relative to the end of a header padded to the alignment
+    offset = 0
+    for kind, inst, arr in arrays:
+        header[kind][inst]['offset'] = offset
+        offset += -(-arr.nbytes // bundle_alignment)*bundle_alignment
+    header_bytes = json.dumps(header).encode()
+    n_header = -(-(16 + len(header_bytes)) // bundle_alignment)*bundle_alignment - 16
+    with open(fname, 'wb') as f:
+        f.write(bundle_magic)
+        f.write(np.array([n_header], dtype='<u8').tobytes())
+        f.write(header_bytes.ljust(n_header))
+        for kind, inst, arr in arrays:
+            f.seek(16 + n_header + header[kind][inst]['offset'])
+            f.write(arr.tobytes())
+
+def read_data_bundle(fname, mmap=True):
+    """
+    Load a bundle written by write_data_bundle.  Returns data_dict, psd_dict, fmax, metadata.
+    Each array is read (memory-mapped if mmap=True, else with fromfile) and copied into a newly allocated LAL series:
+    every job holds its own copy of the data, and the series do not keep the file open.
+    """
+    with open(fname, 'rb') as f:
+        if f.read(8) != bundle_magic:
+            raise ValueError(" data_bundle: {} is not a data bundle ".format(fname))
+        n_header = int(np.frombuffer(f.read(8), dtype='<u8')[0])
+        header = json.loads(f.read(n_header).decode())
+    result = {}
+    for kind, create in [['data', lal.CreateCOMPLEX16FrequencySeries], ['psd', lal.CreateREAL8FrequencySeries]]:
+        result[kind] = {}
+        for inst in header['instruments']:
+            if not(inst in header[kind]):
+                continue
+            info = header[kind][inst]
+            if mmap:
+                arr = np.memmap(fname, dtype=info['dtype'], mode='r', offset=16 + n_header + info['offset'], shape=(info['length'],))
+            else:
+                with open(fname, 'rb') as f:
+                    f.seek(16 + n_header + info['offset'])
+                    arr = np.fromfile(f, dtype=info['dtype'], count=info['length'])
+            series = create(info['name'], lal.LIGOTimeGPS(*info['epoch']), info['f0'], info['deltaF'], lal.Unit(info['unit']), info['length'])
+            series.data.data[:] = arr
+            result[kind][inst] = series
+    return result['data'], result['psd'], header['fmax'], header['metadata']
@@ -0,0 +1,86 @@
+#
+# ile_composite.py
+#
+#   Binary format for ILE output / composite files (e.g., all.net).
+#   The text format is one row per evaluation:
+#        indx m1 m2 s1x s1y s1z s2x s2y s2z [extra] lnL sigmaOverL ntot neff
+#   where [extra] is empty, 'dist', 'eccentricity', 'lambda1 lambda2', or 'lambda1 lambda2 eos_table_index'.
+#   The binary format is a .npy file holding a structured array with those column names (all float64), so it is
+#   self-describing and can be memory-mapped: CIP reads only the pages it needs, and the filters are vectorized masks.
+#
+
+import numpy as np
+
+base_column_names = ['indx', 'm1', 'm2', 's1x', 's1y', 's1z', 's2x', 's2y', 's2z']
+result_column_names = ['lnL', 'sigmaOverL', 'ntot', 'neff']
+
+def composite_column_names(n_cols=None, tides=False, eos_index=False, eccentricity=False, distance=False):
+    """
+    Column names of an ILE output / composite file.  Either specify the layout with the flags (as in CIP), or
+    give the number of columns: 13 (plain), 14 (distance; or eccentricity if eccentricity=True), 15 (tides), 16 (tides and eos index)
+    """
+    if not(n_cols is None):
+        if n_cols == 14 and not eccentricity:
+            distance = True
+        elif n_cols == 15:
+            tides = True
+        elif n_cols == 16:
+            tides = eos_index = True
+        elif not(n_cols in [13, 14]):
+            raise ValueError(" ile_composite: unknown composite layout with {} columns ".format(n_cols))
+    extra = []
+    if tides:
+        extra = ['lambda1', 'lambda2']
+        if eos_index:
+            extra += ['eos_table_index']
+    elif eccentricity:
+        extra = ['eccentricity']
+    if distance:
+        extra += ['dist']
+    return base_column_names + extra + result_column_names
+
+def is_binary(fname):
+    return str(fname).endswith('.npy')
+
+def as_float_array(rec):
+    """
+    2d float view (no copy) of a structured composite array
+    """
+    return rec.view(np.float64).reshape(len(rec), len(rec.dtype.names))
+
+def save_composite(fname, dat, names=None, binary=None, **kwargs):
+    """
+    Save a 2d array of ILE results.  Binary (.npy, named columns) if fname ends in .npy (or binary=True), text otherwise.
+    fname can be a filename or an open file.
+    names: column names; by default inferred from the number of columns (kwargs are passed to composite_column_names)
+    """
+    dat = np.atleast_2d(np.asarray(dat, dtype=np.float64))
+    if binary is None:
+        binary = is_binary(fname)
+    if not binary:
+        np.savetxt(fname, dat)
+        return
+    if names is None:
+        names = composite_column_names(dat.shape[1], **kwargs)
+    rec = np.empty(len(dat), dtype=[(name, np.float64) for name in names])
+    as_float_array(rec)[:] = dat
+    np.save(fname, rec)
+
+def load_composite(fname, mmap=True, structured=False):
+    """
+    Load an ILE output / composite file, text or binary.
+    Returns a 2d float array (columns in file order); for binary files with mmap=True this is a copy-on-write memory map,
+    so rows are only read when used and in-place edits stay private.  If structured=True, return the named-column array
+    (text files are given names from their number of columns).
+    """
+    if is_binary(fname):
+        rec = np.load(fname, mmap_mode=('c' if mmap else None))
+    else:
+        dat = np.loadtxt(fname, ndmin=2)
+        if not structured:
+            return dat
+        rec = np.empty(len(dat), dtype=[(name, np.float64) for name in composite_column_names(dat.shape[1])])
+        as_float_array(rec)[:] = dat
+    if structured:
+        return rec
+    return as_float_array(rec)
@@ -51,3 +51,32 @@ def AverageSimulationWeights(param_list, length_list,sigma_list, prior_volume_li
 
     return weights
 
+
+
+def AverageSimulationLogLikelihoodGrouped(group_index, n_groups, lnL, sigmaOverL):
+    """
+    Vectorized version of the per-point consolidation in util_CleanILE.py: for each group g of repeated ILE evaluations
+    (rows with group_index == g), combine the likelihoods with AverageSimulationWeights(None,None,sigma) weights,
+    using a segmented (log-sum-exp style) reduction over all groups at once.
+    Returns lnL_net, sigmaNetOverL (arrays of length n_groups)
+
+    The variance-minimizing combination is associative: consolidating a consolidated result with new evaluations
+    gives the same answer as consolidating all evaluations together.
+    """
+    group_index = np.asarray(group_index)
+    lnL = np.asarray(lnL, dtype=float)
+    sigmaOverL = np.asarray(sigmaOverL, dtype=float)
+    lnLmax = np.full(n_groups, -np.inf)
+    np.maximum.at(lnLmax, group_index, lnL)
+    lnL_rel = lnL - lnLmax[group_index]
+    sigma = sigmaOverL*np.exp(lnL_rel)     # remove overall Lmax factor, which factors out from the weights constructed from sigma
+    # AverageSimulationWeights falls back to uniform weights if any sigma in the group is negative
+    n_per_group = np.bincount(group_index, minlength=n_groups)
+    uniform = np.bincount(group_index, weights=(sigma < 0), minlength=n_groups) > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv_var = 1./sigma/sigma
+        sum_inv_var = np.bincount(group_index, weights=inv_var, minlength=n_groups)
+        wts = np.where(uniform[group_index], 1./n_per_group[group_index], inv_var/sum_inv_var[group_index])
+        lnLmeanMinusLmax = np.log(np.bincount(group_index, weights=np.exp(lnL_rel)*wts, minlength=n_groups))
+        sigmaNetOverL = np.sqrt(1./sum_inv_var)/np.exp(lnLmeanMinusLmax)
+    return lnLmax + lnLmeanMinusLmax, sigmaNetOverL
@@ -88,6 +88,49 @@ class EOSConcrete:
 
         return dimensionless_lam
 
+    def make_lambda_of_m_spline(self,n_bins=400):
+        """
+        Tabulate log Lambda(m) on n_bins masses between the minimum and maximum NS mass, and cache a monotonic spline of it.
+        The spline variable is x = sqrt(m_max - m): near the maximum mass Lambda ~ sqrt(m_max-m), which is singular in m but smooth in x.
+        Used by lambda_from_m_array.  Rebuilt automatically if eos_fam changes.
+        """
+        fam = self.eos_fam
+        min_m = lalsim.SimNeutronStarFamMinimumMass(fam)/lal.MSUN_SI
+        max_m = lalsim.SimNeutronStarMaximumMass(fam)/lal.MSUN_SI
+        xgrid = np.linspace(0, np.sqrt(max_m - min_m), n_bins)
+        log_lambda = np.zeros(n_bins)
+        for indx in np.arange(n_bins):
+            try:
+                log_lambda[indx] = np.log(self.lambda_from_m((max_m - xgrid[indx]**2)*lal.MSUN_SI))
+            except:
+                # gsl interpolation can fail at the edges of the table (roundoff): drop those points
+                log_lambda[indx] = np.nan
+        xgrid, log_lambda = xgrid[np.isfinite(log_lambda)], log_lambda[np.isfinite(log_lambda)]
+        self._lambda_of_m_spline = (fam, min_m, max_m, xgrid, log_lambda, ms.interpolate(xgrid, log_lambda), ms.lin_extrapolate(xgrid, log_lambda))
+        return self._lambda_of_m_spline
+
+    def lambda_from_m_array(self, m):
+        """
+        Array version of lambda_from_m, using a cached monotonic spline of log Lambda(m) (see make_lambda_of_m_spline).
+        Accepts masses in Msun or kg (same convention as lambda_from_m).  Masses outside the stable NS range
+        [minimum mass, mMaxMsun) have no tidal deformability and are returned as -np.inf.
+        Requires a lalsim family (eos_fam); raises ValueError otherwise.
+        """
+        if self.eos_fam is None:
+            # EOS without a lalsim family (e.g. EOSReprimand): the lalsim calls below would crash the process
+            raise ValueError(" lambda_from_m_array: {} has no eos_fam ".format(self.name))
+        m_Msun = np.array(m, dtype=float)
+        m_Msun = np.where(m_Msun < 10**15, m_Msun, m_Msun/lal.MSUN_SI)
+        spline = getattr(self, '_lambda_of_m_spline', None)
+        if spline is None or not (spline[0] is self.eos_fam):
+            spline = self.make_lambda_of_m_spline()
+        fam, min_m, max_m, xgrid, log_lambda, consts, line_consts = spline
+        ok = (m_Msun >= min_m) & (m_Msun < self.mMaxMsun) & (m_Msun <= max_m)
+        x = np.sqrt(np.where(ok, max_m - m_Msun, 0))
+        lambda_out = np.exp(ms.interp_func_array(x, xgrid, log_lambda, consts, line_consts=line_consts))
+        lambda_out[~ok] = -np.inf
+        return lambda_out
+
     def estimate_baryon_mass_from_mg(self,m):
         """
         Estimate m_b = m_g + m_g^2/(R_{1.4}/km) based on https://arxiv.org/pdf/1905.03784.pdf Eq. (6)
@@ -937,14 +980,16 @@ def make_mr_lambda_lal(eos,n_bins=100):
     return mrL_dat
 
 # Rizzo
-def make_mr_lambda(eos,use_lal=False):
+#   TOV sequence engine: the central pressures are bracketed by the loops in tov_pressure_bracket, then each
+#   SimNeutronStarTOVODEIntegrate call is independent, so a sequence is evaluated on a (fork) process pool (n_procs).
+#   With adaptive=True a coarse logspace grid is refined where the curve changes quickly and around the maximum mass,
+#   instead of using npts_out fixed logspace points.  Sequences can be cached on disk (cache_dir, or $RIFT_TOV_CACHE),
+#   keyed on a caller-provided EOS parameter vector (cache_key): lalsuite EOS objects carry no parameters we can hash.
+def tov_pressure_bracket(eos):
    """
-   construct mass-radius curve from EOS    
-   DOES NOT YET WORK RELIABLY
+   Range of central pressures for the mass-radius curve: returns p_nuc, fac_min, fac_max,
+   so the curve spans p_nuc*10**fac_min (radius ~ r_cut) to p_nuc*10**fac_max (~ maximum mass)
    """
-   if use_lal:
-       make_mr_lambda_lal(eos)
-
    fam=lalsim.CreateSimNeutronStarFamily(eos)
  
    r_cut = 40   # Some EOS we consider for PE purposes will have very large radius!
@@ -1009,22 +1054,108 @@ def make_mr_lambda(eos,use_lal=False):
           fac_max-=0.01
 #       print 10**fac_max
 
-   #generate mass-radius curve
-   npts_out = 1000
-   scale=np.logspace(fac_min,fac_max,npts_out)
-   
-   mr_array=np.zeros((npts_out,3))
-   for s,i in zip(scale,range(0,len(scale))):
-#       print s
-       mr_array[i,:]=lalsim.SimNeutronStarTOVODEIntegrate(s*p_nuc, eos)
-      
+   return p_nuc, fac_min, fac_max
+
+_tov_eos = None   # EOS used by the pool workers (inherited through fork: lalsuite EOS objects do not pickle)
+def _tov_solve(p_c):
+   return lalsim.SimNeutronStarTOVODEIntegrate(p_c, _tov_eos)      # r(SI), m(SI), k2
+
+def tov_sequence(eos, p_c, n_procs=1):
+   """
+   SimNeutronStarTOVODEIntegrate for each central pressure in the array p_c (SI), on n_procs processes.
+   Returns an array (len(p_c), 3) of r(SI), m(SI), k2
+   """
+   global _tov_eos
+   _tov_eos = eos
+   if n_procs > 1 and len(p_c) > 1:
+      import multiprocessing
+      with multiprocessing.get_context('fork').Pool(n_procs) as pool:
+         answers = pool.map(_tov_solve, p_c, chunksize=max(1, len(p_c)//(4*n_procs)))
+   else:
+      answers = [_tov_solve(x) for x in p_c]
+   return np.array(answers, dtype=float).reshape(len(p_c), 3)
+
+def _mr_lambda_from_tov(mr_array):
+   """
+   r(SI), m(SI), k2 -> r(km), m(Msun), Lambda
+   """
+   mr_array = np.array(mr_array)
    mr_array[:,0]=mr_array[:,0]/10**3 
    mr_array[:,1]=mr_array[:,1]/lal.MSUN_SI
    mr_array[:,2]=2./(3*lal.G_SI)*mr_array[:,2]*(mr_array[:,0]*10**3)**5
    mr_array[:,2]=lal.G_SI*mr_array[:,2]*(1/(mr_array[:,1]*lal.MSUN_SI*lal.G_SI/lal.C_SI**2))**5
+   return mr_array
+
+def refine_tov_sequence(eos, log_scale, mr_array, p_nuc, n_procs=1, dm_tol=0.01, dr_tol=0.2, dlogLambda_tol=0.1, dlog_scale_peak=1e-4, max_passes=12):
+   """
+   Adaptive refinement of a TOV sequence in log10 central pressure: each pass bisects the intervals where the mass,
+   radius (km) or log Lambda change by more than the tolerances, and the intervals next to the maximum mass until they
+   are narrower than dlog_scale_peak.  New pressures of a pass are evaluated together (tov_sequence).
+   mr_array holds r(km), m(Msun), Lambda at p_nuc*10**log_scale (sorted).  Returns the refined log_scale, mr_array
+   """
+   for n_pass in range(max_passes):
+      M, R, logLambda = mr_array[:,1], mr_array[:,0], np.log(mr_array[:,2])
+      refine = (np.abs(np.diff(M)) > dm_tol) | (np.abs(np.diff(R)) > dr_tol) | (np.abs(np.diff(logLambda)) > dlogLambda_tol)
+      # up to the maximum mass, the stable branch (beyond it, only the interval next to the peak)
+      indx_peak = np.argmax(M)
+      refine[indx_peak:] = False
+      for indx in [indx_peak - 1, indx_peak]:
+         if 0 <= indx < len(refine) and log_scale[indx + 1] - log_scale[indx] > dlog_scale_peak:
+            refine[indx] = True
+      if not np.any(refine):
+         break
+      log_scale_new = 0.5*(log_scale[:-1] + log_scale[1:])[refine]
+      mr_new = _mr_lambda_from_tov(tov_sequence(eos, (10**log_scale_new)*p_nuc, n_procs=n_procs))
+      log_scale = np.concatenate((log_scale, log_scale_new))
+      mr_array = np.concatenate((mr_array, mr_new))
+      indx_sort = np.argsort(log_scale)
+      log_scale, mr_array = log_scale[indx_sort], mr_array[indx_sort]
+   return log_scale, mr_array
+
+def make_mr_lambda(eos,use_lal=False,n_procs=1,adaptive=False,npts_out=1000,cache_key=None,cache_dir=None):
+   """
+   construct mass-radius curve from EOS    
+   DOES NOT YET WORK RELIABLY
+
+   Returns an array with columns r(km), m(Msun), Lambda, in order of increasing central pressure.
+      n_procs   : evaluate the central pressures on this many processes
+      adaptive  : start from npts_out/10 logspace pressures and refine (refine_tov_sequence), rather than npts_out logspace pressures
+      cache_key : EOS parameter vector (any object with a stable repr, e.g. a list of floats or a dict) identifying eos.
+                  With cache_dir (default $RIFT_TOV_CACHE), sequences are saved and reused under a hash of it and the grid options
+   """
+   if use_lal:
+       return make_mr_lambda_lal(eos)
+
+   if cache_dir is None:
+       cache_dir = os.environ.get('RIFT_TOV_CACHE')
+   fname_cache = None
+   if cache_dir and not(cache_key is None):
+       import hashlib
+       if isinstance(cache_key, dict):
+           cache_key = sorted(cache_key.items())
+       key = hashlib.sha256(repr((cache_key, adaptive, npts_out)).encode()).hexdigest()
+       fname_cache = os.path.join(cache_dir, "tov_sequence_{}.npy".format(key[:32]))
+       if os.path.exists(fname_cache):
+           return np.load(fname_cache)
+
+   p_nuc, fac_min, fac_max = tov_pressure_bracket(eos)
+
+   #generate mass-radius curve
+   if adaptive:
+       log_scale = np.linspace(fac_min, fac_max, max(npts_out//10, 10))
+   else:
+       log_scale = np.linspace(fac_min, fac_max, npts_out)   # = np.log10(np.logspace(fac_min,fac_max,npts_out))
+   mr_array = _mr_lambda_from_tov(tov_sequence(eos, (10**log_scale)*p_nuc, n_procs=n_procs))
+   if adaptive:
+       log_scale, mr_array = refine_tov_sequence(eos, log_scale, mr_array, p_nuc, n_procs=n_procs)
 
 #   print mr_array[:,1]
 
+   if fname_cache:
+       os.makedirs(cache_dir, exist_ok=True)
+       fname_tmp = fname_cache + ".{}.tmp.npy".format(os.getpid())
+       np.save(fname_tmp, mr_array)
+       os.replace(fname_tmp, fname_cache)
    return mr_array
 
 
@@ -1085,6 +1216,8 @@ class EOSSequenceLandry:
         self.oned_order_values=None
         self.oned_order_indx_original = None
         self.verbose=verbose
+        self._packed = None   # packed TOV tables (see pack_tov), built on first use
+        self._order_sort = None
         with h5py.File(self.fname, 'r') as f:
             names = list(f['ns'].keys())
             names = natsorted(names)  # sort them sanely
@@ -1114,11 +1247,9 @@ class EOSSequenceLandry:
                     self.oned_order_indx_original = np.arange(len(self.eos_names))
                     vals = np.zeros(len(self.eos_names))
                     if self.oned_order_name =='Lambda':
-                        for indx in np.arange(len(self.eos_names)):
-                            vals[indx] =self.lambda_of_m_indx(self.oned_order_mass,indx)
+                        vals = self.lambda_of_m(self.oned_order_mass, self.oned_order_indx_original)
                     if self.oned_order_name =='R':
-                        for indx in np.arange(len(self.eos_names)):
-                            vals[indx] =self.R_of_m_indx(self.oned_order_mass,indx)
+                        vals = self.R_of_m(self.oned_order_mass, self.oned_order_indx_original)
 
                     # resort 'names' field with new ordering
                     # is it actually important to do the sorting?  NO, code should work with original lexographic order, since we only use nearest neighbors!
@@ -1131,14 +1262,80 @@ class EOSSequenceLandry:
                         self.eos_names = self.eos_names[indx_sorted]  
                         self.oned_order_values = vals[indx_sorted]
                         self.oned_order_indx_original =  self.oned_order_indx_original[indx_sorted]
+                        self._packed = None  # indexed by position in eos_names
 
             if load_eos:
                 self.eos_tables = f['eos']
         return None
 
+    def pack_tov(self):
+        """
+        Packed, preprocessed TOV tables for all EOS, in the order of eos_names: one ragged array with offsets
+            offsets[i]:offsets[i+1] : rows of EOS i in M, logLambda, logR (masses sorted)
+            mmax[i]                 : maximum mass of EOS i
+        plus a search key (EOS position*span + mass) that is sorted across all EOS, so one searchsorted locates
+        every (m, indx) query at once.  Built once, then reused by lambda_of_m, R_of_m, mmax_of_indx.
+        """
+        if self.eos_ns_tov is None:
+            raise Exception(" Did not load TOV results ")
+        if self._packed is None:
+            M_list, logLambda_list, logR_list = [], [], []
+            for name in self.eos_names:
+                dat = np.array(self.eos_ns_tov[name])
+                indx_sort = np.argsort(dat["M"])
+                M_list.append(dat["M"][indx_sort])
+                logLambda_list.append(np.log(dat["Lambda"][indx_sort]))
+                logR_list.append(np.log(dat["R"][indx_sort]))
+            lengths = np.array([len(M) for M in M_list])
+            offsets = np.concatenate(([0], np.cumsum(lengths)))
+            M = np.concatenate(M_list)
+            m_lo = np.min(M)
+            span = np.max(M) - m_lo + 1.
+            eos_of_row = np.repeat(np.arange(len(M_list)), lengths)
+            self._packed = {'offsets': offsets, 'M': M, 'logLambda': np.concatenate(logLambda_list), 'logR': np.concatenate(logR_list),
+                            'mmax': np.array([M_here[-1] for M_here in M_list]), 'm_lo': m_lo, 'span': span,
+                            'key': eos_of_row*span + (M - m_lo)}
+        return self._packed
+
+    def _interp_packed(self, m_Msun, indx, field):
+        """
+        exp of the linear interpolation of log field versus m, for EOS indx: same as np.interp on each table (constant beyond the ends).
+        m_Msun and indx are broadcast against each other
+        """
+        packed = self.pack_tov()
+        m_Msun, indx = np.broadcast_arrays(np.asarray(m_Msun, dtype=float), np.asarray(indx, dtype=int))
+        lo = packed['offsets'][indx]
+        hi = packed['offsets'][indx + 1] - 1
+        M = packed['M']
+        # last node at or below m, limited to an interval of this EOS
+        j = np.searchsorted(packed['key'], indx*packed['span'] + (m_Msun - packed['m_lo']), side='right') - 1
+        j = np.clip(j, lo, np.maximum(hi - 1, lo))
+        j_next = np.minimum(j + 1, hi)
+        dM = M[j_next] - M[j]
+        t = np.where(dM > 0, (m_Msun - M[j])/np.where(dM > 0, dM, 1), 0.)
+        t = np.clip(t, 0, 1)
+        y = packed[field]
+        val = np.exp(y[j] + t*(y[j_next] - y[j]))
+        if val.ndim == 0:
+            return float(val)
+        return val
+
+    def lambda_of_m(self, m_Msun, indx):
+        """
+        lambda(m) for arrays of masses m_Msun and EOS indices indx (broadcast against each other), from the packed tables.
+        Same as lambda_of_m_indx, element by element
+        """
+        return self._interp_packed(m_Msun, indx, 'logLambda')
+
+    def R_of_m(self, m_Msun, indx):
+        """
+        R(m) for arrays of masses m_Msun and EOS indices indx (broadcast against each other), from the packed tables.
+        Same as R_of_m_indx, element by element
+        """
+        return self._interp_packed(m_Msun, indx, 'logR')
+
     def m_max_of_indx(self,indx):
-        name = self.eos_names[indx]
-        return np.max(self.eos_ns_tov[name]['M'])
+        return self.mmax_of_indx(indx)
 
     def lambda_of_m_indx(self,m_Msun,indx):
         """
@@ -1146,19 +1343,11 @@ class EOSSequenceLandry:
         
         Generally we assume the value is UNIQUE and associated with a single stable phase
         """
-        if self.eos_ns_tov is None:
-            raise Exception(" Did not load TOV results ")
-        name = self.eos_names[indx]
         if self.verbose:
-            print(" Loading from {}".format(name))
-        dat = np.array(self.eos_ns_tov[name])
-        # Sort masses
-        indx_sort = np.argsort(dat["M"])
+            print(" Loading from {}".format(self.eos_names[indx]))
         # Interpolate versus m, ASSUME single-valued / no phase transition ! 
         # Interpolate versus *log lambda*, so it is smoother and more stable
-        valLambda = np.log(dat["Lambda"][indx_sort])
-        valM = dat["M"][indx_sort]
-        return np.exp(np.interp(m_Msun, valM, valLambda))
+        return self.lambda_of_m(m_Msun, indx)
 
     def R_of_m_indx(self,m_Msun,indx):
         """
@@ -1166,40 +1355,44 @@ class EOSSequenceLandry:
         
         Generally we assume the value is UNIQUE and associated with a single stable phase; should FIX?
         """
-        if self.eos_ns_tov is None:
-            raise Exception(" Did not load TOV results ")
-        name = self.eos_names[indx]
         if self.verbose:
-            print(" Loading from {}".format(name))
-        dat = np.array(self.eos_ns_tov[name])
-        # Sort masses
-        indx_sort = np.argsort(dat["M"])
-        # Interpolate versus m, ASSUME single-valued / no phase transition ! 
-        # Interpolate versus *log lambda*, so it is smoother and more stable
-        valR = np.log(dat["R"][indx_sort])
-        valM = dat["M"][indx_sort]
-        return np.exp(np.interp(m_Msun, valM, valR))
+            print(" Loading from {}".format(self.eos_names[indx]))
+        return self.R_of_m(m_Msun, indx)
 
     def mmax_of_indx(self,indx):
-        if self.eos_ns_tov is None:
-            raise Exception(" Did not load TOV results ")
-        name = self.eos_names[indx]
-        if self.verbose:
-            print(" Loading from {}".format(name))
-        
-        return np.max(self.eos_ns_tov[name]['M'])
+        """
+        Maximum mass of EOS indx (scalar or array)
+        """
+        val = self.pack_tov()['mmax'][indx]
+        if np.ndim(val) == 0:
+            return float(val)
+        return val
 
     def lookup_closest(self,order_val):
         """
-        Given a proposed ordering statistic value, provides the *index* of the closest value.  Assumes *scalar* input
-        Should be using the fact that this is ordered ... but we are not
+        Given a proposed ordering statistic value (scalar or array), provides the *index* of the closest value, as argmin |order_val - oned_order_values|
+        (ties go to the lower index).  Uses a sorted copy of the ordering statistic, so each lookup is a binary search.
         """
         if self.eos_ns_tov is None:
             raise Exception(" Did not load TOV results ")
         if self.oned_order_values is None:
             raise Exception(" Did not generate ordering statistic ")
-        
-        return np.argmin( np.abs(order_val - self.oned_order_values))
+        if self._order_sort is None or len(self._order_sort) != len(self.oned_order_values):
+            self._order_sort = np.argsort(self.oned_order_values, kind='stable')
+        vals_sorted = self.oned_order_values[self._order_sort]
+        x = np.asarray(order_val, dtype=float)
+        pos = np.searchsorted(vals_sorted, x, side='left')
+        right = np.minimum(pos, len(vals_sorted) - 1)
+        # nearest value below: take the first (lowest index) entry with that value
+        left = np.searchsorted(vals_sorted, vals_sorted[np.maximum(pos - 1, 0)], side='left')
+        d_left = np.abs(x - vals_sorted[left])
+        d_right = np.abs(x - vals_sorted[right])
+        indx_left = self._order_sort[left]
+        indx_right = self._order_sort[right]
+        indx = np.where(d_left < d_right, indx_left, np.where(d_right < d_left, indx_right, np.minimum(indx_left, indx_right)))
+        if indx.ndim == 0:
+            return int(indx)
+        return indx
 
 
 ####
@@ -99,3 +99,22 @@ def interp_func(x,x_table,y_table,consts,line_consts=None, verbose=False):
 
 
 
+
+
+def interp_func_array(x,x_table,y_table,consts,line_consts=None,fill_value=np.nan):
+    """
+    Array version of interp_func: evaluates the spline at every element of x at once.
+    Points outside the table use line_consts (if provided) or are set to fill_value.
+    """
+    x=np.asarray(x,dtype=float)
+    indx=np.clip(np.searchsorted(x_table,x,side='right')-1,0,len(x_table)-2)
+    dx=x-x_table[indx]
+    ans=y_table[indx]+consts[indx,0]*dx+consts[indx,1]*dx**2+consts[indx,2]*dx**3
+    below = x<x_table[0]
+    above = x>x_table[-1]
+    if line_consts is not None:
+       ans=np.where(below,line_consts[0,0]*x+line_consts[0,1],ans)
+       ans=np.where(above,line_consts[1,0]*x+line_consts[1,1],ans)
+    else:
+       ans=np.where(below|above,fill_value,ans)
+    return ans
@@ -0,0 +1,25 @@
+#! /usr/bin/env python
+#
+# convert_ile_composite.py
+#
+#   Convert ILE output / composite files (e.g., all.net) between the text format and the binary format (.npy, named columns)
+#   read by CIP and util_CleanILE.py.  Direction is set by the file names.
+#
+#   EXAMPLES
+#      convert_ile_composite.py --input-file all.net --output-file all.net.npy
+#      convert_ile_composite.py --input-file all.net.npy --output-file all.net
+
+
+import argparse
+import numpy as np
+import RIFT.misc.ile_composite as ile_composite
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--input-file", help="Text or binary (.npy) composite file")
+parser.add_argument("--output-file", help="Text or binary (.npy) composite file")
+parser.add_argument("--eccentricity", action='store_true', help="14-column files hold eccentricity, not distance")
+opts = parser.parse_args()
+
+dat = ile_composite.load_composite(opts.input_file, mmap=False)
+print(" Loaded ", opts.input_file, dat.shape)
+ile_composite.save_composite(opts.output_file, dat, eccentricity=opts.eccentricity)
@@ -3,6 +3,11 @@
 #
 #  Reads FILE (not stdin). Consolidates ILE entries for the same physical system.
 #  Compare to: util_MassGriCoalesce.py
+#
+#  Files are read in blocks (optionally in parallel, --n-procs).  Each block is reduced with a vectorized group-by on the
+#  rounded intrinsic columns, and merged into the running composite: the variance-minimizing combination is associative,
+#  so memory is bounded by the number of distinct intrinsic points, not the number of files.
+#  --merge-into FILE.composite merges new ILE output into an existing composite, without re-reading the old .dat files.
 
 
 import sys
@@ -13,79 +18,153 @@ from ligo.lw import lsctables, table, utils
 
 import numpy as np
 import RIFT.misc.weight_simulations as weight_simulations
+import RIFT.misc.ile_composite as ile_composite
 
-import fileinput
+import multiprocessing
 #import StringIO
 
-data_at_intrinsic = {}
-
 my_digits=5  # safety for high-SNR BNS
 
-tides_on = False
-distance_on = False  
-col_intrinsic = 9
-
 import argparse
 parser = argparse.ArgumentParser(usage="util_CleanILE.py fname1.dat fname2.dat ... ")
-parser.add_argument("fname",action='append',nargs='+')
+parser.add_argument("fname",action='append',nargs='*')
 parser.add_argument("--eccentricity", action="store_true")
+parser.add_argument("--n-procs", type=int, default=1, help="Number of processes used to read input files")
+parser.add_argument("--block-size", type=int, default=500, help="Number of files read and consolidated at a time")
+parser.add_argument("--output-file", default=None, help="Write the composite to this file, instead of stdout. Binary (named columns, see RIFT.misc.ile_composite) if the name ends in .npy")
+parser.add_argument("--merge-into", default=None, help="Existing composite file. New ILE output is merged into it; the result is written to --output-file, or replaces this file if --output-file is not given")
 opts = parser.parse_args()
 
-#print opts.fname
 from pathlib import Path
-for fname in opts.fname[0]: #sys.argv[1:]:
+
+def read_ile_file(fname):
+    """
+    Read one ILE output file (or composite).  Returns a 2d array, or None if the file is missing/empty
+    """
     fname  = Path(fname).resolve()
     if not( os.path.exists(fname)):  # skip symbolic links that don't resolve : important for .composite files
-        continue
+        return None
     if os.stat(fname).st_size==0:  # skip files of zero length
-        continue
+        return None
     sys.stderr.write(str(fname)+"\n")
-#    data = np.loadtxt(fname)  # this will FAIL if we have a heterogeneous data source!  BE CAREFUL
-    data = np.genfromtxt(fname,invalid_raise=False)  #  Protect against inhomogeneous data
-    if len(data.shape) ==1:
-        data = np.array([data]) # force proper treatment for single-line file
-    for line in data:
-      try:
-        line = np.around(line, decimals=my_digits)
-        lambda1=lambda2=0
-        if opts.eccentricity:
-            indx, m1,m2, s1x,s1y,s1z,s2x,s2y,s2z,ecc, lnL, sigmaOverL, ntot, neff = line
-            col_intrinsic = 10
-        elif len(line) == 13 and (not tides_on) and (not distance_on):  # strip lines with the wrong length
-            indx, m1,m2, s1x,s1y,s1z,s2x,s2y,s2z,lnL, sigmaOverL, ntot, neff = line
-        elif  len(line) == 14:
-            distance_on=True
-            col_intrinsic=10
-            indx, m1,m2, s1x,s1y,s1z,s2x,s2y,s2z,dist, lnL, sigmaOverL, ntot, neff = line
-        elif len(line)==15:
-            tides_on  = True
-            col_intrinsic =11
-            indx, m1,m2, s1x,s1y,s1z,s2x,s2y,s2z, lambda1,lambda2,lnL, sigmaOverL, ntot, neff = line
-        if sigmaOverL>0.9:
-            continue    # do not allow poorly-resolved cases (e.g., dominated by one point). These are often useless
-        if tuple(line[1:col_intrinsic]) in data_at_intrinsic:
-#            print " repeated occurrence ", line[1:9]
-            data_at_intrinsic[tuple(line[1:col_intrinsic])].append(line[col_intrinsic:])
+    if ile_composite.is_binary(fname):
+        return ile_composite.load_composite(fname, mmap=False)
+    try:
+        data = np.loadtxt(fname, ndmin=2)
+    except ValueError:
+        data = np.genfromtxt(fname,invalid_raise=False)  #  Protect against inhomogeneous data
+        if len(data.shape) ==1:
+            data = np.array([data]) # force proper treatment for single-line file
+    if data.size == 0:
+        return None
+    return data
+
+def col_intrinsic_for(n_cols):
+    """
+    Index of the lnL column (the intrinsic parameters are columns 1 ... col_intrinsic-1), given the line length
+    """
+    if opts.eccentricity:
+        return 10 if n_cols == 14 else None   # indx, m1,m2, s1x,s1y,s1z,s2x,s2y,s2z,ecc, lnL, sigmaOverL, ntot, neff
+    return {13: 9,        # indx, m1,m2, s1x,s1y,s1z,s2x,s2y,s2z,lnL, sigmaOverL, ntot, neff
+            14: 10,       # indx, m1,m2, s1x,s1y,s1z,s2x,s2y,s2z,dist, lnL, sigmaOverL, ntot, neff
+            15: 11}.get(n_cols)   # indx, m1,m2, s1x,s1y,s1z,s2x,s2y,s2z, lambda1,lambda2,lnL, sigmaOverL, ntot, neff
+
+def consolidate(keys, lnL, sigmaOverL, ntot):
+    """
+    Group rows on identical (rounded) intrinsic parameters, in order of first appearance, and combine each group
+    """
+    keys_unique, indx_first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.ravel()
+    # relabel groups by first appearance, so output order does not depend on the sort
+    order = np.argsort(indx_first)
+    rank = np.empty(len(order), dtype=int)
+    rank[order] = np.arange(len(order))
+    group = rank[inverse]
+    lnL_net, sigma_net = weight_simulations.AverageSimulationLogLikelihoodGrouped(group, len(order), lnL, sigmaOverL)
+    ntot_net = np.bincount(group, weights=ntot, minlength=len(order))
+    return keys_unique[order], lnL_net, sigma_net, ntot_net
+
+# Running composite, one layout per line length: n_cols -> [keys, lnL, sigmaOverL, ntot]
+composite = {}
+
+def merge_rows(data, n_cols, is_composite=False):
+    col_intrinsic = col_intrinsic_for(n_cols)
+    if col_intrinsic is None:
+        return
+    if not is_composite:
+        data = np.around(data, decimals=my_digits)
+        data = data[~(data[:,col_intrinsic+1]>0.9)]   # do not allow poorly-resolved cases (e.g., dominated by one point). These are often useless
+    data = data[np.all(np.isfinite(data[:,1:col_intrinsic]),axis=1)]
+    if len(data) == 0:
+        return
+    keys, lnL, sigmaOverL, ntot = data[:,1:col_intrinsic], data[:,col_intrinsic], data[:,col_intrinsic+1], data[:,col_intrinsic+2]
+    if n_cols in composite:
+        keys_old, lnL_old, sigma_old, ntot_old = composite[n_cols]
+        keys = np.concatenate((keys_old, keys))
+        lnL = np.concatenate((lnL_old, lnL))
+        sigmaOverL = np.concatenate((sigma_old, sigmaOverL))
+        ntot = np.concatenate((ntot_old, ntot))
+    composite[n_cols] = consolidate(keys, lnL, sigmaOverL, ntot)
+
+def merge_block(block, is_composite=False):
+    by_cols = {}
+    for data in block:
+        if data is None:
+            continue
+        if not(data.shape[1] in by_cols):
+            by_cols[data.shape[1]] = []
+        by_cols[data.shape[1]].append(data)
+    for n_cols in by_cols:
+        merge_rows(np.concatenate(by_cols[n_cols]), n_cols, is_composite=is_composite)
+
+def main():
+    if opts.merge_into:
+        merge_block([read_ile_file(opts.merge_into)], is_composite=True)
+
+    fnames = opts.fname[0] if opts.fname else []
+    pool = None
+    if opts.n_procs > 1:
+        pool = multiprocessing.Pool(opts.n_procs)
+    for indx_start in np.arange(0, len(fnames), opts.block_size):
+        fnames_block = fnames[indx_start:indx_start+opts.block_size]
+        if pool:
+            block = pool.map(read_ile_file, fnames_block)
         else:
-#            print " new key ", line[1:9]
-            data_at_intrinsic[tuple(line[1:col_intrinsic])] = [line[col_intrinsic:]]
-      except:
-          continue
+            block = [read_ile_file(fname) for fname in fnames_block]
+        merge_block(block)
+    if pool:
+        pool.close()
+        pool.join()
 
-for key in data_at_intrinsic:
-    lnL, sigmaOverL, ntot,neff =   np.transpose(data_at_intrinsic[key])
-    lnLmax = np.max(lnL)
-    sigma = sigmaOverL*np.exp(lnL-lnLmax)  # remove overall Lmax factor, which factors out from the weights constructed from \sigma
-    wts = weight_simulations.AverageSimulationWeights(None, None,sigma)   
-    lnLmeanMinusLmax = np.log(np.sum(np.exp(lnL - lnLmax)*wts))
-    sigmaNetOverL = (np.sqrt(1./np.sum(1./sigma/sigma)))/np.exp(lnLmeanMinusLmax)
+    # Output layout: one format per file.  Inputs with different layouts (e.g., with and without tides) cannot be combined
+    if len(composite) > 1:
+        print(" util_CleanILE: inputs mix line layouts ", dict((n_cols, len(composite[n_cols][1])) for n_cols in composite),
+              " (line length: number of consolidated points); consolidate each layout separately ", file=sys.stderr)
+        sys.exit(1)
+    n_cols_out = list(composite)[0] if composite else None
 
+    fname_out = opts.output_file or opts.merge_into
+    fout = sys.stdout
+    if fname_out:
+        fout = open(fname_out + ".tmp", 'w' if not ile_composite.is_binary(fname_out) else 'wb')
+    if fname_out and ile_composite.is_binary(fname_out):
+        if not (n_cols_out is None):
+            keys, lnL, sigma_net, ntot = composite[n_cols_out]
+            n_rows = len(lnL)
+            dat_out = np.column_stack((-np.ones(n_rows), keys, lnL, sigma_net, ntot, -np.ones(n_rows)))
+            ile_composite.save_composite(fout, dat_out, binary=True, eccentricity=opts.eccentricity)
+    elif not (n_cols_out is None):
+        keys, lnL, sigma_net, ntot = composite[n_cols_out]
+        n_rows = len(lnL)
+        # write incrementally
+        for indx_start in np.arange(0, n_rows, 10000):
+            sl = slice(indx_start, indx_start+10000)
+            n_here = len(lnL[sl])
+            dat_out = np.column_stack((-np.ones(n_here), keys[sl], lnL[sl], sigma_net[sl], ntot[sl], -np.ones(n_here)))
+            np.savetxt(fout, dat_out, fmt='%.15g')
+    if fname_out:
+        fout.close()
+        os.replace(fname_out + ".tmp", fname_out)
 
-    if opts.eccentricity:
-        print(-1,  key[0],key[1], key[2], key[3],key[4], key[5],key[6], key[7], key[8], lnLmeanMinusLmax+lnLmax, sigmaNetOverL, np.sum(ntot), -1)
-    elif tides_on:
-        print(-1,  key[0],key[1], key[2], key[3],key[4], key[5],key[6], key[7], key[8],key[9], lnLmeanMinusLmax+lnLmax, sigmaNetOverL, np.sum(ntot), -1)
-    elif distance_on:
-        print(-1,  key[0],key[1], key[2], key[3],key[4], key[5],key[6], key[7], key[8], lnLmeanMinusLmax+lnLmax, sigmaNetOverL, np.sum(ntot), -1)
-    else:
-        print(-1,  key[0],key[1], key[2], key[3],key[4], key[5],key[6], key[7], lnLmeanMinusLmax+lnLmax, sigmaNetOverL, np.sum(ntot), -1)
+if __name__ == '__main__':
+    main()
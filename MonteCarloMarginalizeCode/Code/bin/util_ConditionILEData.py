@@ -0,0 +1,45 @@
+#! /usr/bin/env python
+#
+# util_ConditionILEData.py
+#
+#   One-time data conditioning for an event: read frames and PSD XML files, FFT, resample and rescale the PSDs exactly as
+#   integrate_likelihood_extrinsic_batchmode does, and save everything to one binary bundle (RIFT.misc.data_bundle).
+#   ILE jobs given --data-bundle load the bundle instead of reading frames and XML.
+#   The options have the same meaning as the ILE's; each ILE job must use the same srate, windows and fmin-ifo, and either
+#   the same --data-start-time/--data-end-time or an automatic segment contained in this one.
+#
+#   EXAMPLES
+#      util_ConditionILEData.py --cache-file local.cache --channel-name H1=GDS-CALIB_STRAIN --psd-file H1=H1-psd.xml.gz \
+#          --data-start-time 1000000000 --data-end-time 1000000008 --srate 4096 --window-shape 0.01 --output-file data_bundle.bin
+
+
+import argparse
+import RIFT.misc.data_bundle as data_bundle
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--cache-file", help="LIGO cache file containing all data needed.")
+parser.add_argument("--channel-name", action="append", help="instrument=channel-name, e.g. H1=FAKE-STRAIN. Can be given multiple times for different instruments.")
+parser.add_argument("--psd-file", action="append", help="instrument=psd-file, e.g. H1=H1_PSD.xml.gz. Can be given multiple times for different instruments.")
+parser.add_argument("--fmin-ifo", action="append", help="instrument=freq-cutoff: PSD is zeroed below the cutoff")
+parser.add_argument("--data-start-time", type=float, required=True, help="GPS start time of data segment")
+parser.add_argument("--data-end-time", type=float, required=True, help="GPS end time of data segment")
+parser.add_argument("--srate", default=16384, type=int, help="Sampling rate")
+parser.add_argument("--window-shape", type=float, default=0, help="Shape of Tukey window to apply to data")
+parser.add_argument("--psd-window-shape", type=float, default=0, help="Shape of Tukey window that *was* applied to the PSD being passed")
+parser.add_argument("--output-file", default="data_bundle.bin")
+opts = parser.parse_args()
+
+channel_dict = dict(map(lambda c: c.split("="), opts.channel_name))
+psd_file_dict = dict(map(lambda c: c.split("="), opts.psd_file))
+fmin_ifo = {}
+if opts.fmin_ifo:
+    fmin_ifo = dict((inst, float(freq_str)) for inst, freq_str in map(lambda c: c.split("="), opts.fmin_ifo))
+deltaT = 1./opts.srate
+
+data_dict, psd_dict, fmax = data_bundle.condition_data(opts.cache_file, channel_dict, psd_file_dict, opts.data_start_time, opts.data_end_time,
+        deltaT=deltaT, window_shape=opts.window_shape, psd_window_shape=opts.psd_window_shape, fmin_ifo=fmin_ifo)
+metadata = {'cache_file': opts.cache_file, 'channels': channel_dict, 'psd_files': psd_file_dict, 'fmin_ifo': fmin_ifo,
+            'start_time': opts.data_start_time, 'end_time': opts.data_end_time, 'deltaT': deltaT,
+            'window_shape': opts.window_shape, 'psd_window_shape': opts.psd_window_shape}
+data_bundle.write_data_bundle(opts.output_file, data_dict, psd_dict, fmax, metadata)
+print(" Wrote ", opts.output_file, " instruments ", list(data_dict.keys()), " fmax ", fmax)
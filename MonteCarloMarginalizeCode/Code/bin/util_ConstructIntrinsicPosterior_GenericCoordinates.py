@@ -16,6 +16,7 @@
 
 
 import RIFT.interpolators.BayesianLeastSquares as BayesianLeastSquares
+import RIFT.interpolators.fit_cache as fit_cache
 
 import argparse
 import sys
@@ -25,6 +26,7 @@ import scipy
 import scipy.stats
 import scipy.special
 import RIFT.lalsimutils as lalsimutils
+import RIFT.misc.ile_composite as ile_composite
 import lalsimulation as lalsim
 import lalframe
 import lal
@@ -217,7 +219,7 @@ def extract_combination_from_LI(samples_LI, p):
 
 
 parser = argparse.ArgumentParser()
-parser.add_argument("--fname",help="filename of *.dat file [standard ILE output]")
+parser.add_argument("--fname",help="filename of *.dat file [standard ILE output]. Binary composites (*.npy, see convert_ile_composite.py) are memory-mapped")
 parser.add_argument("--input-tides",action='store_true',help="Use input format with tidal fields included.")
 parser.add_argument("--input-eos-index",action='store_true',help="Use input format with eos index fields included")
 parser.add_argument("--input-distance",action='store_true',help="Use input format with distance fields (but not tidal fields?) enabled.")
@@ -307,6 +309,11 @@ parser.add_argument("--fit-load-quadratic-path",default="GW190814/annealing_mc_s
 parser.add_argument("--pool-size",default=3,type=int,help="Integer. Number of GPs to use (result is averaged)")
 parser.add_argument("--fit-load-gp",default=None,type=str,help="Filename of GP fit to load. Overrides fitting process, but user MUST correctly specify coordinate system to interpret the fit with.  Does not override loading and converting the data.")
 parser.add_argument("--fit-save-gp",default=None,type=str,help="Filename of GP fit to save. ")
+parser.add_argument("--fit-cache",default=None,type=str,help="Fit cache file, for any --fit-method.  If it holds a fit made from the same input data and fit options, use it and skip fitting; otherwise fit and write it.  Lets exploded CIP workers reuse the fit of the first job.")
+parser.add_argument("--fit-rf-save",default=None,type=str,help="rf: filename (joblib) to save the fit to. ")
+parser.add_argument("--fit-rf-load",default=None,type=str,help="rf: if this file exists, reuse the fit in it instead of fitting (e.g., saved with --fit-rf-save by another CIP worker in the same iteration). User MUST use the same coordinate system.")
+parser.add_argument("--fit-rf-warm-start",default=None,type=str,help="rf: if this file exists, update the fit in it (e.g., from the previous iteration) with trees trained on the new points only, instead of refitting")
+parser.add_argument("--fit-rf-n-update-trees",default=20,type=int,help="rf: number of trees replaced in a warm-start update (the oldest are dropped)")
 parser.add_argument("--fit-order",type=int,default=2,help="Fit order (polynomial case: degree)")
 parser.add_argument("--fit-uncertainty-added",default=False, action='store_true', help="Reported likelihood is lnL+(fit error). Use for placement and use of systematic errors.")
 parser.add_argument("--no-plots",action='store_true')
@@ -327,6 +334,7 @@ parser.add_argument("--internal-temper-log",action='store_true',help="integrator
 parser.add_argument("--internal-correlate-parameters",default=None,type=str,help="comman-separated string indicating parameters that should be sampled allowing for correlations. Must be sampling parameters. Only implemented for gmm.  If string is 'all', correlate *all* parameters")
 parser.add_argument("--internal-n-comp",default=1,type=int,help="number of components to use for GMM sampling. Default is 1, because we expect a unimodal posterior in well-adapted coordinates.  If you have crappy coordinates, use more")
 parser.add_argument("--internal-gmm-memory-chisquared-factor",default=None,type=float,help="Multiple of the number of degrees of freedom to save. 5 is a part in 10^6, 4 is 10^{-4}, and None keeps all up to lnL_offset.  Note that low-weight points can contribute notably to n_eff, and it can be dangerous to assume a simple chisquared likelihood!  Provided in case we need very long runs")
+parser.add_argument("--internal-gmm-memory-max-samples",default=None,type=int,help="GMM sampler: retain at most this many samples (highest lnL) while integrating, so the memory used to store samples is bounded and known in advance.  PURELY FOR MEMORY MANAGEMENT")
 parser.add_argument("--use-eccentricity", action="store_true")
 parser.add_argument("--tripwire-fraction",default=0.05,type=float,help="Fraction of nmax of iterations after which n_eff needs to be greater than 1+epsilon for a small number epsilon")
 
@@ -1237,16 +1245,35 @@ def fit_nn(x,y,y_errors=None,fname_export='nn_fit',adaptive=True):
 
 
 
-def fit_rf(x,y,y_errors=None,fname_export='nn_fit'):
-#    from sklearn.ensemble import RandomForestRegressor
-    from sklearn.ensemble import ExtraTreesRegressor
+def fit_rf(x,y,y_errors=None,fname_export='nn_fit',fname_load=None,fname_warm_start=None,fname_save=None,n_update_trees=20,y_offset=0):
+    """
+    ExtraTrees fit (RIFT.interpolators.forest_fit).
+      fname_load       : if this file exists, reuse the fit in it (e.g., written by an earlier CIP worker in this iteration)
+      fname_warm_start : fit from a previous iteration: add n_update_trees trees trained on the new points only, dropping the oldest
+      fname_save       : save the fit
+    """
+    import os
+    from RIFT.interpolators.forest_fit import IncrementalForestFit
     # Instantiate model. Usually not that many structures to find, don't overcomplicate
     #   - should scale like number of samples
-    rf = ExtraTreesRegressor(n_estimators=100, verbose=True,n_jobs=-1) # no more than 5% of samples in a leaf
-    if y_errors is None:
-        rf.fit(x,y)
+    sample_weight = None
+    if not(y_errors is None):
+        sample_weight = 1./y_errors**2
+    if fname_load and os.path.exists(fname_load):
+        print(" RF: reusing fit ", fname_load)
+        rf = IncrementalForestFit.load(fname_load)
+    elif fname_warm_start and os.path.exists(fname_warm_start):
+        rf = IncrementalForestFit.load(fname_warm_start)
+        rf.n_update = n_update_trees
+        n_new = rf.update(x,y,sample_weight=sample_weight,y_offset=y_offset)
+        print(" RF: warm start from ", fname_warm_start, " with ", n_new, " new points ")
     else:
-        rf.fit(x,y,sample_weight=1./y_errors**2)
+        rf = IncrementalForestFit(n_estimators=100, n_update=n_update_trees, verbose=True)
+        rf.fit(x,y,sample_weight=sample_weight,y_offset=y_offset)
+    if fname_save:
+        rf.save(fname_save)
+    # predictions relative to the offset used in this job
+    delta_offset = rf.y_offset_ - y_offset
 
     ### reject points with infinities : problems for inputs
     def fn_return(x_in,rf=rf):
@@ -1257,12 +1284,12 @@ def fit_rf(x,y,y_errors=None,fname_export='nn_fit'):
         #    ... this *should* never happen due to bounds constraints, but ...
         indx_ok_size = np.all( np.logical_not(np.greater(np.abs(x_in),1e37)), axis=-1)
         indx_ok = np.logical_and(indx_ok, indx_ok_size)
-        f_out[indx_ok] = rf.predict(x_in[indx_ok])
+        f_out[indx_ok] = rf.predict(x_in[indx_ok]) + delta_offset
         return f_out
 #    fn_return = lambda x_in: rf.predict(x_in) 
 
     print( " Demonstrating RF")   # debugging
-    residuals = rf.predict(x)-y
+    residuals = rf.predict(x)+delta_offset-y
     print( "    std ", np.std(residuals), np.max(y), np.max(fn_return(x)))
     return fn_return
 
@@ -1465,15 +1492,9 @@ elif opts.use_eccentricity:
 if opts.input_distance:
     print(" Distance input")
     col_lnL +=1
-dat_orig = dat = np.loadtxt(opts.fname)
-dat_orig = dat[dat[:,col_lnL].argsort()] # sort  http://stackoverflow.com/questions/2828059/sorting-arrays-in-numpy-by-column
+dat = ile_composite.load_composite(opts.fname)  # memory-mapped if binary
 print(" Original data size = ", len(dat), dat.shape)
 
-# Rescale lnL data, if requested.  Note requires user have sensible understanding of zero points of likelihood, etc  Appl
-if opts.lnL_downscale_factor:
-    dat[:,col_lnL] *= opts.lnL_downscale_factor
-    dat_orig[:,col_lnL] *= opts.lnL_downscale_factor
-
  ###
  ### Convert data.  Use lalsimutils for flexibility
  ###
@@ -1513,131 +1534,106 @@ if opts.mc_range:
     if opts.source_redshift>0:
         mc_cut_range =np.array(mc_cut_range)*(1+opts.source_redshift)  # prevent stupidity in grid selection
 print(" Stripping samples outside of ", mc_cut_range, " in mc")
-P= lalsimutils.ChooseWaveformParams()
-P_list_in = []
-for line in dat:
+# Downselect with vectorized masks, so only surviving rows are read into memory
+lnL_col = dat[:,col_lnL]
+# Rescale lnL data, if requested.  Note requires user have sensible understanding of zero points of likelihood, etc  Appl
+if opts.lnL_downscale_factor:
+    lnL_col = lnL_col*opts.lnL_downscale_factor
+keep = np.ones(len(dat), dtype=bool)
+if not opts.use_precessing:
   # Skip precessing binaries unless explicitly requested not to!
-  if not opts.use_precessing and (line[3]**2 + line[4]**2 + line[6]**2 + line[7]**2)>0.01:
-      print(" Skipping precessing binaries ")
-      continue
-  if line[1]+line[2] > opts.M_max_cut:
-      if opts.verbose:
-          print(" Skipping ", line, " as too massive, with mass ", line[1]+line[2])
-      continue
-  if line[col_lnL+1] > opts.sigma_cut:
-#      if opts.verbose:
-#          print(" Skipping as large error ", line)
-      continue
-  if not (opts.lnL_cut is None):
-    if line[col_lnL] < opts.lnL_cut:
-      continue  # strip worthless points.  DANGEROUS
-  mc_here = lalsimutils.mchirp(line[1],line[2])
-  if  (not opts.no_downselect_grid) and (mc_here < mc_cut_range[0] or mc_here > mc_cut_range[1]):
-      if False and opts.verbose:
-          print("Stripping because sample outside of target  mc range ", line)
-      continue
-  if line[col_lnL] < opts.lnL_peak_insane_cut:
-    P.fref = opts.fref  # IMPORTANT if you are using a quantity that depends on J
-    P.fmin = opts.fmin
-    P.m1 = line[1]*lal.MSUN_SI
-    P.m2 = line[2]*lal.MSUN_SI
-    P.s1x = line[3]
-    P.s1y = line[4]
-    P.s1z = line[5]
-    P.s2x = line[6]
-    P.s2y = line[7]
-    P.s2z = line[8]
-
-    if opts.input_tides:
-        P.lambda1 = line[9]
-        P.lambda2 = line[10]
-    if opts.input_eos_index:
-        P.eos_table_index = line[11]
-    if opts.use_eccentricity:
-        P.eccentricity = line[9]
-    if opts.input_distance:
-        P.dist = lal.PC_SI*1e6*line[9]  # Incompatible with tides, note!
-    
-    if opts.contingency_unevolved_neff == "quadpuff":
-        P_copy = P.manual_copy()  # prevent duplication
-        P_list_in.append(P_copy) # store  it, make sure distinct
-
-    # INPUT GRID: Evaluate binary parameters on fitting coordinates
-    line_out = np.zeros(len(coord_names)+2)
-    chi_pavg_out = 0 #initialize
-    for x in np.arange(len(coord_names)):
-        if coord_names[x] == 'chi_pavg':
-            chi_pavg_out = P.extract_param('chi_pavg')
-            line_out[x] = chi_pavg_out
-        elif coord_names[x] =='ordering':
+  keep_here = (dat[:,3]**2 + dat[:,4]**2 + dat[:,6]**2 + dat[:,7]**2)<=0.01
+  if np.any(~keep_here):
+      print(" Skipping precessing binaries: ", np.sum(~keep_here))
+  keep &= keep_here
+keep_here = ~(dat[:,1]+dat[:,2] > opts.M_max_cut)
+if opts.verbose and np.any(keep & ~keep_here):
+    print(" Skipping ", np.sum(keep & ~keep_here), " as too massive ")
+keep &= keep_here
+keep &= ~(dat[:,col_lnL+1] > opts.sigma_cut)
+if not (opts.lnL_cut is None):
+    keep &= ~(lnL_col < opts.lnL_cut)  # strip worthless points.  DANGEROUS
+if not opts.no_downselect_grid:
+    mc_here = lalsimutils.mchirp(dat[:,1],dat[:,2])
+    keep &= ~((mc_here < mc_cut_range[0]) | (mc_here > mc_cut_range[1]))
+keep &= lnL_col < opts.lnL_peak_insane_cut
+dat = np.array(dat[keep])
+dat[:,col_lnL] = lnL_col[keep]
+print(" Data size after cuts = ", len(dat))
+# Evaluate all input points on the fitting coordinates at once (ChooseWaveformParamsVector): per-point objects are built only when needed
+P_vec = lalsimutils.ChooseWaveformParamsVector(len(dat), fref=opts.fref, fmin=opts.fmin)  # fref IMPORTANT if you are using a quantity that depends on J
+P_vec.m1 = dat[:,1]*lal.MSUN_SI
+P_vec.m2 = dat[:,2]*lal.MSUN_SI
+P_vec.s1x = dat[:,3]
+P_vec.s1y = dat[:,4]
+P_vec.s1z = dat[:,5]
+P_vec.s2x = dat[:,6]
+P_vec.s2y = dat[:,7]
+P_vec.s2z = dat[:,8]
+if opts.input_tides:
+    P_vec.lambda1 = dat[:,9]
+    P_vec.lambda2 = dat[:,10]
+if opts.input_eos_index:
+    P_vec.eos_table_index = dat[:,11]
+if opts.use_eccentricity:
+    P_vec.eccentricity = dat[:,9]
+if opts.input_distance:
+    P_vec.dist = lal.PC_SI*1e6*dat[:,9]  # Incompatible with tides, note!
+P_list_in = []
+if opts.contingency_unevolved_neff == "quadpuff":
+    P_list_in = [P_vec.to_ChooseWaveformParams(indx) for indx in np.arange(len(dat))]
+
+def extract_coordinates(P_here, names, mass_units=False):
+    """
+    Array of coordinates 'names' for all rows of P_here.  'ordering' is left at zero (filled in later).  If mass_units, masses are in Msun
+    """
+    vals = np.zeros((P_here.n, len(names)))
+    for x in np.arange(len(names)):
+        if names[x] == 'ordering':
             continue
-        else:
-            line_out[x] = P.extract_param(coord_names[x])
- #        line_out[x] = getattr(P, coord_names[x])
-    line_out[-2] = line[col_lnL]
-    line_out[-1] = line[col_lnL+1]  # adjoin error estimate
-    dat_out.append(line_out)
-
-    # Alternate grids: Evaluate input binary parameters on other coordinates requested, for comparison
-    for indx in np.arange(len(extra_plot_coord_names)):
-        line_out = np.zeros(len(extra_plot_coord_names[indx]))
-        for x in np.arange(len(line_out)):
-            line_out[x] = P.extract_param( extra_plot_coord_names[indx][x])
-        dat_out_extra[indx].append(line_out)
-
-    # results using sampling coordinates (low_level_coord_names) 
-    line_out = np.zeros(len(low_level_coord_names))
-    for x in np.arange(len(line_out)):
         fac = 1
-        if low_level_coord_names[x] in ['ordering']:
-            continue
-        if low_level_coord_names[x] in ['mc','m1','m2','mtot']:
+        if mass_units and names[x] in ['mc','m1','m2','mtot']:
             fac = lal.MSUN_SI
-        if low_level_coord_names[x] == 'chi_pavg':
-            line_out[x] = chi_pavg_out
-        else:
-            line_out[x] = P.extract_param(low_level_coord_names[x])/fac
-        if low_level_coord_names[x] in ['mc']:
-            mc_index = x
-    dat_out_low_level_coord_names.append(line_out)
-
-
-    # Update mc range
-    if not(opts.mc_range):
-        mc_here = lalsimutils.mchirp(line[1],line[2])
-        if mc_here < mc_min:
-            mc_min = mc_here
-        if mc_here > mc_max:
-            mc_max = mc_here
-
-    # Mirror!
-    if opts.mirror_points:
-        P.swap_components()
-        # INPUT GRID: Evaluate binary parameters on fitting coordinates
-        line_out = np.zeros(len(coord_names)+2)
-        for x in np.arange(len(coord_names)):
-            line_out[x] = P.extract_param(coord_names[x])
-        line_out[-2] = line[col_lnL]
-        line_out[-1] = line[col_lnL+1]  # adjoin error estimate
-        dat_out.append(line_out)
-
-        # Alternate grids: Evaluate input binary parameters on other coordinates requested, for comparison
-        for indx in np.arange(len(extra_plot_coord_names)):
-            line_out = np.zeros(len(extra_plot_coord_names[indx]))
-            for x in np.arange(len(line_out)):
-                line_out[x] = P.extract_param( extra_plot_coord_names[indx][x])
-            dat_out_extra[indx].append(line_out)
-
-        # results using sampling coordinates (low_level_coord_names) 
-        line_out = np.zeros(len(low_level_coord_names))
-        for x in np.arange(len(line_out)):
-            fac = 1
-            if low_level_coord_names[x] in ['mc','m1','m2','mtot']:
-                fac = lal.MSUN_SI
-            line_out[x] = P.extract_param(low_level_coord_names[x])/fac
-            if low_level_coord_names[x] in ['mc']:
-                mc_index = x
-        dat_out_low_level_coord_names.append(line_out)
+        vals[:,x] = P_here.extract_param(names[x])/fac
+    return vals
+
+def interleave(a, b):
+    """
+    Rows a[0], b[0], a[1], b[1], ... : the order in which points and their mirror images were historically stored
+    """
+    out = np.empty((len(a)+len(b),) + a.shape[1:], dtype=a.dtype)
+    out[0::2] = a
+    out[1::2] = b
+    return out
+
+# INPUT GRID: Evaluate binary parameters on fitting coordinates, adjoining lnL and its error estimate
+dat_out = np.column_stack((extract_coordinates(P_vec, coord_names), dat[:,col_lnL], dat[:,col_lnL+1]))
+# Alternate grids: Evaluate input binary parameters on other coordinates requested, for comparison
+dat_out_extra = [extract_coordinates(P_vec, names) for names in extra_plot_coord_names]
+# results using sampling coordinates (low_level_coord_names)
+dat_out_low_level_coord_names = extract_coordinates(P_vec, low_level_coord_names, mass_units=True)
+if len(dat) > 0 and 'mc' in low_level_coord_names:
+    mc_index = low_level_coord_names.index('mc')
+
+# Update mc range
+if not(opts.mc_range) and len(dat) > 0:
+    mc_here = lalsimutils.mchirp(dat[:,1],dat[:,2])
+    mc_min = np.min([mc_min, np.min(mc_here)])
+    mc_max = np.max([mc_max, np.max(mc_here)])
+
+# Mirror!
+P_vec_last = P_vec
+if opts.mirror_points:
+    P_vec_mirror = P_vec.copy()
+    P_vec_mirror.swap_components()
+    P_vec_last = P_vec_mirror
+    dat_out = interleave(dat_out, np.column_stack((extract_coordinates(P_vec_mirror, coord_names), dat[:,col_lnL], dat[:,col_lnL+1])))
+    dat_out_extra = [interleave(dat_out_extra[indx], extract_coordinates(P_vec_mirror, names)) for indx, names in enumerate(extra_plot_coord_names)]
+    dat_out_low_level_coord_names = interleave(dat_out_low_level_coord_names, extract_coordinates(P_vec_mirror, low_level_coord_names, mass_units=True))
+
+P = lalsimutils.ChooseWaveformParams()
+if len(dat) > 0:
+    P = P_vec_last.to_ChooseWaveformParams(len(dat)-1)
 
 Pref_default = P.copy()  # keep this around to fix the masses, if we don't have an inj
 
@@ -1675,9 +1671,7 @@ if opts.tabular_eos_file:
     # Add the ordering values for all the imported points
     #  - on *import*, we've imported the index quantities; instead,  evaluate the ordering statistic for all of these
     #  - note the saved values use the FIDUCIAL ORDERING, so must be used with GREAT CARE to preserve order!
-    order_vals = np.zeros(len(dat_out))
-    for indx in np.arange(len(order_vals)):
-        order_vals = my_eos_sequence.lambda_of_m_indx(m_ref, int(dat_out[indx,-1]))  # last field is index value
+    order_vals = my_eos_sequence.lambda_of_m(m_ref, dat_out[:,-1].astype(int))  # last field is index value
     # overwrite into the ordering statistic field
     dat_out[:,-1] = order_vals
     # overwrite the coordinate name for the last field, so conversion is trivial/identity
@@ -1733,7 +1727,18 @@ elif sum(indx_ok) < 5*len(X[0])**2: # and max_lnL > 30:
 X_raw = X.copy()
 
 my_fit= None
-if not(opts.fit_load_quadratic is None):
+fit_cached = None
+if opts.fit_cache:
+    fit_cache_key = fit_cache.fit_cache_key([opts.fname], vars(opts))
+    fit_cached = fit_cache.load_fit_cache(opts.fit_cache, fit_cache_key)
+if not(fit_cached is None):
+    print(" FIT LOADED FROM CACHE ", opts.fit_cache)
+    my_fit, fit_metadata = fit_cached
+    X = fit_metadata['X']
+    Y = fit_metadata['Y']
+    Y_err = fit_metadata['Y_err']
+    dat_out_low_level_coord_names = fit_metadata['dat_out_low_level_coord_names']
+elif not(opts.fit_load_quadratic is None):
     print("FIT METHOD IS STORED QUADRATIC; no data used! ")
     my_fit = fit_quadratic_stored(opts.fit_load_quadratic, opts.fit_load_quadratic_path)
 elif opts.fit_method == "quadratic":
@@ -1909,7 +1914,7 @@ elif opts.fit_method == 'rf':
         X=X[indx]
         Y_err=Y_err[indx]
         dat_out_low_level_coord_names = dat_out_low_level_coord_names[indx]
-    my_fit = fit_rf(X,Y,y_errors=Y_err)
+    my_fit = fit_rf(X,Y,y_errors=Y_err,fname_load=opts.fit_rf_load,fname_warm_start=opts.fit_rf_warm_start,fname_save=opts.fit_rf_save,n_update_trees=opts.fit_rf_n_update_trees,y_offset=lnL_shift)
 elif opts.fit_method == 'nn_rfwrapper':
     print( " FIT METHOD ", opts.fit_method, " IS NN with RF wrapper ")
     # NO data truncation for NN needed?  To be *consistent*, have the code function the same way as the others
@@ -1981,6 +1986,12 @@ elif opts.fit_method == 'weighted_nearest':
 else:
     print(" NO KNOWN FIT METHOD ")
     sys.exit(55)
+if opts.fit_cache and fit_cached is None:
+    # coordinate metadata and the points used in the fit (post-truncation), so cached jobs skip straight to sampling
+    fit_metadata = {'coord_names':coord_names, 'low_level_coord_names':low_level_coord_names, 'lnL_shift':lnL_shift,
+                    'X':X, 'Y':Y, 'Y_err':Y_err, 'dat_out_low_level_coord_names':dat_out_low_level_coord_names}
+    if fit_cache.save_fit_cache(opts.fit_cache, fit_cache_key, my_fit, fit_metadata):
+        print(" Fit cached in ", opts.fit_cache)
 
 
 
@@ -2313,6 +2324,8 @@ if opts.sampler_method == "GMM":
     else:
         lnL_offset_saving = opts.lnL_offset
     extra_args = {'n_comp':n_comp,'max_iter':n_max_blocks,'L_cutoff': (np.exp(max_lnL-lnL_shift - lnL_offset_saving)),'gmm_dict':gmm_dict,'max_err':50}  # made up for now, should adjust
+    if opts.internal_gmm_memory_max_samples:
+        extra_args['igrand_store_max_samples'] = opts.internal_gmm_memory_max_samples
 extra_args.update({
     "n_adapt": 100, # Number of chunks to allow adaption over
     "history_mult": 10, # Multiplier on 'n' - number of samples to estimate marginalized 1D histograms with, 
@@ -2756,87 +2769,68 @@ if opts.internal_bound_factor_if_n_eff_small and neff <opts.n_output_samples  an
     indx_list = np.random.choice(indx_list, my_size_out, replace=False)
 if opts.verbose:
     print(" output size: truncating based on n_eff to N=", len(indx_list))
-lnL_list = []
-P_list =[]
 P = lalsimutils.ChooseWaveformParams()
 P.approx = lalsim.GetApproximantFromString(opts.approx_output)
 #P.approx = lalsim.SEOBNRv2  # DEFAULT
 P.fmin = opts.fmin # DEFAULT
 P.fref = opts.fref
-for indx_here in indx_list:
-        line = [samples[p][indx_here] for p in low_level_coord_names]
-        Pgrid = P.manual_copy()
-        Pgrid.fref = opts.fref  # Just to make SURE
-        include_item =True
-        # Set attributes that are being changed as necessary, leaving all others fixed
-        for indx in np.arange(len(low_level_coord_names)):
-            # Skip crazy configurations (e.g., violate Kerr bound)
-            # if parameter involes a mass parameter, scale it to sensible units
-            fac = 1
-            if low_level_coord_names[indx] in ['mc', 'mtot', 'm1', 'm2']:
-                fac = lal.MSUN_SI
-            # do assignment of parameters anyways, as we will skip it momentarily
-            coord_to_assign = low_level_coord_names[indx]
-            if coord_to_assign == 'xi':
-                coord_to_assign= 'chieff_aligned'
-            if coord_to_assign == 'chi_pavg':
-                continue # skipping chi_pavg
-            if coord_to_assign == 'ordering':
-                continue
-            Pgrid.assign_param(coord_to_assign, line[indx]*fac)
-#            print indx_here, coord_to_assign, line[indx]
-        # Test for downselect
-        # Perform tabular EOS calculations: compute reference index, lambda1, lambda2
-        if opts.tabular_eos_file:
-            # save the index of the SORTED SIMULATION (because that's how I'll be accessing it!)
-            eos_indx_here = my_eos_sequence.lookup_closest(samples['ordering'][indx_here])
-            Pgrid.eos_table_index = eos_indx_here
-            # Compute lambda1, lambda2 for output for this EOS, using ASSUMED source redshift (not currently with consistent/flexible distances)
-            Pgrid.lambda1 = my_eos_sequence.lambda_of_m_indx(Pgrid.m1/lal.MSUN_SI/(1+source_redshift), eos_indx_here)
-            Pgrid.lambda2 = my_eos_sequence.lambda_of_m_indx(Pgrid.m2/lal.MSUN_SI/(1+source_redshift), eos_indx_here)
-
-        for p in downselect_dict.keys():
-            val = Pgrid.extract_param(p) 
-            if np.isnan(val):  # this can happen for some odd coordinate systems like mu1, mu2 if we are out of range
-                include_item = False
-            if p in ['mc','m1','m2','mtot']:
-                val = val/lal.MSUN_SI
-            if val < downselect_dict[p][0] or val > downselect_dict[p][1]:
-                    include_item = False
-                    if opts.verbose:
-                        print(" Sample: Skipping " , line, ' due to ', p, val, downselect_dict[p])
-
-        # Set some superfluous quantities, needed only for PN approximants, so the result is generated sensibly
-        Pgrid.ampO =opts.amplitude_order
-        Pgrid.phaseO =opts.phase_order
-        
-        # Set fixed parameters
-        if opts.fixed_parameter is not None:
-            for i, p in enumerate(opts.fixed_parameter):
-                fac = lal.MSUN_SI if p in ["mc", "mtot", "m1", "m2"] else 1.0
-                Pgrid.assign_param(p, fac * float(opts.fixed_parameter_value[i]))
-
-        # Downselect.
-        # for param in downselect_dict:
-        #     if Pgrid.extract_param(param) < downselect_dict[param][0] or Pgrid.extract_param(param) > downselect_dict[param][1]:
-        #         print " Skipping " , line
-        #         include_item =False
-        if include_item:
-         if Pgrid.m2 <= Pgrid.m1:  # do not add grid elements with m2> m1, to avoid possible code pathologies !
-            P_list.append(Pgrid)
-            if not(opts.internal_use_lnL):
-                lnL_list.append(np.log(samples["integrand"][indx_here]))
-            else:
-                lnL_list.append(samples["integrand"][indx_here])
-         else:
-            Pgrid.swap_components()  # IMPORTANT.  This should NOT change the physical functionality FOR THE PURPOSES OF OVERLAP (but will for PE - beware phiref, etc!)
-            P_list.append(Pgrid)
-            if not(opts.internal_use_lnL):
-                lnL_list.append(np.log(samples["integrand"][indx_here]))
-            else:
-                lnL_list.append(samples["integrand"][indx_here])
-        else:
-            True
+# Assign all selected samples at once (ChooseWaveformParamsVector); per-point objects are only built for exported samples
+P_out = lalsimutils.ChooseWaveformParamsVector(len(indx_list), approx=P.approx, fmin=opts.fmin, fref=opts.fref)
+# Set attributes that are being changed as necessary, leaving all others fixed
+for indx in np.arange(len(low_level_coord_names)):
+    # if parameter involes a mass parameter, scale it to sensible units
+    fac = 1
+    if low_level_coord_names[indx] in ['mc', 'mtot', 'm1', 'm2']:
+        fac = lal.MSUN_SI
+    coord_to_assign = low_level_coord_names[indx]
+    if coord_to_assign == 'xi':
+        coord_to_assign= 'chieff_aligned'
+    if coord_to_assign == 'chi_pavg':
+        continue # skipping chi_pavg
+    if coord_to_assign == 'ordering':
+        continue
+    P_out.assign_param(coord_to_assign, samples[low_level_coord_names[indx]][indx_list]*fac)
+# Perform tabular EOS calculations: compute reference index, lambda1, lambda2
+if opts.tabular_eos_file:
+    # save the index of the SORTED SIMULATION (because that's how I'll be accessing it!)
+    eos_indx = my_eos_sequence.lookup_closest(samples['ordering'][indx_list])
+    P_out.eos_table_index = np.array(eos_indx, dtype=float)
+    # Compute lambda1, lambda2 for output for this EOS, using ASSUMED source redshift (not currently with consistent/flexible distances)
+    P_out.lambda1 = my_eos_sequence.lambda_of_m(P_out.m1/lal.MSUN_SI/(1+source_redshift), eos_indx)
+    P_out.lambda2 = my_eos_sequence.lambda_of_m(P_out.m2/lal.MSUN_SI/(1+source_redshift), eos_indx)
+
+# Test for downselect (e.g., Kerr bound), all samples at once
+include_item = np.ones(len(indx_list), dtype=bool)
+for p in downselect_dict.keys():
+    val = P_out.extract_param(p)
+    if p in ['mc','m1','m2','mtot']:
+        val = val/lal.MSUN_SI
+    include_here = ~np.isnan(val)   # this can happen for some odd coordinate systems like mu1, mu2 if we are out of range
+    include_here &= ~((val < downselect_dict[p][0]) | (val > downselect_dict[p][1]))
+    if opts.verbose and np.any(~include_here):
+        print(" Sample: Skipping ", np.sum(~include_here), ' due to ', p, downselect_dict[p])
+    include_item &= include_here
+
+# Set some superfluous quantities, needed only for PN approximants, so the result is generated sensibly
+P_out.ampO[:] =opts.amplitude_order
+P_out.phaseO[:] =opts.phase_order
+
+# Set fixed parameters
+if opts.fixed_parameter is not None:
+    for i, p in enumerate(opts.fixed_parameter):
+        fac = lal.MSUN_SI if p in ["mc", "mtot", "m1", "m2"] else 1.0
+        P_out.assign_param(p, fac * float(opts.fixed_parameter_value[i]))
+
+# do not add grid elements with m2> m1, to avoid possible code pathologies !
+P_out.swap_components(P_out.m2 > P_out.m1)  # IMPORTANT.  This should NOT change the physical functionality FOR THE PURPOSES OF OVERLAP (but will for PE - beware phiref, etc!)
+indx_include = np.nonzero(include_item)[0]
+if not(opts.internal_use_lnL):
+    lnL_list = np.log(samples["integrand"][indx_list[indx_include]])
+else:
+    lnL_list = samples["integrand"][indx_list[indx_include]]
+# Objects: exported samples, or all accepted samples if we need them for plots
+n_P_list = len(indx_include) if not(no_plots) else np.min([len(indx_include),opts.n_output_samples])
+P_list = [P_out.to_ChooseWaveformParams(k) for k in indx_include[:n_P_list]]
 
 
 
@@ -2864,7 +2858,7 @@ if not opts.no_plots:
 ### Identify, save best point
 ###
 
-P_best = P_list[ np.argmax(lnL_list)  ]
+P_best = P_out.to_ChooseWaveformParams(indx_include[np.argmax(lnL_list)])
 lalsimutils.ChooseWaveformParams_array_to_xml([P_best], "best_point_by_lnL")
 lnL_best = lnL_list[np.argmax(lnL_list)]
 np.savetxt("best_point_by_lnL_value.dat", np.array([lnL_best]));
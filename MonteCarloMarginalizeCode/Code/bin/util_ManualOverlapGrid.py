@@ -57,6 +57,7 @@ from scipy.optimize import brentq
 import RIFT.physics.effectiveFisher  as eff   # for the mesh grid generation
 import RIFT.physics.PrecessingFisherMatrix   as pcf   # Superior tools to perform overlaps. Will need to standardize with Evans' approach in effectiveFisher.py
 
+import multiprocessing
 from multiprocessing import Pool
 try:
     import os
@@ -208,6 +209,7 @@ parser.add_argument("--linear-spoked", action="store_true", help="Place mass pts
 parser.add_argument("--grid-cartesian", action="store_true", help="Place mass points using a cartesian grid")
 parser.add_argument("--grid-cartesian-npts", default=100, type=int)
 parser.add_argument("--skip-overlap",action='store_true', help="If true, the grid is generated without actually performing overlaps. Very helpful for uncertain configurations or low SNR")
+parser.add_argument("--n-procs",default=1,type=int, help="Number of processes used to generate template waveforms for the grid overlaps (fork). Overlaps are always evaluated in batches")
 parser.add_argument("--reset-grid-via-match",action='store_true',help="Reset the parameter_range results so each parameter's range is limited by  match_value.  Use this ONLY for estimating the fisher matrix quickly!")
 parser.add_argument("--no-reset-parameter",action='append',help="Don't reset the range of this parameter via tuning. Important for spin parameters, which can be over-tuned due to strong correlations")
 parser.add_argument("--use-fisher-resampling",action='store_true',help="Resample the grid using the fisher matrix. Requires fisher matrix")
@@ -319,6 +321,47 @@ def eval_overlap(grid,P_list, IP,indx):
         print(" Answer ", indx, line_out)
     return line_out
 
+P_list_batch = []
+def template_hoff(indx):
+    '''
+    Normalized template spectrum (numpy array) for P_list_batch[indx].  A module-level function of an index, so it runs on
+    a forked process pool without pickling the parameters
+    '''
+    hf2 = lalsimutils.complex_hoff(P_list_batch[indx])
+    return hf2.data.data/IP.norm(hf2)
+
+def eval_overlap_batch(grid, P_list, IP):
+    '''
+    As eval_overlap, for every grid point.  Templates are generated in blocks (on opts.n_procs processes), and the
+    overlaps of each block with hfBase come from one batched FFT (IP.ip_many)
+    '''
+    global P_list_batch
+    for P2 in P_list:
+        P2.deltaF = IP.deltaF
+    P_list_batch = P_list
+    n_block = max(1, int(2**28/(16*IP.len2side)))   # ~256 Mb of template spectra at a time
+    pool = None
+    if opts.n_procs > 1:
+        pool = multiprocessing.get_context('fork').Pool(opts.n_procs)
+    ip_vals = np.zeros(len(P_list))
+    for indx_start in np.arange(0, len(P_list), n_block):
+        indx_block = np.arange(indx_start, min(indx_start+n_block, len(P_list)))
+        if pool:
+            hf_block = pool.map(template_hoff, indx_block)
+        else:
+            hf_block = list(map(template_hoff, indx_block))
+        ip_vals[indx_block] = IP.ip_many(hfBase, np.array(hf_block))
+    if pool:
+        pool.close()
+        pool.join()
+    grid_out = []
+    for indx in np.arange(len(P_list)):
+        line_out = list(grid[indx]) + [ip_vals[indx]]
+        if opts.verbose:
+            print(" Answer ", indx, line_out)
+        grid_out.append(line_out)
+    return grid_out
+
 def calc_lambda_from_m(m, eos_fam):
     if m<10**15:
        m=m*lal.MSUN_SI
@@ -380,7 +423,10 @@ def evaluate_overlap_on_grid(hfbase,param_names, grid):
     # PROBLEM: Pool code doesn't work in new configuration.
     if len(grid_revised) ==0 :
         return [],[]
-    grid_out = np.array(list(map(functools.partial(eval_overlap, grid_revised, P_list,IP), np.arange(len(grid_revised)))))
+    if opts.skip_overlap or use_external_EOB:
+        grid_out = np.array(list(map(functools.partial(eval_overlap, grid_revised, P_list,IP), np.arange(len(grid_revised)))))
+    else:
+        grid_out = np.array(eval_overlap_batch(grid_revised, P_list, IP))
     # Remove mass units at end
     for p in ['mc', 'm1', 'm2', 'mtot']:
         if p in param_names:
@@ -96,6 +96,9 @@ parser.add_argument("--fit-save-gp",default=None, help="pkl file to save to. If
 parser.add_argument("--verbose",action='store_true')
 parser.add_argument("--parameter", action='append', help="Parameters used to construct the EOS. Assume spectral parameterization for now")
 parser.add_argument("--parameter-value", type=float,action='append', help="Value of parameter")
+parser.add_argument("--n-procs",type=int,default=1,help="Processes used to solve the TOV equations along the mass-radius curve")
+parser.add_argument("--adaptive-tov",action='store_true',help="Refine a coarse central pressure grid near features and the maximum mass, rather than use 1000 fixed points")
+parser.add_argument("--tov-cache-dir",default=os.environ.get('RIFT_TOV_CACHE'),help="Directory of saved mass-radius curves, keyed on the EOS parameters. Default $RIFT_TOV_CACHE")
 opts=  parser.parse_args()
 
 
@@ -158,7 +161,7 @@ if not 'xmax' in eos_params:
 
 print(eos_params)
 my_eos = EOSManager.EOSLindblomSpectral(name="internal",spec_params=eos_params)
-dat_mr = EOSManager.make_mr_lambda(my_eos.eos)  # r m(Msun) lambda
+dat_mr = EOSManager.make_mr_lambda(my_eos.eos,n_procs=opts.n_procs,adaptive=opts.adaptive_tov,cache_key=["EOSLindblomSpectral", sorted(eos_params.items())],cache_dir=opts.tov_cache_dir)  # r m(Msun) lambda
 lam_fit = scipy.interpolate.interp1d(dat_mr[:,1], dat_mr[:,2])
 
 #print dat_mr, lam_fit(1.4)
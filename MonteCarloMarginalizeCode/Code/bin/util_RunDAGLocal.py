@@ -0,0 +1,15 @@
+#! /usr/bin/env python
+#
+# util_RunDAGLocal.py
+#
+#   Run a condor DAG (e.g. marginalize_intrinsic_parameters_BasicIterationWorkflow.dag from
+#   create_event_parameter_pipeline_BasicIteration) on this machine, without HTCondor.  See RIFT/misc/dag_local.py
+#
+# EXAMPLES
+#   util_RunDAGLocal.py marginalize_intrinsic_parameters_BasicIterationWorkflow.dag --n-cpus 32 --memory-mb 128000 --report timing.txt
+#   util_RunDAGLocal.py my.dag --rescue my.dag.rescue_local    # resume, skipping nodes completed earlier
+
+import sys
+from RIFT.misc.dag_local import main
+
+sys.exit(main())
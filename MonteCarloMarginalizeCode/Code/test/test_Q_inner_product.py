@@ -0,0 +1,47 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test the CPU time-marginalized Q inner product kernel (Q_inner_product_numpy) against the loop formerly used on the
+#   numpy path of DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop, which builds the (npts_extrinsic, npts, n_lms) array,
+#   in double and single precision
+
+
+import time
+import numpy as np
+from RIFT.likelihood import Q_inner_product
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--n-extrinsic",type=int,default=2000)
+parser.add_option("--n-lms",type=int,default=5)
+parser.add_option("--n-time-full",type=int,default=4096)
+parser.add_option("--n-window",type=int,default=600)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+rholms = np.random.normal(size=(opts.n_lms,opts.n_time_full)) + 1j*np.random.normal(size=(opts.n_lms,opts.n_time_full))
+Q = np.ascontiguousarray(rholms.T)
+A = np.random.normal(size=(opts.n_extrinsic,opts.n_lms)) + 1j*np.random.normal(size=(opts.n_extrinsic,opts.n_lms))
+# start indices: a range set by the light travel time, as in ILE
+ifirst = np.random.randint(1500, 1500+200, size=opts.n_extrinsic).astype(np.int32)
+npts = opts.n_window
+
+t0 = time.time()
+Qlms = np.empty((opts.n_extrinsic, npts, opts.n_lms), dtype=np.complex128)
+for i in range(opts.n_extrinsic):
+    Qlms[i] = rholms[...,ifirst[i]:(ifirst[i]+npts)].T
+ref = np.einsum("...i,...i", np.broadcast_to(A[:,np.newaxis], Qlms.shape), Qlms)
+t1 = time.time()
+out = Q_inner_product.Q_inner_product_numpy(Q, A, ifirst, npts)
+t2 = time.time()
+out_serial = Q_inner_product.Q_inner_product_numpy(Q, A, ifirst, npts, n_threads=1)
+err = np.max(np.abs(out - ref))/np.max(np.abs(ref))
+err_serial = np.max(np.abs(out_serial - out))
+print(" Loop ", t1-t0, " kernel ", t2-t1, " relative error ", err, err_serial)
+# single precision (--likelihood-precision single)
+out_single = Q_inner_product.Q_inner_product_numpy(Q.astype(np.complex64), A.astype(np.complex64), ifirst, npts)
+err_single = np.max(np.abs(out_single - ref))/np.max(np.abs(ref))
+print(" Single precision ", out_single.dtype, " relative error ", err_single)
+
+if opts.as_test and (err > 1e-12 or err_serial > 0 or err_single > 1e-5 or out_single.dtype != np.complex64):
+    raise ValueError(" Q_inner_product_numpy does not match the reference ")
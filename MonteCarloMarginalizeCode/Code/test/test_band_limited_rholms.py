@@ -0,0 +1,77 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test the band-limited, window-only < h_lm(t) | d > (ComputeModeIPTimeSeries(band_limited=True), PrecomputedDataTerms(band_limited=True))
+#   against the full-length inverse FFT, and report the speedup.  Synthetic zero-noise signal in H1; analytic PSD
+#   Use --seglen to pad the data to a longer segment (e.g. --seglen 128 --srate 16384 for a BNS-like FFT length)
+
+
+import time
+import numpy as np
+import lal
+import lalsimulation as lalsim
+import RIFT.lalsimutils as lalsimutils
+import RIFT.likelihood.factored_likelihood as factored_likelihood
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--fmin",type=float,default=30)
+parser.add_option("--fmax",type=float,default=1000)
+parser.add_option("--srate",type=int,default=4096)
+parser.add_option("--seglen",type=float,default=None)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+t_window = 0.15
+Lmax = 2
+event_time = lal.LIGOTimeGPS(1000000000)
+
+Psig = lalsimutils.ChooseWaveformParams(fmin=opts.fmin, radec=True, incl=0.3, phiref=0.2, theta=0.4, phi=1.1, psi=0.2,
+         m1=20*lal.MSUN_SI, m2=15*lal.MSUN_SI, approx=lalsim.TaylorT4, deltaT=1./opts.srate,
+         tref=event_time, dist=500*1e6*lal.PC_SI, detector='H1')
+Psig.deltaF = lalsimutils.findDeltaF(Psig)
+if opts.seglen:
+    Psig.deltaF = 1./opts.seglen
+data_dict = {'H1': lalsimutils.non_herm_hoff(Psig)}
+psd_dict = {'H1': lalsim.SimNoisePSDaLIGOZeroDetHighPower}
+
+P = Psig.manual_copy()
+P.dist = factored_likelihood.distMpcRef*1e6*lal.PC_SI
+hlms, hlms_conj, _ = factored_likelihood.PrecomputeLikelihoodTerms(event_time, t_window, P, data_dict, psd_dict, Lmax, opts.fmax,
+        analyticPSD_Q=True, verbose=False, return_hlms=True)
+t_det, rho_epoch, t_shift, N_shift, N_window = factored_likelihood.RholmWindow('H1', P, hlms, data_dict, event_time, t_window)
+fNyq = 1./2./P.deltaT
+print(" FFT length ", data_dict['H1'].data.length, " window ", N_window)
+
+err_max = 0
+for shift in [N_shift, -N_shift, 3*N_window]:
+    t0 = time.time()
+    rholms = factored_likelihood.ComputeModeIPTimeSeries(hlms, data_dict['H1'], psd_dict['H1'], P.fmin, opts.fmax, fNyq, shift, N_window, True)
+    t1 = time.time()
+    rholms_band = factored_likelihood.ComputeModeIPTimeSeries(hlms, data_dict['H1'], psd_dict['H1'], P.fmin, opts.fmax, fNyq, shift, N_window, True,
+            band_limited=True)
+    t2 = time.time()
+    scale = np.max([np.max(np.abs(rholms[mode].data.data)) for mode in rholms])
+    err = np.max([np.max(np.abs(rholms[mode].data.data - rholms_band[mode].data.data)) for mode in rholms])/scale
+    err_epoch = np.max([np.abs(float(rholms[mode].epoch - rholms_band[mode].epoch)) for mode in rholms])
+    print(" N_shift ", shift, " rho err ", err, " epoch err ", err_epoch, " time full ", t1 - t0, " band-limited ", t2 - t1, " speedup ", (t1 - t0)/(t2 - t1))
+    err_max = np.max([err_max, err, err_epoch])
+
+# Batched data terms
+for band_limited in [False, True]:
+    data_terms = factored_likelihood.PrecomputedDataTerms(data_dict, psd_dict, opts.fmax, True, band_limited=band_limited)
+    t0 = time.time()
+    rholms_list = data_terms.mode_ip_time_series([hlms, hlms], 'H1', P.fmin, fNyq, [N_shift, -N_shift], N_window)
+    print(" PrecomputedDataTerms band_limited=", band_limited, " time ", time.time() - t0)
+    if band_limited:
+        err = np.max([np.max(np.abs(rholms_list[k][mode].data.data - rholms_ref[k][mode].data.data)) for k in range(2) for mode in hlms])/scale
+        print(" PrecomputedDataTerms rho err ", err)
+        err_max = np.max([err_max, err])
+        # timing reported by ILE --band-limited-rholms
+        t_band, t_full = data_terms.pop_rholm_timing()
+        print(" PrecomputedDataTerms timing: band-limited ", t_band, " full-transform estimate ", t_full, " speedup ", t_full/t_band)
+        timing_ok = t_band > 0 and t_full > 0 and data_terms.pop_rholm_timing() == (0., 0.)
+    rholms_ref = rholms_list
+
+if opts.as_test and (err_max > 1e-10 or not timing_ok):
+    raise ValueError(" Band-limited rholm does not reproduce the full inverse FFT ")
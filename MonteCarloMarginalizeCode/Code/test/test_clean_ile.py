@@ -0,0 +1,118 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test AverageSimulationLogLikelihoodGrouped (vectorized consolidation used by util_CleanILE.py) against the per-point loop
+#   with AverageSimulationWeights, and check that consolidating in stages (incremental merge) gives the same result.
+#   Then run util_CleanILE.py itself (text output, --merge-into) on ILE-format files and compare with the per-line loop
+
+
+import os
+import sys
+import subprocess
+import tempfile
+import numpy as np
+import RIFT.misc.weight_simulations as weight_simulations
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--n-rows",type=int,default=5000)
+parser.add_option("--n-groups",type=int,default=300)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+group = np.random.randint(opts.n_groups, size=opts.n_rows)
+group = np.unique(group, return_inverse=True)[1]    # no empty groups
+n_groups = np.max(group)+1
+lnL = np.random.normal(loc=50, scale=10, size=opts.n_rows)
+sigmaOverL = np.random.uniform(0.01, 0.9, size=opts.n_rows)
+
+lnL_net, sigma_net = weight_simulations.AverageSimulationLogLikelihoodGrouped(group, n_groups, lnL, sigmaOverL)
+
+# Reference: the loop in util_CleanILE.py
+lnL_ref = np.zeros(n_groups)
+sigma_ref = np.zeros(n_groups)
+for g in np.arange(n_groups):
+    lnL_here = lnL[group==g]
+    lnLmax = np.max(lnL_here)
+    sigma = sigmaOverL[group==g]*np.exp(lnL_here-lnLmax)
+    wts = weight_simulations.AverageSimulationWeights(None, None,sigma)
+    lnLmeanMinusLmax = np.log(np.sum(np.exp(lnL_here - lnLmax)*wts))
+    lnL_ref[g] = lnLmeanMinusLmax+lnLmax
+    sigma_ref[g] = (np.sqrt(1./np.sum(1./sigma/sigma)))/np.exp(lnLmeanMinusLmax)
+err = np.max(np.abs(lnL_net - lnL_ref)) + np.max(np.abs(sigma_net/sigma_ref - 1))
+print(" Grouped vs loop: ", err)
+
+# Staged: consolidate the first half, then merge the consolidated rows with the second half
+n_half = opts.n_rows//2
+g1 = group[:n_half]
+lnL_1, sigma_1 = weight_simulations.AverageSimulationLogLikelihoodGrouped(g1, n_groups, lnL[:n_half], sigmaOverL[:n_half])
+present = np.bincount(g1, minlength=n_groups) > 0
+g_staged = np.concatenate((np.arange(n_groups)[present], group[n_half:]))
+lnL_staged, sigma_staged = weight_simulations.AverageSimulationLogLikelihoodGrouped(g_staged, n_groups,
+        np.concatenate((lnL_1[present], lnL[n_half:])), np.concatenate((sigma_1[present], sigmaOverL[n_half:])))
+err_staged = np.max(np.abs(lnL_staged - lnL_net)) + np.max(np.abs(sigma_staged/sigma_net - 1))
+print(" Staged vs single pass: ", err_staged)
+
+if opts.as_test and (err > 1e-10 or err_staged > 1e-10):
+    raise ValueError(" Grouped consolidation does not reproduce the per-point loop ")
+
+# Script: ILE output files (indx, m1,m2, s1x,s1y,s1z,s2x,s2y,s2z, lnL, sigmaOverL, ntot, neff), points repeated across files
+script = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bin', 'util_CleanILE.py')
+dir_work = tempfile.mkdtemp()
+points = np.around(np.random.uniform(size=(50, 8)), 5)
+fnames = []
+for indx in np.arange(20):
+    rows = points[np.random.randint(len(points), size=30)]
+    dat = np.column_stack((np.zeros(len(rows)), rows, np.random.normal(loc=50, scale=3, size=len(rows)),
+                           np.random.uniform(0.01, 1.0, size=len(rows)), 1000*np.ones(len(rows)), np.ones(len(rows))))
+    fnames.append(os.path.join(dir_work, "ILE-{}.dat".format(indx)))
+    np.savetxt(fnames[-1], dat)
+
+def clean_ile_reference(fnames):
+    """
+    The per-line loop of the original util_CleanILE.py: key -> [lnL, sigmaOverL, ntot], in order of first appearance
+    """
+    data_at_intrinsic = {}
+    for fname in fnames:
+        for line in np.loadtxt(fname, ndmin=2):
+            line = np.around(line, decimals=5)
+            if line[10] > 0.9:
+                continue
+            data_at_intrinsic.setdefault(tuple(line[1:9]), []).append(line[9:])
+    out = []
+    for key in data_at_intrinsic:
+        lnL, sigmaOverL, ntot, neff = np.transpose(data_at_intrinsic[key])
+        lnLmax = np.max(lnL)
+        sigma = sigmaOverL*np.exp(lnL-lnLmax)
+        wts = weight_simulations.AverageSimulationWeights(None, None, sigma)
+        lnLmeanMinusLmax = np.log(np.sum(np.exp(lnL - lnLmax)*wts))
+        out.append(list(key) + [lnLmeanMinusLmax+lnLmax, (np.sqrt(1./np.sum(1./sigma/sigma)))/np.exp(lnLmeanMinusLmax), np.sum(ntot)])
+    return np.array(out)
+
+def run_clean_ile(args):
+    return subprocess.run([sys.executable, script] + args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+def compare(dat, ref):
+    if dat.shape != (len(ref), 13):
+        return np.inf
+    return np.max(np.abs(dat[:,1:12] - ref))
+
+ref = clean_ile_reference(fnames)
+out = run_clean_ile(fnames)
+dat = np.array([line.split() for line in out.stdout.decode().splitlines() if line.startswith('-1')], dtype=float)
+err_script = compare(dat, ref)
+fname_composite = os.path.join(dir_work, "first.composite")
+run_clean_ile(fnames[:10] + ['--output-file', fname_composite])
+fname_merged = os.path.join(dir_work, "merged.composite")
+run_clean_ile(fnames[10:] + ['--merge-into', fname_composite, '--output-file', fname_merged])
+err_merge = compare(np.loadtxt(fname_merged, ndmin=2), ref)
+print(" util_CleanILE.py vs per-line loop: ", err_script, " --merge-into: ", err_merge)
+
+# Files with another layout (here, with tides) cannot be consolidated with these: the script must fail, not drop rows
+fname_tides = os.path.join(dir_work, "ILE-tides.dat")
+np.savetxt(fname_tides, np.column_stack((np.zeros(3), np.random.uniform(size=(3, 10)), 50*np.ones(3), 0.1*np.ones(3), 1000*np.ones(3), np.ones(3))))
+rc_mixed = run_clean_ile(fnames + [fname_tides]).returncode
+print(" mixed layouts: return code ", rc_mixed)
+
+if opts.as_test and (err_script > 1e-10 or err_merge > 1e-10 or rc_mixed == 0):
+    raise ValueError(" util_CleanILE.py does not reproduce the per-line consolidation ")
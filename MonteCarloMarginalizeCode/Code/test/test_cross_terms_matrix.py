@@ -0,0 +1,64 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test the matrix-form cross terms (ComputeModeCrossTermIP, PrecomputedDataTerms.cross_terms_UV) against one ComplexIP.ip call
+#   per mode pair, and report the speedup.  Synthetic zero-noise signal in H1; analytic PSD
+
+
+import time
+import numpy as np
+import lal
+import lalsimulation as lalsim
+import RIFT.lalsimutils as lalsimutils
+import RIFT.likelihood.factored_likelihood as factored_likelihood
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--l-max",type=int,default=4)
+parser.add_option("--fmin",type=float,default=30)
+parser.add_option("--srate",type=int,default=4096)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+t_window = 0.15
+fmax = 1700.
+event_time = lal.LIGOTimeGPS(1000000000)
+
+Psig = lalsimutils.ChooseWaveformParams(fmin=opts.fmin, radec=True, incl=0.3, phiref=0.2, theta=0.4, phi=1.1, psi=0.2,
+         m1=20*lal.MSUN_SI, m2=15*lal.MSUN_SI, approx=lalsim.TaylorT4, deltaT=1./opts.srate,
+         tref=event_time, dist=500*1e6*lal.PC_SI, detector='H1')
+Psig.deltaF = lalsimutils.findDeltaF(Psig)
+data_dict = {'H1': lalsimutils.non_herm_hoff(Psig)}
+psd_dict = {'H1': lalsim.SimNoisePSDaLIGOZeroDetHighPower}
+
+P = Psig.manual_copy()
+P.dist = factored_likelihood.distMpcRef*1e6*lal.PC_SI
+hlms, hlms_conj, _ = factored_likelihood.PrecomputeLikelihoodTerms(event_time, t_window, P, data_dict, psd_dict, opts.l_max, fmax,
+        analyticPSD_Q=True, verbose=False, return_hlms=True, ignore_threshold=None)
+fNyq = 1./2./P.deltaT
+print(" Modes ", len(hlms))
+
+# Reference: one inner product per mode pair
+t0 = time.time()
+IP = lalsimutils.ComplexIP(P.fmin, fmax, fNyq, P.deltaF, psd_dict['H1'], True)
+U_ref = dict(((mode1, mode2), IP.ip(hlms[mode1], hlms[mode2])) for mode1 in hlms for mode2 in hlms)
+V_ref = dict(((mode1, mode2), IP.ip(hlms_conj[mode1], hlms[mode2])) for mode1 in hlms_conj for mode2 in hlms)
+t1 = time.time()
+U = factored_likelihood.ComputeModeCrossTermIP(hlms, hlms, psd_dict['H1'], P.fmin, fmax, fNyq, P.deltaF, True, verbose=False)
+t2 = time.time()
+data_terms = factored_likelihood.PrecomputedDataTerms(data_dict, psd_dict, fmax, True)
+data_terms.weights2side('H1', P.fmin, fNyq)
+t3 = time.time()
+U_b, V_b = data_terms.cross_terms_UV(hlms, hlms_conj, 'H1', P.fmin, fNyq)
+t4 = time.time()
+
+scale = np.max(np.abs(list(U_ref.values())))
+err = 0
+for label, ref, val in [['U', U_ref, U], ['U (data terms)', U_ref, U_b], ['V (data terms)', V_ref, V_b]]:
+    err_here = np.max([np.abs(ref[key] - val[key]) for key in ref])/scale
+    print(" ", label, " err ", err_here, len(val) == len(ref))
+    err = np.max([err, err_here]) if len(val) == len(ref) else np.inf
+print(" Time: per pair (U and V) ", t1 - t0, " ComputeModeCrossTermIP (U) ", t2 - t1, " cached weights (U and V) ", t4 - t3, " speedup ", (t1 - t0)/(t4 - t3))
+
+if opts.as_test and err > 1e-12:
+    raise ValueError(" Matrix cross terms do not match the per-pair inner products ")
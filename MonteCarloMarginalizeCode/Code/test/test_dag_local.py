@@ -0,0 +1,81 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test the local DAG executor (RIFT.misc.dag_local) on a small DAG in the format written by glue.pipeline:
+#   queue N, VARS macros, quoted arguments, RETRY of a failing node, POST script, MAXJOBS, stdout redirection, report
+
+
+import os
+import sys
+import tempfile
+import RIFT.misc.dag_local as dag_local
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--n-cpus",type=int,default=2)
+parser.add_option("--verbose",action='store_true')
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+dir_work = tempfile.mkdtemp()
+def write(fname, txt):
+    with open(os.path.join(dir_work, fname), 'w') as f:
+        f.write(txt)
+
+# 3 processes, each writes a file named from its macros
+write("gen.sub", """universe = vanilla
+executable = {}
+arguments = " -c 'import sys; open(""out-$(macroiteration)-$(process).txt"",""w"").write(sys.argv[1])' $(macroiteration) "
+request_memory = 1000
+output = logs/gen-$(cluster)-$(process).out
+error = logs/gen-$(cluster)-$(process).err
+getenv = True
+queue 3
+""".format(sys.executable))
+# fails on its first attempt
+write("flaky.sub", """universe = vanilla
+executable = {}
+arguments = " -c 'import os,sys; ok=os.path.exists(""marker""); open(""marker"",""w""); sys.exit(0 if ok else 3)' "
+request_memory = 100
+queue 1
+""".format(sys.executable))
+# concatenates the outputs to stdout
+write("collect.sub", """universe = local
+executable = {}
+arguments = " -c 'import glob; print(sorted(glob.glob(""out-*.txt"")))' "
+output = collected.txt
+queue 1
+""".format(sys.executable))
+write("check.sh", "#! /bin/sh\ngrep -q out-0-2.txt collected.txt\n")
+os.chmod(os.path.join(dir_work, "check.sh"), 0o755)
+write("test.dag", """JOB gen0 gen.sub
+VARS gen0 macroiteration="0"
+CATEGORY gen0 GEN
+JOB gen1 gen.sub
+VARS gen1 macroiteration="1"
+CATEGORY gen1 GEN
+JOB flaky flaky.sub
+RETRY flaky 2
+JOB collect collect.sub
+SCRIPT POST collect check.sh
+PARENT gen0 gen1 flaky CHILD collect
+MAXJOBS GEN 1
+""")
+
+executor = dag_local.LocalDAGExecutor(os.path.join(dir_work, "test.dag"), n_cpus=opts.n_cpus, memory_mb=2500, n_gpus=0,
+                                      poll_interval=0.05, verbose=opts.verbose)
+success = executor.run()
+executor.write_report()
+states = dict((rec['node'], rec) for rec in executor.report)
+n_out = len([f for f in os.listdir(dir_work) if f.startswith('out-')])
+print(" success ", success, " outputs ", n_out, " flaky attempts ", states['flaky']['attempts'])
+ok = success and n_out == 6 and states['flaky']['attempts'] == 2 and all(rec['state'] == 'done' for rec in executor.report)
+# MAXJOBS GEN 1: one of the two gen nodes waits in the queue, and that time is reported as wait, not wall
+print(" gen wall ", [states[n]['wall'] for n in ['gen0', 'gen1']], " wait ", [states[n]['wait'] for n in ['gen0', 'gen1']])
+ok = ok and all(rec['wall'] >= 0 and rec['wait'] >= 0 for rec in executor.report)
+ok = ok and max(states['gen0']['wait'], states['gen1']['wait']) > 0.5*min(states['gen0']['wall'], states['gen1']['wall'])
+with open(os.path.join(dir_work, "out-1-0.txt")) as f:
+    ok = ok and f.read() == "1"
+
+if opts.as_test and not ok:
+    raise ValueError(" Local DAG executor did not run the test DAG correctly ")
@@ -0,0 +1,61 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test the conditioned-data bundle (RIFT.misc.data_bundle): PSD conditioning as in the ILE, and an exact write/read round trip
+#   of the frequency-domain data, PSDs, fmax and metadata.  Synthetic zero-noise signal in H1, L1; analytic PSD as a series
+
+
+import os
+import tempfile
+import numpy as np
+import lal
+import lalsimulation as lalsim
+import RIFT.lalsimutils as lalsimutils
+import RIFT.misc.data_bundle as data_bundle
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--srate",type=int,default=4096)
+parser.add_option("--window-shape",type=float,default=0.1)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+P = lalsimutils.ChooseWaveformParams(fmin=30, radec=True, incl=0.3, theta=0.4, phi=1.1, psi=0.2,
+         m1=20*lal.MSUN_SI, m2=15*lal.MSUN_SI, approx=lalsim.TaylorT4, deltaT=1./opts.srate,
+         tref=lal.LIGOTimeGPS(1000000000.25), dist=500*1e6*lal.PC_SI)
+P.deltaF = lalsimutils.findDeltaF(P)
+
+fmin_ifo = {'H1': 20., 'L1': 25.}
+data_dict, psd_dict = {}, {}
+for det in ['H1', 'L1']:
+    P.detector = det
+    data_dict[det] = lalsimutils.non_herm_hoff(P)
+    # a coarser PSD, as read from XML
+    psd = lal.CreateREAL8FrequencySeries("psd", lal.LIGOTimeGPS(0), 0., 0.25, lal.HertzUnit, int(opts.srate/2/0.25) + 1)
+    fvals = 0.25*np.arange(psd.data.length)
+    psd.data.data = np.array([lalsim.SimNoisePSDaLIGOZeroDetHighPower(f) if f > 10 else 0. for f in fvals])
+    psd_dict[det] = data_bundle.condition_psd(psd, data_dict[det], window_shape=opts.window_shape, fmin=fmin_ifo[det])
+fmax = data_bundle.integration_fmax(psd_dict)
+
+success = True
+psd = psd_dict['H1']
+fvals = psd.f0 + psd.deltaF*np.arange(psd.data.length)
+ok = psd.deltaF == data_dict['H1'].deltaF and np.all(psd.data.data[fvals < fmin_ifo['H1']] == 0) and fmax == opts.srate/2.
+print(" PSD conditioning ", ok, " fmax ", fmax, " fmax (requested 1000) ", data_bundle.integration_fmax(psd_dict, 1000.))
+success = success and ok and data_bundle.integration_fmax(psd_dict, 1000.) == 1000.
+
+fname = os.path.join(tempfile.mkdtemp(), "bundle.bin")
+metadata = {'window_shape': opts.window_shape, 'deltaT': 1./opts.srate, 'fmin_ifo': fmin_ifo}
+data_bundle.write_data_bundle(fname, data_dict, psd_dict, fmax, metadata)
+for mmap in [True, False]:
+    data_b, psd_b, fmax_b, metadata_b = data_bundle.read_data_bundle(fname, mmap=mmap)
+    ok = fmax_b == fmax and metadata_b == metadata and list(data_b.keys()) == list(data_dict.keys())
+    for det in data_dict:
+        for a, b in [[data_dict[det], data_b[det]], [psd_dict[det], psd_b[det]]]:
+            ok = ok and type(a) == type(b) and np.array_equal(a.data.data, b.data.data) and a.epoch == b.epoch \
+                and a.deltaF == b.deltaF and a.f0 == b.f0 and a.sampleUnits == b.sampleUnits
+    print(" Round trip (mmap=", mmap, ") ", ok, " size ", os.path.getsize(fname))
+    success = success and ok
+
+if opts.as_test and not success:
+    raise ValueError(" Data bundle does not reproduce the conditioned data ")
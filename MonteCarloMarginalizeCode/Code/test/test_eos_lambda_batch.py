@@ -0,0 +1,63 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test EOSConcrete.lambda_from_m_array (cached spline) against lambda_from_m, and the vectorized convert_waveform_coordinates_with_eos
+
+
+import numpy as np
+import lal
+import RIFT.lalsimutils as lalsimutils
+import RIFT.physics.EOSManager as EOSManager
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--eos",default='SLY4')
+parser.add_option("--npts",type=int,default=1000)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+my_eos = EOSManager.EOSLALSimulation(opts.eos)
+
+# Batch lambda(m), away from the maximum mass (where Lambda(m) is singular)
+m_vals = np.random.uniform(1.0, 0.99*my_eos.mMaxMsun, size=opts.npts)
+lambda_ref = np.array([my_eos.lambda_from_m(m*lal.MSUN_SI) for m in m_vals])
+lambda_batch = my_eos.lambda_from_m_array(m_vals)
+err = np.max(np.abs(lambda_batch/lambda_ref - 1))
+print(" lambda_from_m_array: max relative error ", err)
+if opts.as_test and err > 1e-3:
+    raise ValueError(" Large deviation seen ")
+
+# Masses the EOS cannot support are flagged
+lambda_bad = my_eos.lambda_from_m_array(np.array([my_eos.mMaxMsun + 0.1, 1.4*lal.MSUN_SI]))
+print(" lambda_from_m_array: above mMax, 1.4 Msun in kg ", lambda_bad)
+if opts.as_test and not (np.isneginf(lambda_bad[0]) and np.isfinite(lambda_bad[1])):
+    raise ValueError(" Mass range not enforced ")
+
+# Vectorized coordinate conversion
+low_level_coord_names = ['mc', 'eta', 's1z', 's2z']
+coord_names = ['m1', 'm2', 'lambda1', 'lambda2']
+x_in = np.c_[np.random.uniform(1.0, 1.5, size=opts.npts), np.random.uniform(0.22, 0.25, size=opts.npts), np.zeros(opts.npts), np.zeros(opts.npts)]
+x_out = lalsimutils.convert_waveform_coordinates_with_eos(x_in, coord_names=coord_names, low_level_coord_names=low_level_coord_names, eos_class=my_eos)
+x_ref = np.array([my_eos.lambda_from_m(m*lal.MSUN_SI) for m in x_out[:,1]])
+err = np.max(np.abs(x_out[:,3]/x_ref - 1))
+print(" convert_waveform_coordinates_with_eos: max relative error in lambda2 ", err)
+if opts.as_test and err > 1e-3:
+    raise ValueError(" Large deviation seen ")
+
+# EOS without a lalsim family (like EOSReprimand): lambda_from_m_array refuses, and the conversion falls back to lambda_from_m
+class EOSNoFamily(EOSManager.EOSConcrete):
+    def __init__(self, eos_ref):
+        EOSManager.EOSConcrete.__init__(self, name='no_family')
+        self.mMaxMsun = eos_ref.mMaxMsun
+        self.lambda_from_m = eos_ref.lambda_from_m
+my_eos_nofam = EOSNoFamily(my_eos)
+try:
+    my_eos_nofam.lambda_from_m_array(m_vals)
+    raised = False
+except ValueError:
+    raised = True
+x_out_nofam = lalsimutils.convert_waveform_coordinates_with_eos(x_in, coord_names=coord_names, low_level_coord_names=low_level_coord_names, eos_class=my_eos_nofam)
+err = np.max(np.abs(x_out_nofam[:,3]/x_ref - 1))
+print(" no eos_fam: lambda_from_m_array raises ", raised, " convert_waveform_coordinates_with_eos max relative error in lambda2 ", err)
+if opts.as_test and (not raised or err > 1e-12):
+    raise ValueError(" EOS without eos_fam not handled ")
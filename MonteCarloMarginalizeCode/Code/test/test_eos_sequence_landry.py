@@ -0,0 +1,71 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test the packed, vectorized lookups of EOSManager.EOSSequenceLandry (lambda_of_m, R_of_m, mmax_of_indx, lookup_closest)
+#   against per-EOS np.interp / argmin, on a synthetic table in the Landry format (groups 'ns', 'id')
+
+
+import os
+import tempfile
+import time
+import numpy as np
+import h5py
+import RIFT.physics.EOSManager as EOSManager
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--n-eos",type=int,default=200)
+parser.add_option("--n-samples",type=int,default=100000)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+# Synthetic mass-radius-Lambda sequences, with unsorted rows of different lengths
+fname = os.path.join(tempfile.mkdtemp(), "eos_landry.h5")
+rng = np.random.default_rng(1)
+with h5py.File(fname, 'w') as f:
+    f.create_dataset('id', data=np.arange(opts.n_eos))
+    grp = f.create_group('ns')
+    for indx in range(opts.n_eos):
+        n_rows = rng.integers(20, 80)
+        mmax = rng.uniform(1.9, 2.6)
+        M = np.sort(rng.uniform(0.8, mmax, size=n_rows))
+        M[-1] = mmax
+        R = rng.uniform(10, 14) - 0.5*(M - 1.4)
+        Lambda = rng.uniform(200, 800)*np.power(M/1.4, -6)
+        rows = np.zeros(n_rows, dtype=[('M', float), ('R', float), ('Lambda', float)])
+        rows['M'], rows['R'], rows['Lambda'] = M, R, Lambda
+        grp.create_dataset('eos_{}'.format(indx), data=rows[rng.permutation(n_rows)])
+
+success = True
+for no_sort in [True, False]:
+    seq = EOSManager.EOSSequenceLandry(fname=fname, load_ns=True, oned_order_name='Lambda', oned_order_mass=1.4, no_sort=no_sort)
+    m = rng.uniform(0.5, 2.8, size=opts.n_samples)
+    indx = rng.integers(0, opts.n_eos, size=opts.n_samples)
+    t0 = time.time()
+    lam = seq.lambda_of_m(m, indx)
+    R = seq.R_of_m(m, indx)
+    t1 = time.time()
+    n_ref = min(opts.n_samples, 5000)
+    lam_ref = np.zeros(n_ref)
+    R_ref = np.zeros(n_ref)
+    for k in range(n_ref):
+        dat = np.array(seq.eos_ns_tov[seq.eos_names[indx[k]]])
+        indx_sort = np.argsort(dat['M'])
+        lam_ref[k] = np.exp(np.interp(m[k], dat['M'][indx_sort], np.log(dat['Lambda'][indx_sort])))
+        R_ref[k] = np.exp(np.interp(m[k], dat['M'][indx_sort], np.log(dat['R'][indx_sort])))
+    t2 = time.time()
+    err = np.max(np.abs(lam[:n_ref]/lam_ref - 1)) + np.max(np.abs(R[:n_ref]/R_ref - 1))
+    ok_scalar = seq.lambda_of_m_indx(m[0], indx[0]) == lam[0]
+    mmax_ref = np.array([np.max(seq.eos_ns_tov[name]['M']) for name in seq.eos_names])
+    ok_mmax = np.array_equal(seq.mmax_of_indx(np.arange(opts.n_eos)), mmax_ref)
+    # closest ordering value: include exact hits, ties, and values outside the range
+    order_vals = np.concatenate([rng.uniform(seq.oned_order_values.min() - 10, seq.oned_order_values.max() + 10, size=2000), seq.oned_order_values])
+    closest = seq.lookup_closest(order_vals)
+    closest_ref = np.array([np.argmin(np.abs(x - seq.oned_order_values)) for x in order_vals])
+    ok_closest = np.array_equal(closest, closest_ref) and seq.lookup_closest(order_vals[0]) == closest_ref[0]
+    print(" no_sort ", no_sort, " lambda/R rel err ", err, " scalar ", ok_scalar, " mmax ", ok_mmax, " lookup_closest ", ok_closest,
+          " time per sample: vectorized ", (t1 - t0)/opts.n_samples, " per call ", (t2 - t1)/n_ref)
+    success = success and err < 1e-12 and ok_scalar and ok_mmax and ok_closest
+
+if opts.as_test and not success:
+    raise ValueError(" Packed EOSSequenceLandry lookups do not match the per-EOS evaluation ")
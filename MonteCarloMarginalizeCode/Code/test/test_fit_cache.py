@@ -0,0 +1,60 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test the CIP fit cache (RIFT.interpolators.fit_cache): a fit (closure) saved with save_fit_cache is loaded back with the
+#   same key; changes to the input data or to an option that can change the fit miss, while changes to sampling / output
+#   options (opts_not_in_key) still hit
+
+
+import os
+import sys
+import tempfile
+import numpy as np
+import RIFT.interpolators.fit_cache as fit_cache
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+if fit_cache.cloudpickle is None:
+    print(" cloudpickle not available: fit cache disabled ")
+    sys.exit(0)
+
+dir_work = tempfile.mkdtemp()
+fname_dat = os.path.join(dir_work, "all.net")
+np.savetxt(fname_dat, np.random.uniform(size=(100, 5)))
+fname_cache = os.path.join(dir_work, "fit.pkl")
+opts_cip = {'fit_method': 'gp', 'lnL_offset': 50, 'parameter': ['mc', 'delta_mc'], 'n_output_samples': 1000, 'fname_output_samples': 'out1'}
+
+coef = np.random.normal(size=2)
+def make_fit(coef):
+    return lambda x: np.dot(x[:,:2], coef)   # closure, as CIP's fn_return
+my_fit = make_fit(coef)
+x_test = np.random.uniform(size=(10, 2))
+
+key = fit_cache.fit_cache_key([fname_dat], opts_cip)
+success = fit_cache.save_fit_cache(fname_cache, key, my_fit, metadata={'coord_names': ['mc', 'delta_mc']})
+loaded = fit_cache.load_fit_cache(fname_cache, key)
+success = success and not(loaded is None) and np.array_equal(loaded[0](x_test), my_fit(x_test)) and loaded[1]['coord_names'] == ['mc', 'delta_mc']
+print(" round trip ", success)
+
+checks = []
+# sampling / output options only: hit
+opts_output = dict(opts_cip, n_output_samples=5000, fname_output_samples='out2', verbose=True)
+checks.append(['output options', fit_cache.fit_cache_key([fname_dat], opts_output), True])
+# fit options: miss
+checks.append(['fit option', fit_cache.fit_cache_key([fname_dat], dict(opts_cip, lnL_offset=20)), False])
+checks.append(['parameters', fit_cache.fit_cache_key([fname_dat], dict(opts_cip, parameter=['mc', 'eta'])), False])
+# data: miss
+with open(fname_dat, 'a') as f:
+    f.write("0.5 0.5 0.5 0.5 0.5\n")
+checks.append(['data', fit_cache.fit_cache_key([fname_dat], opts_cip), False])
+for label, key_here, expect_hit in checks:
+    hit = not(fit_cache.load_fit_cache(fname_cache, key_here) is None)
+    print(" ", label, " hit ", hit)
+    success = success and (hit == expect_hit)
+success = success and fit_cache.load_fit_cache(os.path.join(dir_work, "missing.pkl"), key) is None
+
+if opts.as_test and not success:
+    raise ValueError(" Fit cache hit/miss behavior incorrect ")
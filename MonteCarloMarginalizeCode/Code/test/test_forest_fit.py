@@ -0,0 +1,53 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test IncrementalForestFit (RIFT.interpolators.forest_fit, used by CIP's fit_rf): threaded prediction matches the mean of
+#   the trees, warm-start updates keep the forest size and train only on new points, and save/load round trips
+
+
+import os
+import tempfile
+import numpy as np
+from RIFT.interpolators.forest_fit import IncrementalForestFit
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--n-points",type=int,default=2000)
+parser.add_option("--n-dim",type=int,default=3)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+def lnL(x):
+    return 50 - 0.5*np.sum(x**2,axis=-1)
+
+x = np.random.uniform(-3,3,size=(opts.n_points,opts.n_dim))
+y = lnL(x)
+rf = IncrementalForestFit(n_estimators=40, n_update=10, min_new_points=10)
+rf.fit(x,y,sample_weight=np.ones(len(y)))
+
+x_test = np.random.uniform(-3,3,size=(5000,opts.n_dim))
+y_pred = rf.predict(x_test)
+y_ref = np.mean([tree.predict(x_test.astype(np.float32)) for tree in rf.estimators_],axis=0)
+err_predict = np.max(np.abs(y_pred - y_ref))
+print(" Threaded vs reference prediction ", err_predict, " fit error ", np.std(y_pred - lnL(x_test)))
+
+# Warm start: 500 new points, appended to the old training set; offset changed
+oldest = rf.estimators_[10]
+x_new = np.random.uniform(-3,3,size=(500,opts.n_dim))
+x_all = np.concatenate((x,x_new))
+n_new = rf.update(x_all, lnL(x_all) - 5, y_offset=5)
+ok_update = (n_new == 500) and len(rf.estimators_) == 40 and rf.estimators_[0] is oldest
+ok_update = ok_update and all(tree.tree_.n_node_samples[0] <= 500 for tree in rf.estimators_[-10:])
+err_offset = np.std(rf.predict(x_test) - lnL(x_test))
+print(" Warm start: new points ", n_new, " trees ", len(rf.estimators_), " ok ", ok_update, " fit error ", err_offset)
+# No new points: model unchanged
+ok_update = ok_update and rf.update(x_all, lnL(x_all)) == 0 and rf.estimators_[0] is oldest
+
+fname = os.path.join(tempfile.mkdtemp(), "rf_fit.pkl")
+rf.save(fname)
+rf2 = IncrementalForestFit.load(fname)
+err_load = np.max(np.abs(rf2.predict(x_test) - rf.predict(x_test)))
+print(" Save/load ", err_load)
+
+if opts.as_test and (err_predict > 1e-10 or not ok_update or err_load > 0 or err_offset > 2):
+    raise ValueError(" IncrementalForestFit failed ")
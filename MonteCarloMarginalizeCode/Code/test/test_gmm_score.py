@@ -0,0 +1,39 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test the batched (all components at once, cached Cholesky factors) GMM score against a per-component scipy evaluation,
+#   and that the cache follows changes to the model
+
+
+import numpy as np
+from scipy.stats import multivariate_normal
+import RIFT.integrators.gaussian_mixture_model as GMM
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--n-samples",type=int,default=10000)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+def score_reference(model, x):
+    x = model._normalize(x)
+    return np.sum([w*multivariate_normal.pdf(x, mean=m, cov=c, allow_singular=True) for w,m,c in zip(model.weights, model.means, model.covariances)], axis=0)
+
+success = True
+for d in [1, 2, 5]:
+    bounds = np.array([[-5,5]]*d, dtype=float)
+    x = np.random.normal(size=(opts.n_samples, d))
+    model = GMM.gmm(3, bounds)
+    model.fit(x, log_sample_weights=-0.5*np.sum(x**2, axis=1))
+    y = np.random.uniform(-5, 5, size=(1000, d))
+    for label in ['fit', 'cached', 'moved']:
+        if label == 'moved':
+            model.means[0] = model.means[0] + 0.1
+        s = model.score(y)
+        ratio = s/score_reference(model, y)
+        ok = np.std(ratio) < 1e-10*np.mean(ratio)   # equal up to the (constant) bound normalization
+        print(" d ", d, label, " score / reference : ", np.mean(ratio), np.std(ratio), ok)
+        success = success and ok
+
+if opts.as_test and not success:
+    raise ValueError(" Batched GMM score does not match per-component evaluation ")
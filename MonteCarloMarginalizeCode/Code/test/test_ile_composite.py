@@ -0,0 +1,37 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test the binary (.npy, named columns) ILE composite format: text <-> binary round trip, memory-mapped load
+
+
+import os
+import tempfile
+import numpy as np
+import RIFT.misc.ile_composite as ile_composite
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--n-rows",type=int,default=10000)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+dir_work = tempfile.mkdtemp()
+success = True
+for n_cols in [13, 14, 15, 16]:
+    dat = np.random.normal(size=(opts.n_rows, n_cols))
+    fname_txt = os.path.join(dir_work, "all_{}.net".format(n_cols))
+    fname_npy = fname_txt + ".npy"
+    ile_composite.save_composite(fname_txt, dat)
+    ile_composite.save_composite(fname_npy, ile_composite.load_composite(fname_txt))
+    dat_mmap = ile_composite.load_composite(fname_npy)
+    rec = ile_composite.load_composite(fname_npy, structured=True)
+    names = ile_composite.composite_column_names(n_cols)
+    ok = np.all(dat_mmap == dat) and list(rec.dtype.names) == names and np.all(rec['lnL'] == dat[:, names.index('lnL')])
+    # copy-on-write: edits to the loaded array do not reach the file
+    dat_mmap[:, 0] = 0
+    ok = ok and np.all(ile_composite.load_composite(fname_npy)[:, 0] == dat[:, 0])
+    print(" Columns ", n_cols, names, " round trip ok ", ok)
+    success = success and ok
+
+if opts.as_test and not success:
+    raise ValueError(" Binary composite format does not round trip ")
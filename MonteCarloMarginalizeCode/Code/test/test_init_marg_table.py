@@ -0,0 +1,93 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test util_InitMargTable on a small grid: the batched table (Gauss-Hermite/Laguerre for all points at once, quad on a
+#   process pool) against the original per-point (scalar) lnI, and the table cache
+
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+import numpy as np
+from scipy import integrate, optimize
+import RIFT.likelihood.factored_likelihood as factored_likelihood
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--max-snr",type=float,default=20)
+parser.add_option("--d-min",type=float,default=100)
+parser.add_option("--d-max",type=float,default=1000)
+parser.add_option("--n-check",type=int,default=300)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+script = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bin', 'util_InitMargTable')
+if not os.path.exists(script):
+    script = shutil.which('util_InitMargTable')
+dir_work = tempfile.mkdtemp()
+dir_cache = os.path.join(dir_work, 'cache')
+def make_table(fname, n_procs):
+    cmd = [sys.executable, script, '--max-snr', str(opts.max_snr), '--d-min', str(opts.d_min), '--d-max', str(opts.d_max),
+           '--out', os.path.join(dir_work, fname), '--n-procs', str(n_procs), '--cache-dir', dir_cache]
+    out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout.decode()
+    fname_out = fname if fname.endswith('.npz') else fname + '.npz'   # as np.savez
+    return np.load(os.path.join(dir_work, fname_out)), ('from cache' in out)
+
+table, cached_first = make_table('serial.npz', 1)
+shutil.rmtree(dir_cache)
+table_pool, _ = make_table('pool.npz', 2)
+table_cache, cached_second = make_table('cache.npz', 1)
+success = np.array_equal(table['lnI_array'], table_pool['lnI_array']) and np.array_equal(table['lnI_array'], table_cache['lnI_array'])
+success = success and cached_second and not cached_first
+print(" pool, cache reproduce the serial table ", success, " cache hit ", cached_second)
+# --out without the .npz suffix: cache hit, then (empty cache) computed and cached
+table_hit, cached_hit = make_table('noext_hit', 1)
+shutil.rmtree(dir_cache)
+table_miss, cached_miss = make_table('noext_miss', 1)
+ok = cached_hit and not cached_miss and os.path.exists(dir_cache)
+ok = ok and np.array_equal(table['lnI_array'], table_hit['lnI_array']) and np.array_equal(table['lnI_array'], table_miss['lnI_array'])
+print(" --out without .npz ", ok)
+success = success and ok
+
+# Reference: the original scalar lnI (Euclidean prior, no phase marginalization), on a random subset of the grid
+dref = factored_likelihood.distMpcRef
+xmin, xmax = dref/opts.d_max, dref/opts.d_min
+bmax, x0min, x0max = float(table['bmax']), float(table['x0min']), float(table['x0max'])
+hermgauss_samples, hermgauss_weights = np.polynomial.hermite.hermgauss(50)
+laggauss_samples, laggauss_weights = np.polynomial.laguerre.laggauss(50)
+def effective_prior(x, a):
+    d = dref/x
+    return dref/x**2*3*d**2/(opts.d_max**3 - opts.d_min**3)
+def exponent(x, x0, b):
+    return b/2.*(x0**2. - (x - x0)**2.)
+def lnI_scalar(x0, b):
+    if xmin < x0 < xmax and b*x0**2 > 10000 and x0 + np.min(hermgauss_samples)*np.sqrt(2/b) > xmin and x0 + np.max(hermgauss_samples)*np.sqrt(2/b) < xmax:
+        result = np.sqrt(2/b)*np.sum(effective_prior(np.sqrt(2/b)*hermgauss_samples + x0, b*x0)*hermgauss_weights)
+    elif x0 < xmin and b*(xmin - x0)*xmin > 100 and x0 + np.sqrt(2/b*np.max(laggauss_samples) + (xmin - x0)**2) < xmax:
+        tmp = np.sqrt(2/b*laggauss_samples + (xmin - x0)**2)
+        result = np.sum(laggauss_weights/(b*tmp)*effective_prior(x0 + tmp, b*x0))
+    elif x0 > xmax and b*(x0 - xmax)*xmax > 100 and x0 - np.sqrt(2/b*np.max(laggauss_samples) + (x0 - xmax)**2) > xmin:
+        tmp = np.sqrt(2/b*laggauss_samples + (x0 - xmax)**2)
+        result = np.sum(laggauss_weights/(b*tmp)*effective_prior(x0 - tmp, b*x0))
+    else:
+        max_exponent = exponent(np.clip(x0, xmin, xmax), x0, b)
+        tmp = np.sqrt(x0**2 - 2/b*(max_exponent + np.log(1e-30)))
+        result, _ = integrate.quad(lambda x: effective_prior(x, b*x0)*np.exp(exponent(x, x0, b) - max_exponent), max(x0 - tmp, xmin), min(x0 + tmp, xmax))
+    return np.log(result)
+
+s_array, t_array, lnI_array = table['s_array'], table['t_array'], table['lnI_array']
+x0_to_s = lambda x0: np.arcsinh(np.sqrt(bmax)*(x0 - xmin)) - np.arcsinh(np.sqrt(bmax)*(xmax - x0))
+indx_s = np.random.randint(1, len(s_array) - 1, size=opts.n_check)
+indx_t = np.random.randint(1, len(t_array), size=opts.n_check)
+err = 0
+for i, j in zip(indx_s, indx_t):
+    x0 = optimize.brentq(lambda x: x0_to_s(x) - s_array[i], x0min, x0max, xtol=1e-14)
+    b = float(table['bref'])*np.sinh(t_array[j])
+    err = max(err, np.abs(lnI_array[i,j] - lnI_scalar(x0, b)))
+print(" table shape ", lnI_array.shape, " max |lnI - scalar lnI| ", err)
+success = success and err < 1e-4
+
+if opts.as_test and not success:
+    raise ValueError(" Batched marginalization table does not match the scalar construction ")
@@ -0,0 +1,51 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test the array-native inner product methods (norm_many, ip_many, overlap_matrix) of the lalsimutils InnerProduct
+#   classes against ip/norm on single COMPLEX16FrequencySeries
+
+
+import numpy as np
+import lal
+import RIFT.lalsimutils as lalsimutils
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--n-templates",type=int,default=5)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+fNyq = 256.
+deltaF = 1./4
+def make_series(n, length):
+    out = []
+    for indx in np.arange(n):
+        h = lal.CreateCOMPLEX16FrequencySeries("h", lal.LIGOTimeGPS(0.), 0., deltaF, lal.HertzUnit, length)
+        h.data.data = np.random.normal(size=length) + 1j*np.random.normal(size=length)
+        out.append(h)
+    return out
+
+def rel_err(a, b):
+    return np.max(np.abs(np.array(a) - np.array(b)))/np.max(np.abs(b))
+
+success = True
+for cls in [lalsimutils.RealIP, lalsimutils.HermitianComplexIP, lalsimutils.ComplexIP, lalsimutils.Overlap, lalsimutils.ComplexOverlap]:
+    IP = cls(fLow=20., fNyq=fNyq, deltaF=deltaF)
+    length = IP.len2side if cls.two_sided else IP.len1side
+    hs = make_series(opts.n_templates, length)
+    h_array = np.array([h.data.data for h in hs])
+    err_norm = rel_err(IP.norm_many(h_array), [IP.norm(h) for h in hs])
+    err_ip = rel_err(IP.ip_many(hs[0], h_array), [IP.ip(hs[0], h) for h in hs])
+    err_matrix = rel_err(IP.overlap_matrix(h_array)[1], IP.ip_many(hs[1], h_array))
+    ok = err_norm < 1e-12 and err_ip < 1e-12 and err_matrix < 1e-12
+    if cls in [lalsimutils.Overlap, lalsimutils.ComplexOverlap]:
+        IP.full_output = True
+        rho, tPeak, rhoPhase = IP.ip_many(hs[0], h_array, full_output=True)
+        ref = [IP.ip(hs[0], h) for h in hs]
+        t_ref = IP.wrap_times()[[x[2] for x in ref]]
+        ok = ok and rel_err(tPeak, t_ref) < 1e-12 and rel_err(rhoPhase, [x[3] for x in ref]) < 1e-12
+    print(cls.__name__, " norm ", err_norm, " ip ", err_ip, " matrix ", err_matrix, ok)
+    success = success and ok
+
+if opts.as_test and not success:
+    raise ValueError(" Array inner products do not match ip/norm ")
@@ -0,0 +1,36 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test the sparse (KD-tree) compact kernel of internal_GP against the dense construction
+
+
+import numpy as np
+import RIFT.interpolators.internal_GP as internal_GP
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--n-points",type=int,default=1000)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+def compact_kernel_dense(Xp, Xq, thetas, white_noise):
+    j = np.floor(len(thetas)/2.0) + 2
+    r = np.linalg.norm((Xp/thetas)[:,np.newaxis,:] - (Xq/thetas)[np.newaxis,:,:], axis=-1)
+    eta = np.maximum(1.0 - r, 0.0)
+    return (eta**(j + 1))*((j + 1)*r + 1.0) + white_noise*np.eye(len(Xp), len(Xq))
+
+success = True
+for d in [1, 3, 6]:
+    x = np.random.uniform(size=(opts.n_points, d))
+    y = np.random.uniform(size=(opts.n_points//2, d))
+    thetas = 0.3*np.ones(d)
+    for label, Xp, Xq, white_noise in [['train', x, x, 0.01], ['predict', y, x, 0.0]]:
+        K = internal_GP.compact_kernel(Xp, Xq, thetas, white_noise)
+        K_dense = compact_kernel_dense(Xp, Xq, thetas, white_noise)
+        err = np.max(np.abs(K.toarray() - K_dense))
+        ok = err < 1e-12 and K.nnz == np.count_nonzero(K_dense)
+        print(" d ", d, label, " nnz ", K.nnz, " max err ", err, ok)
+        success = success and ok
+
+if opts.as_test and not success:
+    raise ValueError(" Sparse compact kernel does not match dense construction ")
@@ -0,0 +1,59 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test the memory-budgeted blocks of DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop (max_bytes): a budget that forces
+#   several blocks (the last one partial) gives the same lnL as a single pass, on synthetic rholm time series
+
+
+import numpy as np
+import lal
+import RIFT.lalsimutils as lalsimutils
+import RIFT.likelihood.factored_likelihood as factored_likelihood
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--n-extrinsic",type=int,default=1000)
+parser.add_option("--n-block",type=int,default=137)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+deltaT = 1./4096
+n_full = 4096
+lms = np.array([[2,-2],[2,2],[2,1]])
+n_lms = len(lms)
+lookupNKDict, rholmsArrayDict, ctUArrayDict, ctVArrayDict, epochDict = {}, {}, {}, {}, {}
+for det in ['H1', 'L1', 'V1']:
+    lookupNKDict[det] = lms
+    rholmsArrayDict[det] = np.random.normal(size=(n_lms, n_full)) + 1j*np.random.normal(size=(n_lms, n_full))
+    X = np.random.normal(size=(n_lms, n_lms)) + 1j*np.random.normal(size=(n_lms, n_lms))
+    ctUArrayDict[det] = np.dot(X, np.conj(X.T))
+    ctVArrayDict[det] = 0.1*(X + X.T)
+    epochDict[det] = 1000000000.
+tvals = np.linspace(-0.05, 0.05, int(0.1/deltaT))
+
+n = opts.n_extrinsic
+P = lalsimutils.ChooseWaveformParams()
+P.deltaT = deltaT
+P.tref = 1000000000.5
+P.phi = np.random.uniform(0, 2*np.pi, size=n)
+P.theta = np.arccos(np.random.uniform(-1, 1, size=n))
+P.phiref = np.random.uniform(0, 2*np.pi, size=n)
+P.incl = np.arccos(np.random.uniform(-1, 1, size=n))
+P.psi = np.random.uniform(0, np.pi, size=n)
+P.dist = np.random.uniform(100, 1000, size=n)*1e6*lal.PC_SI
+
+args = (tvals, P, lookupNKDict, rholmsArrayDict, ctUArrayDict, ctVArrayDict, epochDict)
+lnL_ref = factored_likelihood.DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop(*args)
+max_bytes = factored_likelihood._bytes_per_extrinsic_time_sample*len(tvals)*opts.n_block
+lnL_blocks = factored_likelihood.DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop(*args, max_bytes=max_bytes)
+lnL_auto = factored_likelihood.DiscreteFactoredLogLikelihoodViaArrayVectorNoLoop(*args, max_bytes='auto')
+err = np.max(np.abs(lnL_blocks - lnL_ref))
+err_auto = np.max(np.abs(lnL_auto - lnL_ref))
+print(" blocks of ", opts.n_block, " of ", n, " max |delta lnL| ", err, " auto ", err_auto, " lnL range ", np.min(lnL_ref), np.max(lnL_ref))
+
+# the caller's P is unchanged by the slicing
+ok_P = len(P.phi) == n and len(P.dist) == n and P.tref == 1000000000.5
+success = len(lnL_blocks) == n and np.all(np.isfinite(lnL_ref)) and err < 1e-10 and err_auto < 1e-10 and ok_P
+
+if opts.as_test and not success:
+    raise ValueError(" Blocked likelihood does not match the single pass ")
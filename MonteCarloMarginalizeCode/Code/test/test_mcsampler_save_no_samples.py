@@ -0,0 +1,37 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test mcsamplerGPU.integrate_log with adaptation and save_no_samples=True (as ILE uses for adaptive_cartesian_gpu):
+#   the adaptation runs from the recent history, with the same result as when the samples are kept, and no sample
+#   locations are returned
+
+
+import numpy as np
+import RIFT.integrators.mcsamplerGPU as mcsampler
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--sigma",type=float,default=0.05)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+sigma = opts.sigma
+def lnF(x):
+    return -0.5*(x/sigma)**2 - np.log(np.sqrt(2*np.pi)*sigma)
+
+results = {}
+for save_no_samples in [False, True]:
+    np.random.seed(0)
+    sampler = mcsampler.MCSampler()
+    sampler.add_parameter('x', pdf=np.vectorize(lambda x: 0.5), cdf_inv=None, left_limit=-1, right_limit=1,
+                          prior_pdf=np.vectorize(lambda x: 0.5), adaptive_sampling=True)
+    pdf_initial = sampler.pdf['x']
+    lnI, lnVar, neff, dict_return = sampler.integrate_log(lnF, 'x', nmax=2e4, n=1000, n_adapt=10, tempering_exp=1.0,
+                                                         save_intg=True, save_no_samples=save_no_samples)
+    results[save_no_samples] = (lnI, lnVar, neff, not(sampler.pdf['x'] is pdf_initial), 'x' in sampler._rvs)
+    print(" save_no_samples ", save_no_samples, " lnI, lnVar, neff, adapted, samples returned ", results[save_no_samples])
+
+success = results[True][:4] == results[False][:4] and results[True][3] and results[False][4] and not results[True][4]
+
+if opts.as_test and not success:
+    raise ValueError(" integrate_log with save_no_samples and adaptation failed ")
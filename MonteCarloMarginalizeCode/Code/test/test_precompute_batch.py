@@ -0,0 +1,70 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test PrecomputeLikelihoodTermsBatch (shared data side, stacked FFT over templates) against one PrecomputeLikelihoodTerms call per template
+#   Synthetic zero-noise signal in H1, L1; analytic PSD
+
+
+import numpy as np
+import lal
+import lalsimulation as lalsim
+import RIFT.lalsimutils as lalsimutils
+import RIFT.likelihood.factored_likelihood as factored_likelihood
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--n-templates",type=int,default=4)
+parser.add_option("--fmin",type=float,default=30)
+parser.add_option("--srate",type=int,default=4096)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+t_window = 0.15
+Lmax = 2
+fmax = opts.srate/2.
+event_time = lal.LIGOTimeGPS(1000000000)
+
+Psig = lalsimutils.ChooseWaveformParams(fmin=opts.fmin, radec=True, incl=0.3, phiref=0.2, theta=0.4, phi=1.1, psi=0.2,
+         m1=20*lal.MSUN_SI, m2=15*lal.MSUN_SI, approx=lalsim.TaylorT4, deltaT=1./opts.srate,
+         tref=event_time, dist=500*1e6*lal.PC_SI)
+Psig.deltaF = lalsimutils.findDeltaF(Psig)
+
+data_dict = {}
+psd_dict = {}
+for det in ['H1', 'L1']:
+    Psig.detector = det
+    data_dict[det] = lalsimutils.non_herm_hoff(Psig)
+    psd_dict[det] = lalsim.SimNoisePSDaLIGOZeroDetHighPower
+
+P_list = []
+for indx in np.arange(opts.n_templates):
+    P = Psig.manual_copy()
+    P.m1 *= 1 + 0.05*np.random.uniform(-1, 1)
+    P.m2 *= 1 + 0.05*np.random.uniform(-1, 1)
+    P.dist = factored_likelihood.distMpcRef*1e6*lal.PC_SI
+    P.tref = event_time
+    P_list.append(P)
+
+results = factored_likelihood.PrecomputeLikelihoodTermsBatch(event_time, t_window, P_list, data_dict, psd_dict, Lmax, fmax,
+        analyticPSD_Q=True, verbose=False)
+
+err_max = 0
+for P, res in zip(P_list, results):
+    if isinstance(res, Exception):
+        raise res
+    rholms_intp, crossTerms, crossTermsV, rholms, guess_snr, _ = factored_likelihood.PrecomputeLikelihoodTerms(event_time, t_window, P,
+            data_dict, psd_dict, Lmax, fmax, analyticPSD_Q=True, verbose=False)
+    rholms_intp_b, crossTerms_b, crossTermsV_b, rholms_b, guess_snr_b, _ = res
+    scale = np.max([np.abs(crossTerms[det][key]) for det in crossTerms for key in crossTerms[det]])
+    err_U = np.max([np.abs(crossTerms[det][key] - crossTerms_b[det][key]) for det in crossTerms for key in crossTerms[det]])/scale
+    err_V = np.max([np.abs(crossTermsV[det][key] - crossTermsV_b[det][key]) for det in crossTermsV for key in crossTermsV[det]])/scale
+    scale_rho = np.max([np.max(np.abs(rholms[det][mode].data.data)) for det in rholms for mode in rholms[det]])
+    err_rho = np.max([np.max(np.abs(rholms[det][mode].data.data - rholms_b[det][mode].data.data)) for det in rholms for mode in rholms[det]])/scale_rho
+    err_epoch = np.max([np.abs(float(rholms[det][mode].epoch - rholms_b[det][mode].epoch)) for det in rholms for mode in rholms[det]])
+    t_test = float(rholms[det][(2,2)].epoch) + t_window
+    err_intp = np.max([np.abs(rholms_intp[det][mode](t_test) - rholms_intp_b[det][mode](t_test)) for det in rholms_intp for mode in rholms_intp[det]])/scale_rho
+    print(" Template ", P.m1/lal.MSUN_SI, P.m2/lal.MSUN_SI, " U ", err_U, " V ", err_V, " rho ", err_rho, " epoch ", err_epoch, " intp ", err_intp)
+    err_max = np.max([err_max, err_U, err_V, err_rho, err_intp, err_epoch])
+
+if opts.as_test and err_max > 1e-10:
+    raise ValueError(" Batch precompute does not reproduce per-template precompute ")
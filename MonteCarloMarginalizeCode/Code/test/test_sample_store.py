@@ -0,0 +1,46 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test SampleStore (preallocated sample cache) against hstack-based accumulation, including the bounded (top-K) mode
+
+
+import numpy as np
+from RIFT.integrators.sample_store import SampleStore
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--n-chunk",type=int,default=1000)
+parser.add_option("--n-iterations",type=int,default=50)
+parser.add_option("--n-keep",type=int,default=500)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+names = ['x', 'y', 'log_integrand']
+n_protect = 2*opts.n_chunk
+
+store = SampleStore(names)
+store_bounded = SampleStore(names, max_rows=opts.n_keep, key='log_integrand', n_protect=n_protect)
+ref = dict((name, np.array([])) for name in names)
+for indx in np.arange(opts.n_iterations):
+    chunk = dict((name, np.random.normal(size=opts.n_chunk)) for name in names)
+    store.append(chunk)
+    store_bounded.append(chunk)
+    for name in names:
+        ref[name] = np.hstack((ref[name], chunk[name]))
+
+# Growing store: identical content
+err = np.max([np.max(np.abs(store[name] - ref[name])) for name in names])
+print(" Growing store: deviation ", err, " capacity ", store.capacity, " rows ", len(store))
+if opts.as_test and (err > 0 or not np.all(store.sample_n == np.arange(len(ref['x'])))):
+    raise ValueError(" Growing store does not reproduce hstack ")
+
+# Bounded store: retains the top-K by lnL, and the most recent samples
+lnL = ref['log_integrand']
+indx_top = np.sort(np.argsort(-lnL[:-n_protect])[:opts.n_keep])
+n_rows_ok = len(store_bounded) <= opts.n_keep + n_protect + 2*opts.n_chunk
+top_ok = set(indx_top).issubset(set(store_bounded.sample_n))
+recent_ok = np.all(store_bounded['x'][-n_protect:] == ref['x'][-n_protect:])
+consistent = np.all(store_bounded['x'] == ref['x'][store_bounded.sample_n])
+print(" Bounded store: rows ", len(store_bounded), " capacity ", store_bounded.capacity, " top-K retained ", top_ok, " recent retained ", recent_ok)
+if opts.as_test and not (n_rows_ok and top_ok and recent_ok and consistent):
+    raise ValueError(" Bounded store lost samples it should retain ")
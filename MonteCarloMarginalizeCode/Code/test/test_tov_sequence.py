@@ -0,0 +1,53 @@
+#! /usr/bin/env python
+#
+# GOAL
+#   test the TOV sequence engine of EOSManager.make_mr_lambda: the process pool reproduces the serial fixed grid,
+#   the adaptive grid reproduces the maximum mass and Lambda(m), and the on-disk cache returns the saved curve
+
+
+import time
+import tempfile
+import numpy as np
+import lalsimulation as lalsim
+import RIFT.physics.EOSManager as EOSManager
+
+import optparse
+parser = optparse.OptionParser()
+parser.add_option("--eos",default='SLY4')
+parser.add_option("--n-procs",type=int,default=2)
+parser.add_option("--as-test",action='store_true')
+opts, args = parser.parse_args()
+
+eos = lalsim.SimNeutronStarEOSByName(opts.eos)
+
+def stable_branch(dat):
+    return dat[:np.argmax(dat[:,1])+1]
+
+t_start = time.time()
+dat_ref = EOSManager.make_mr_lambda(eos)
+print(" serial fixed grid ", len(dat_ref), time.time() - t_start)
+t_start = time.time()
+dat_pool = EOSManager.make_mr_lambda(eos, n_procs=opts.n_procs)
+print(" pool fixed grid ", len(dat_pool), time.time() - t_start)
+t_start = time.time()
+dat_adapt = EOSManager.make_mr_lambda(eos, n_procs=opts.n_procs, adaptive=True)
+print(" pool adaptive grid ", len(dat_adapt), time.time() - t_start)
+
+success = np.array_equal(dat_ref, dat_pool)
+ref, adapt = stable_branch(dat_ref), stable_branch(dat_adapt)
+err_mmax = np.abs(adapt[-1,1] - ref[-1,1])
+m_vals = np.linspace(1.0, min(ref[-1,1], adapt[-1,1]) - 0.01, 200)
+err_lambda = np.max(np.abs(np.interp(m_vals, adapt[:,1], adapt[:,2])/np.interp(m_vals, ref[:,1], ref[:,2]) - 1))
+print(" Mmax ", ref[-1,1], adapt[-1,1], " max fractional Lambda(m) error ", err_lambda)
+success = success and err_mmax < 1e-4 and err_lambda < 5e-3 and np.all(np.diff(adapt[:,1]) > 0)
+
+dir_cache = tempfile.mkdtemp()
+cache_key = {'name': opts.eos}
+dat_save = EOSManager.make_mr_lambda(eos, adaptive=True, cache_key=cache_key, cache_dir=dir_cache)
+t_start = time.time()
+dat_load = EOSManager.make_mr_lambda(eos, adaptive=True, cache_key=cache_key, cache_dir=dir_cache)
+print(" cached ", time.time() - t_start)
+success = success and np.array_equal(dat_save, dat_adapt) and np.array_equal(dat_load, dat_save)
+
+if opts.as_test and not success:
+    raise ValueError(" TOV sequence engine does not reproduce the serial mass-radius curve ")
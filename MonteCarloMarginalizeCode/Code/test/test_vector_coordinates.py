@@ -12,6 +12,7 @@ parser = optparse.OptionParser()
 parser.add_option("--npts",type=int,default=3)
 parser.add_option("--as-test",action='store_true')
 parser.add_option("--verbose",action='store_true')
+parser.add_option("--n-benchmark",type=int,default=0,help="Number of points used to time the vectorized fallthrough conversion")
 opts, args = parser.parse_args()
 
 
@@ -239,3 +240,58 @@ print("Cylinder test 2", np.max(np.abs(x1 - x2)))
 err = np.max(np.abs(x1 - x2))
 if opts.as_test and err > 1e-9:
     raise ValueError(" Large deviation seen ")
+
+
+# Fallthrough (general) conversions: vectorized ChooseWaveformParamsVector against per-point ChooseWaveformParams
+def convert_per_point(x_in, coord_names, low_level_coord_names, source_redshift=0):
+    x_out = np.zeros((len(x_in), len(coord_names)))
+    for indx in np.arange(len(x_in)):
+        P = lalsimutils.ChooseWaveformParams()
+        for indx_name2 in np.arange(len(low_level_coord_names)):
+            P.assign_param(low_level_coord_names[indx_name2], x_in[indx, indx_name2])
+        P.m1 *= (1+source_redshift)
+        P.m2 *= (1+source_redshift)
+        for indx_name in np.arange(len(coord_names)):
+            x_out[indx, indx_name] = P.extract_param(coord_names[indx_name])
+    return x_out
+
+for P in P_list:
+    P.fref = 20.
+    P.lambda1, P.lambda2 = np.random.uniform(0, 1000, size=2)
+fallthrough_tests = [
+  (['mtot', 'q', 'LambdaTilde', 'DeltaLambdaTilde', 'chi1_perp', 'shu', 'SoverM2', 'theta1', 'phi2'], ['m1', 'm2', 's1x', 's1y', 's1z', 's2x', 's2y', 's2z', 'lambda1', 'lambda2']),
+  (['m1', 'm2', 's1x', 's1y', 's1z', 'lambda1', 'lambda2'], ['mc', 'delta_mc', 'chi1', 'cos_theta1', 'phi1', 'LambdaTilde', 'DeltaLambdaTilde']),
+  (['thetaJN', 'phiJL', 'theta1_Jfix', 'theta2_Jfix', 'psiJ', 'cos_beta'], ['m1', 'm2', 's1x', 's1y', 's1z', 's2x', 's2y', 's2z', 'incl', 'psi', 'phiref', 'fref']),
+  (['m1', 'm2', 's1z', 's2z'], ['mtot', 'q', 'chieff_aligned', 'chiz_minus']),
+]
+for coord_names, low_level_coord_names in fallthrough_tests:
+    y2 = np.array([[P.extract_param(p) for p in low_level_coord_names] for P in P_list])
+    for source_redshift in [0, 0.3]:
+        x1 = convert_per_point(y2, coord_names, low_level_coord_names, source_redshift=source_redshift)
+        x2 = lalsimutils.convert_waveform_coordinates(y2, coord_names=coord_names, low_level_coord_names=low_level_coord_names, source_redshift=source_redshift)
+        err = np.max(np.abs(x1 - x2)/np.maximum(1, np.abs(x1)))
+        print("Fallthrough test ", low_level_coord_names[:3], "->", coord_names[:3], " z=", source_redshift, err)
+        if opts.as_test and err > 1e-9:
+            raise ValueError(" Large deviation seen ")
+
+# Kerr bound: rows which violate it are returned as -inf
+y2 = np.array([[30., 20., 0.9, 0.9, 0.1], [30., 20., 0.1, 0.1, 0.1]])
+x2 = lalsimutils.convert_waveform_coordinates(y2, coord_names=['mtot', 'chi1'], low_level_coord_names=['m1', 'm2', 's1x', 's1y', 's1z'], enforce_kerr=True)
+print("Kerr bound test ", x2)
+if opts.as_test and not (np.all(np.isinf(x2[0])) and np.all(np.isfinite(x2[1]))):
+    raise ValueError(" Kerr bound not enforced ")
+
+# Timing: vectorized versus per-point
+if opts.n_benchmark > 0:
+    import time
+    coord_names, low_level_coord_names = fallthrough_tests[0]
+    y2 = np.array([[P.extract_param(p) for p in low_level_coord_names] for P in P_list])
+    y2 = y2[np.random.randint(len(y2), size=opts.n_benchmark)]
+    t_start = time.time()
+    lalsimutils.convert_waveform_coordinates(y2, coord_names=coord_names, low_level_coord_names=low_level_coord_names)
+    t_vector = time.time() - t_start
+    n_ref = min(opts.n_benchmark, 10000)
+    t_start = time.time()
+    convert_per_point(y2[:n_ref], coord_names, low_level_coord_names)
+    t_ref = (time.time() - t_start)*opts.n_benchmark/n_ref
+    print(" Benchmark ", opts.n_benchmark, " points: vectorized ", t_vector, "s ;  per-point (extrapolated) ", t_ref, "s")